@@ -1,21 +1,28 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import List, Optional
 from app.database import get_collection
+from app.geocoding import geocode
 from app.models.animal import (
     AnimalCreate, AnimalUpdate, AnimalResponse, AnimalListResponse,
     AnimalInDB, AnimalStatus
 )
-from app.auth.dependencies import get_current_active_user, get_current_farmer
-from app.models.user import UserInDB
+from app.auth.dependencies import get_current_active_user, get_current_farmer, require_animal_owner
+from app.models.user import TokenUser
+from app.services.listing_read_model import listing_read_model
+from app.services.ownership import ownership
+from app.pagination import decode_cursor, keyset_filter, split_page
 from bson import ObjectId
 from datetime import datetime
 
 router = APIRouter(prefix="/animals", tags=["animals"])
 
+# Newest first; _id breaks ties so keyset pages never skip or repeat animals
+ANIMALS_SORT = [("created_at", -1), ("_id", -1)]
+
 @router.post("/", response_model=AnimalResponse, status_code=status.HTTP_201_CREATED)
 async def create_animal(
     animal_data: AnimalCreate,
-    current_user: UserInDB = Depends(get_current_farmer)
+    current_user: TokenUser = Depends(get_current_farmer)
 ):
     """Create a new animal."""
     animals_collection = get_collection("animals")
@@ -23,11 +30,13 @@ async def create_animal(
     # Set the owner_id to current user
     animal_dict = animal_data.dict()
     animal_dict["owner_id"] = current_user.id
+    animal_dict["location_geo"] = geocode(animal_dict["location"])
     animal_dict["created_at"] = datetime.utcnow()
     animal_dict["updated_at"] = datetime.utcnow()
     
     result = await animals_collection.insert_one(animal_dict)
     animal_dict["_id"] = str(result.inserted_id)
+    ownership.animal_created(animal_dict["_id"], current_user.id)
     
     return AnimalResponse(**animal_dict)
 
@@ -38,9 +47,14 @@ async def get_animals(
     status: Optional[AnimalStatus] = Query(None, description="Filter by status"),
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Page size"),
-    current_user: UserInDB = Depends(get_current_active_user)
+    after: Optional[str] = Query(None, description="Continuation token from next_cursor; replaces page"),
+    current_user: TokenUser = Depends(get_current_active_user)
 ):
-    """Get list of animals with optional filtering."""
+    """Get list of animals with optional filtering.
+    
+    Pass the returned next_cursor as after to fetch the following page; it
+    stays fast at any depth, unlike page, which skips documents.
+    """
     animals_collection = get_collection("animals")
     
     # Build filter
@@ -55,12 +69,17 @@ async def get_animals(
     # Count total documents
     total = await animals_collection.count_documents(filter_query)
     
-    # Get paginated results
-    skip = (page - 1) * size
-    cursor = animals_collection.find(filter_query).skip(skip).limit(size).sort("created_at", -1)
+    # Get paginated results, one extra to detect the next page
+    page_query = dict(filter_query)
+    if after:
+        page_query.update(keyset_filter("created_at", *decode_cursor(after)))
+    cursor = animals_collection.find(page_query).sort(ANIMALS_SORT).limit(size + 1)
+    if not after:
+        cursor = cursor.skip((page - 1) * size)
+    documents, next_cursor = split_page(await cursor.to_list(length=size + 1), size)
     
     animals = []
-    async for animal in cursor:
+    for animal in documents:
         animal["_id"] = str(animal["_id"])
         animals.append(AnimalResponse(**animal))
     
@@ -68,13 +87,14 @@ async def get_animals(
         animals=animals,
         total=total,
         page=page,
-        size=size
+        size=size,
+        next_cursor=next_cursor
     )
 
 @router.get("/{animal_id}", response_model=AnimalResponse)
 async def get_animal(
     animal_id: str,
-    current_user: UserInDB = Depends(get_current_active_user)
+    current_user: TokenUser = Depends(get_current_active_user)
 ):
     """Get a specific animal by ID."""
     animals_collection = get_collection("animals")
@@ -100,97 +120,75 @@ async def get_animal(
 async def update_animal(
     animal_id: str,
     animal_update: AnimalUpdate,
-    current_user: UserInDB = Depends(get_current_farmer)
+    current_user: TokenUser = Depends(get_current_farmer)
 ):
     """Update an animal."""
     animals_collection = get_collection("animals")
     
-    try:
-        # Check if animal exists and belongs to current user
-        animal = await animals_collection.find_one({"_id": ObjectId(animal_id)})
-        if not animal:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Animal not found"
-            )
-        
-        if animal["owner_id"] != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to update this animal"
-            )
-        
-        # Update animal
-        update_data = animal_update.dict(exclude_unset=True)
-        update_data["updated_at"] = datetime.utcnow()
-        
-        await animals_collection.update_one(
-            {"_id": ObjectId(animal_id)},
-            {"$set": update_data}
-        )
-        
-        # Get updated animal
-        updated_animal = await animals_collection.find_one({"_id": ObjectId(animal_id)})
-        updated_animal["_id"] = str(updated_animal["_id"])
-        
-        return AnimalResponse(**updated_animal)
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid animal ID"
-        )
+    # Check if animal exists and belongs to current user
+    await require_animal_owner(animal_id, current_user, "Not authorized to update this animal")
+    
+    # Update animal
+    update_data = animal_update.dict(exclude_unset=True)
+    update_data["updated_at"] = datetime.utcnow()
+    if update_data.get("location"):
+        update_data["location_geo"] = geocode(update_data["location"])
+    
+    await animals_collection.update_one(
+        {"_id": ObjectId(animal_id)},
+        {"$set": update_data}
+    )
+    ownership.animal_changed(animal_id)
+    
+    # Get updated animal
+    updated_animal = await animals_collection.find_one({"_id": ObjectId(animal_id)})
+    if {"name", "health_score", "species"} & update_data.keys():
+        await listing_read_model.animal_changed(updated_animal)
+    updated_animal["_id"] = str(updated_animal["_id"])
+    
+    return AnimalResponse(**updated_animal)
 
 @router.delete("/{animal_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_animal(
     animal_id: str,
-    current_user: UserInDB = Depends(get_current_farmer)
+    current_user: TokenUser = Depends(get_current_farmer)
 ):
     """Delete an animal."""
     animals_collection = get_collection("animals")
     
-    try:
-        # Check if animal exists and belongs to current user
-        animal = await animals_collection.find_one({"_id": ObjectId(animal_id)})
-        if not animal:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Animal not found"
-            )
-        
-        if animal["owner_id"] != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to delete this animal"
-            )
-        
-        # Delete animal
-        await animals_collection.delete_one({"_id": ObjectId(animal_id)})
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid animal ID"
-        )
+    # Check if animal exists and belongs to current user
+    await require_animal_owner(animal_id, current_user, "Not authorized to delete this animal")
+    
+    # Delete animal and revoke its gateway devices
+    await animals_collection.delete_one({"_id": ObjectId(animal_id)})
+    ownership.animal_deleted(animal_id, current_user.id)
+    await get_collection("devices").delete_many({"animal_id": animal_id})
+    await listing_read_model.animal_deleted(animal_id)
 
 @router.get("/my/animals", response_model=AnimalListResponse)
 async def get_my_animals(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Page size"),
-    current_user: UserInDB = Depends(get_current_farmer)
+    after: Optional[str] = Query(None, description="Continuation token from next_cursor; replaces page"),
+    current_user: TokenUser = Depends(get_current_farmer)
 ):
-    """Get current user's animals."""
+    """Get current user's animals (paginate with page or after, see get_animals)."""
     animals_collection = get_collection("animals")
     
     # Count total documents
     total = await animals_collection.count_documents({"owner_id": current_user.id})
     
-    # Get paginated results
-    skip = (page - 1) * size
-    cursor = animals_collection.find({"owner_id": current_user.id}).skip(skip).limit(size).sort("created_at", -1)
+    # Get paginated results, one extra to detect the next page
+    page_query = {"owner_id": current_user.id}
+    if after:
+        page_query.update(keyset_filter("created_at", *decode_cursor(after)))
+    cursor = animals_collection.find(page_query).sort(ANIMALS_SORT).limit(size + 1)
+    if not after:
+        cursor = cursor.skip((page - 1) * size)
+    documents, next_cursor = split_page(await cursor.to_list(length=size + 1), size)
     
     animals = []
-    async for animal in cursor:
+    for animal in documents:
         animal["_id"] = str(animal["_id"])
         animals.append(AnimalResponse(**animal))
     
@@ -198,5 +196,6 @@ async def get_my_animals(
         animals=animals,
         total=total,
         page=page,
-        size=size
+        size=size,
+        next_cursor=next_cursor
     )
@@ -2,14 +2,55 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import HTTPBearer
 from app.database import get_collection
-from app.auth.jwt import verify_password, get_password_hash, create_access_token
-from app.models.user import UserCreate, UserLogin, Token, UserResponse, UserInDB
+from app.auth.jwt import create_access_token, user_token_claims
+from app.auth.passwords import password_hasher
+from app.models.user import UserCreate, UserLogin, UserUpdate, AdminUserUpdate, Token, TokenUser, UserResponse, UserInDB
 from bson import ObjectId
+from pymongo import ReturnDocument
 from datetime import datetime
-from app.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_current_admin
+from app.services.listing_read_model import listing_read_model
+from app.services.token_revocations import token_revocations
+from app.services.user_cache import invalidate_user
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
+async def update_user(user_id: str, update_data: dict) -> UserInDB:
+    """Write changes to a user document and drop every copy derived from it.
+    
+    A new name is copied to the user's listings. Deactivating a user or
+    changing their role also revokes their tokens, which may carry the old
+    role and active flag as claims; other workers apply that within
+    TOKEN_REVOCATION_REFRESH_SECONDS rather than waiting for their cached
+    copy of the user to expire.
+    """
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    update_data["updated_at"] = datetime.utcnow()
+    user = await get_collection("users").find_one_and_update(
+        {"_id": ObjectId(user_id)},
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
+    )
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    invalidate_user(user_id)
+    if "name" in update_data:
+        await listing_read_model.seller_changed(user_id, user["name"])
+    if update_data.get("is_active") is False or "role" in update_data:
+        await token_revocations.revoke(user_id)
+    
+    user["_id"] = str(user["_id"])
+    return UserInDB(**user)
+
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserCreate):
     """Register a new user."""
@@ -25,7 +66,7 @@ async def register(user_data: UserCreate):
     
     # Create new user
     user_dict = user_data.dict()
-    user_dict["hashed_password"] = get_password_hash(user_dict.pop("password"))
+    user_dict["hashed_password"] = await password_hasher.hash(user_dict.pop("password"))
     user_dict["created_at"] = datetime.utcnow()
     user_dict["updated_at"] = datetime.utcnow()
     
@@ -33,9 +74,7 @@ async def register(user_data: UserCreate):
     user_dict["_id"] = str(result.inserted_id)
     
     # Create access token
-    access_token = create_access_token(
-        data={"sub": user_data.email, "user_id": str(result.inserted_id)}
-    )
+    access_token = create_access_token(data=user_token_claims(user_dict))
     
     # Prepare response
     user_response = UserResponse(
@@ -69,7 +108,7 @@ async def login(user_credentials: UserLogin):
         )
     
     # Verify password
-    if not verify_password(user_credentials.password, user["hashed_password"]):
+    if not await password_hasher.verify(user_credentials.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -84,9 +123,7 @@ async def login(user_credentials: UserLogin):
         )
     
     # Create access token
-    access_token = create_access_token(
-        data={"sub": user["email"], "user_id": str(user["_id"])}
-    )
+    access_token = create_access_token(data=user_token_claims(user))
     
     # Prepare response
     user_response = UserResponse(
@@ -122,5 +159,37 @@ async def get_current_user_info(current_user: UserInDB = Depends(get_current_use
         is_active=current_user.is_active
     )
 
-def get_current_user():
-    pass
+@router.put("/me", response_model=UserResponse)
+async def update_current_user_info(
+    user_update: UserUpdate,
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Update the current user's profile (KYC status is set by admins)."""
+    update_data = user_update.dict(exclude_unset=True, exclude={"kyc_status"})
+    user = await update_user(current_user.id, update_data)
+    return UserResponse(**user.dict())
+
+@router.put("/users/{user_id}", response_model=UserResponse)
+async def update_user_info(
+    user_id: str,
+    user_update: AdminUserUpdate,
+    current_user: TokenUser = Depends(get_current_admin)
+):
+    """Update any user, including KYC status, role and deactivation (admin only)."""
+    user = await update_user(user_id, user_update.dict(exclude_unset=True))
+    return UserResponse(**user.dict())
+
+@router.post("/users/{user_id}/revoke-tokens", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_user_tokens(
+    user_id: str,
+    current_user: TokenUser = Depends(get_current_admin)
+):
+    """Invalidate every access token issued to a user so far (admin only)."""
+    token_version = await token_revocations.revoke(user_id)
+    if token_version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    invalidate_user(user_id)
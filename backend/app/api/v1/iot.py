@@ -1,159 +1,323 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from typing import List, Optional, Union
+from pydantic import ValidationError
+from app.config import settings
 from app.database import get_collection
 from app.models.iot import (
     IoTMetricsCreate, IoTMetricsUpdate, IoTMetricsResponse, IoTMetricsListResponse,
-    IoTMetricsInDB, FeedingStatus, SignalStrength
+    IoTMetricsInDB, FeedingStatus, SignalStrength,
+    IoTMetricsBatchCreate, IoTMetricsBatchResult, IoTMetricsBatchResponse,
+    IoTMetricsRollupListResponse, IoTMetricsColumnarResponse, MetricsResolution, MetricsFormat,
+    FleetLatestEntry, FleetLatestResponse, IoTAlertResponse, IoTAlertListResponse,
+    IoTAnimalStats, IoTMetricsStatsResponse, FleetStatsResponse,
+    IoTDeviceCreate, IoTDeviceResponse, IoTDeviceCreatedResponse, IoTDeviceListResponse
 )
-from app.auth.dependencies import get_current_active_user, get_current_farmer
-from app.models.user import UserInDB
+from app.auth.dependencies import get_current_active_user, get_current_farmer, owned_animal_id, require_animal_owner
+from app.models.user import TokenUser
+from app.gateway.devices import hash_device_key, new_device_key
+from app.pagination import encode_cursor, decode_cursor, keyset_filter
+from app.services.ingest_buffer import ingest_buffer
+from app.services.iot_alerts import alert_engine
+from app.services.iot_analytics import load_window, summarize, window_stats
+from app.services.iot_archive import count_merged, merge_readings, read_archived, retention_cutoff
+from app.services.iot_columnar import collect_columnar
+from app.services.iot_ingest import insert_metrics
+from app.services.iot_rollups import choose_resolution, get_rollups
+from app.services.latest_readings import latest_readings
+from app.services.metrics_broadcast import metrics_broadcaster
+from app.services.ownership import ownership
 from bson import ObjectId
 from datetime import datetime, timedelta
+import json
 import random
 
 router = APIRouter(prefix="/iot", tags=["iot"])
 
+RAW_HISTORY_MAX_HOURS = 168
+
+# Ownership check for /metrics/{animal_id}/... read routes
+owned_metrics_animal = owned_animal_id("Not authorized to access metrics for this animal")
+
+# Keyset order for readings; ties on timestamp are common with batch ingest
+METRICS_SORT = [("timestamp", -1), ("_id", -1)]
+
+# Reading fields that can be selected in fleet snapshots
+FLEET_FIELDS = [
+    field for field in IoTMetricsResponse.model_fields
+    if field not in ("id", "animal_id", "timestamp")
+]
+
+def _new_metrics_document(metrics_data: IoTMetricsCreate, timestamp: datetime) -> dict:
+    """Build the stored document for a validated reading."""
+    metrics_dict = metrics_data.dict()
+    metrics_dict["timestamp"] = timestamp
+    metrics_dict["location"] = {}
+    metrics_dict["additional_data"] = {}
+    return metrics_dict
+
+def _enqueue_metrics(documents: List[dict], response: Response):
+    """Hand readings to the write-behind buffer and answer 202, or 429 when it is full."""
+    for document in documents:
+        document["_id"] = ObjectId()
+    
+    if not ingest_buffer.offer(documents):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Ingest queue is full, retry later",
+            headers={"Retry-After": "1"}
+        )
+    response.status_code = status.HTTP_202_ACCEPTED
+
+def _serialize_metric(metric: dict) -> dict:
+    """Convert a stored reading into a JSON-ready dict without model validation."""
+    metric["id"] = str(metric.pop("_id"))
+    metric["timestamp"] = metric["timestamp"].isoformat()
+    return metric
+
+async def _stream_metrics(cursor, limit: Optional[int]):
+    """Yield stored readings as NDJSON lines.
+    
+    When paginating, the cursor is expected to fetch limit + 1 readings; the
+    extra one only signals that a trailing next_cursor line must be sent.
+    """
+    sent = 0
+    last_position = None
+    async for metric in cursor:
+        if limit is not None and sent == limit:
+            yield json.dumps({"next_cursor": encode_cursor(*last_position)}) + "\n"
+            return
+        
+        last_position = (metric["timestamp"], metric["_id"])
+        yield json.dumps(_serialize_metric(metric), default=str) + "\n"
+        sent += 1
+
+async def _columnar_response(
+    cursor, limit: Optional[int], total: int, animal_id: str, last_updated: datetime
+) -> Response:
+    """Serialize readings column-wise, bypassing per-row response models."""
+    payload, next_cursor = await collect_columnar(cursor, limit)
+    payload.update(
+        total=total,
+        animal_id=animal_id,
+        last_updated=last_updated.isoformat(),
+        next_cursor=next_cursor
+    )
+    return Response(json.dumps(payload, separators=(",", ":"), default=str), media_type="application/json")
+
+async def _live_metrics_events(request: Request, animal_ids: set):
+    """Yield Server-Sent Events for new readings of the subscribed animals."""
+    try:
+        subscription = metrics_broadcaster.subscribe(animal_ids)
+    except RuntimeError:
+        return
+    
+    try:
+        yield f"retry: 3000\n: subscribed to {len(animal_ids)} animals\n\n"
+        while not await request.is_disconnected():
+            payloads = await subscription.next_batch(settings.iot_stream_heartbeat_seconds)
+            if not payloads:
+                yield ": keepalive\n\n"
+                continue
+            yield "".join(f"event: metrics\ndata: {payload}\n\n" for payload in payloads)
+    finally:
+        metrics_broadcaster.unsubscribe(subscription)
+
+async def _collect_metrics(cursor, limit: Optional[int]):
+    """Load readings into response models and compute the next page cursor."""
+    metrics = []
+    async for metric in cursor:
+        if limit is not None and len(metrics) == limit:
+            last_metric = metrics[-1]
+            return metrics, encode_cursor(last_metric.timestamp, last_metric.id)
+        
+        metric["_id"] = str(metric["_id"])
+        metrics.append(IoTMetricsResponse(**metric))
+    
+    return metrics, None
+
 @router.post("/metrics", response_model=IoTMetricsResponse, status_code=status.HTTP_201_CREATED)
 async def create_iot_metrics(
     metrics_data: IoTMetricsCreate,
-    current_user: UserInDB = Depends(get_current_farmer)
+    response: Response,
+    current_user: TokenUser = Depends(get_current_farmer)
 ):
-    """Create new IoT metrics for an animal."""
-    iot_collection = get_collection("iot_metrics")
-    animals_collection = get_collection("animals")
+    """Create new IoT metrics for an animal.
     
+    With write-behind ingest enabled the reading is queued and answered
+    with 202 before it reaches MongoDB.
+    """
     # Verify the animal belongs to the current user
-    try:
-        animal = await animals_collection.find_one({"_id": ObjectId(metrics_data.animal_id)})
-        if not animal:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Animal not found"
-            )
-        
-        if animal["owner_id"] != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to create metrics for this animal"
-            )
-            
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid animal ID"
-        )
+    await require_animal_owner(metrics_data.animal_id, current_user, "Not authorized to create metrics for this animal")
     
     # Create metrics
-    metrics_dict = metrics_data.dict()
-    metrics_dict["timestamp"] = datetime.utcnow()
+    metrics_dict = _new_metrics_document(metrics_data, datetime.utcnow())
     
-    result = await iot_collection.insert_one(metrics_dict)
-    metrics_dict["_id"] = str(result.inserted_id)
+    if settings.iot_write_behind_enabled:
+        _enqueue_metrics([metrics_dict], response)
+        return IoTMetricsResponse(**{**metrics_dict, "_id": str(metrics_dict["_id"])})
+    
+    write_errors = await insert_metrics([metrics_dict])
+    if write_errors:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to store metrics"
+        )
+    metrics_dict["_id"] = str(metrics_dict["_id"])
     
     return IoTMetricsResponse(**metrics_dict)
 
-@router.get("/metrics", response_model=IoTMetricsListResponse)
+@router.post("/metrics:batch", response_model=IoTMetricsBatchResponse)
+async def create_iot_metrics_batch(
+    batch: IoTMetricsBatchCreate,
+    response: Response,
+    current_user: TokenUser = Depends(get_current_farmer)
+):
+    """Create IoT metrics for many readings in one request.
+    
+    With write-behind ingest enabled the valid readings are queued together
+    and answered with 202; the batch is refused with 429 if they do not fit.
+    """
+    if len(batch.metrics) > settings.iot_batch_max_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds {settings.iot_batch_max_size} records"
+        )
+    
+    results: List[Optional[IoTMetricsBatchResult]] = [None] * len(batch.metrics)
+    
+    # Validate each record on its own
+    readings = []
+    for index, raw_metrics in enumerate(batch.metrics):
+        try:
+            readings.append((index, IoTMetricsCreate(**raw_metrics)))
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = ".".join(str(part) for part in error["loc"])
+            results[index] = IoTMetricsBatchResult(
+                index=index,
+                accepted=False,
+                error=f"{field}: {error['msg']}" if field else error["msg"]
+            )
+    
+    # Check ownership of every distinct animal, with at most one query
+    owners = await ownership.owners_of(reading.animal_id for _, reading in readings)
+    
+    # Build documents for the readings that passed every check
+    timestamp = datetime.utcnow()
+    documents = []
+    positions = []
+    for index, reading in readings:
+        if not ObjectId.is_valid(reading.animal_id):
+            error = "Invalid animal ID"
+        elif reading.animal_id not in owners:
+            error = "Animal not found"
+        elif owners[reading.animal_id] != current_user.id:
+            error = "Not authorized to create metrics for this animal"
+        else:
+            documents.append(_new_metrics_document(reading, timestamp))
+            positions.append(index)
+            continue
+        
+        results[index] = IoTMetricsBatchResult(index=index, accepted=False, error=error)
+    
+    if settings.iot_write_behind_enabled:
+        _enqueue_metrics(documents, response)
+        write_errors = {}
+    else:
+        write_errors = await insert_metrics(documents)
+    
+    for position, (index, document) in enumerate(zip(positions, documents)):
+        if position in write_errors:
+            results[index] = IoTMetricsBatchResult(
+                index=index,
+                accepted=False,
+                error=write_errors[position]
+            )
+        else:
+            results[index] = IoTMetricsBatchResult(
+                index=index,
+                accepted=True,
+                id=str(document["_id"])
+            )
+    
+    accepted = sum(1 for result in results if result.accepted)
+    
+    return IoTMetricsBatchResponse(
+        accepted=accepted,
+        rejected=len(results) - accepted,
+        results=results
+    )
+
+@router.get("/metrics", response_model=Union[IoTMetricsListResponse, IoTMetricsColumnarResponse])
 async def get_iot_metrics(
     animal_id: Optional[str] = Query(None, description="Filter by animal ID"),
     limit: int = Query(10, ge=1, le=100, description="Number of records to return"),
-    current_user: UserInDB = Depends(get_current_active_user)
+    after: Optional[str] = Query(None, description="Continuation token from next_cursor"),
+    format: MetricsFormat = Query(MetricsFormat.JSON, description="json, ndjson or columnar"),
+    current_user: TokenUser = Depends(get_current_active_user)
 ):
-    """Get IoT metrics with optional filtering."""
+    """Get IoT metrics with optional filtering.
+    
+    Results are ordered newest first and paginate with the opaque
+    next_cursor token passed back as after.
+    """
     iot_collection = get_collection("iot_metrics")
-    animals_collection = get_collection("animals")
     
     # Build filter
     filter_query = {}
     if animal_id:
         # Verify the animal belongs to the current user
-        try:
-            animal = await animals_collection.find_one({"_id": ObjectId(animal_id)})
-            if not animal:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Animal not found"
-                )
-            
-            if animal["owner_id"] != current_user.id:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Not authorized to access metrics for this animal"
-                )
-                
-            filter_query["animal_id"] = animal_id
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid animal ID"
-            )
+        await require_animal_owner(animal_id, current_user, "Not authorized to access metrics for this animal")
+        filter_query["animal_id"] = animal_id
     else:
-        # If no animal_id specified, get all animals owned by current user
-        user_animals = await animals_collection.find({"owner_id": current_user.id}).to_list(length=None)
-        animal_ids = [str(animal["_id"]) for animal in user_animals]
-        if animal_ids:
-            filter_query["animal_id"] = {"$in": animal_ids}
-        else:
-            # No animals found, return empty response
-            return IoTMetricsListResponse(
-                metrics=[],
-                total=0,
-                animal_id=animal_id or "all",
-                last_updated=datetime.utcnow()
-            )
+        # If no animal_id specified, get all animals owned by current user;
+        # with none, the empty $in matches nothing and the empty page is
+        # still returned in the requested format
+        animal_ids = sorted(await ownership.animal_ids_of(current_user.id))
+        filter_query["animal_id"] = {"$in": animal_ids}
+    
+    page_query = dict(filter_query)
+    if after:
+        page_query.update(keyset_filter("timestamp", *decode_cursor(after)))
+    
+    # Get latest metrics, one extra to detect the next page
+    cursor = iot_collection.find(page_query).sort(METRICS_SORT).limit(limit + 1)
+    
+    if format == MetricsFormat.NDJSON:
+        return StreamingResponse(_stream_metrics(cursor, limit), media_type="application/x-ndjson")
     
     # Count total documents
     total = await iot_collection.count_documents(filter_query)
     
-    # Get latest metrics
-    cursor = iot_collection.find(filter_query).sort("timestamp", -1).limit(limit)
+    if format == MetricsFormat.COLUMNAR:
+        return await _columnar_response(cursor, limit, total, animal_id or "all", datetime.utcnow())
     
-    metrics = []
-    async for metric in cursor:
-        metric["_id"] = str(metric["_id"])
-        metrics.append(IoTMetricsResponse(**metric))
+    metrics, next_cursor = await _collect_metrics(cursor, limit)
     
     return IoTMetricsListResponse(
         metrics=metrics,
         total=total,
         animal_id=animal_id or "all",
-        last_updated=datetime.utcnow()
+        last_updated=datetime.utcnow(),
+        next_cursor=next_cursor
     )
 
 @router.get("/metrics/{animal_id}/latest", response_model=IoTMetricsResponse)
 async def get_latest_iot_metrics(
-    animal_id: str,
-    current_user: UserInDB = Depends(get_current_active_user)
+    animal_id: str = Depends(owned_metrics_animal)
 ):
     """Get the latest IoT metrics for a specific animal."""
     iot_collection = get_collection("iot_metrics")
-    animals_collection = get_collection("animals")
-    
-    # Verify the animal belongs to the current user
-    try:
-        animal = await animals_collection.find_one({"_id": ObjectId(animal_id)})
-        if not animal:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Animal not found"
-            )
-        
-        if animal["owner_id"] != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to access metrics for this animal"
-            )
-            
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid animal ID"
-        )
     
     # Get latest metrics
-    latest_metric = await iot_collection.find_one(
-        {"animal_id": animal_id},
-        sort=[("timestamp", -1)]
-    )
+    if settings.iot_latest_cache_enabled:
+        latest_metric = await latest_readings.latest(animal_id)
+    else:
+        latest_metric = await iot_collection.find_one(
+            {"animal_id": animal_id},
+            sort=[("timestamp", -1)]
+        )
     
     if not latest_metric:
         raise HTTPException(
@@ -164,36 +328,205 @@ async def get_latest_iot_metrics(
     latest_metric["_id"] = str(latest_metric["_id"])
     return IoTMetricsResponse(**latest_metric)
 
-@router.put("/metrics/{animal_id}/simulate", response_model=IoTMetricsResponse)
-async def simulate_iot_metrics(
-    animal_id: str,
-    current_user: UserInDB = Depends(get_current_farmer)
+@router.get("/metrics/{animal_id}/recent", response_model=IoTMetricsListResponse)
+async def get_recent_iot_metrics(
+    animal_id: str = Depends(owned_metrics_animal),
+    limit: int = Query(10, ge=1, le=settings.iot_latest_cache_size, description="Number of readings to return")
 ):
-    """Simulate new IoT metrics for an animal (for demo purposes)."""
+    """Get the last few IoT readings for a specific animal from the in-memory cache."""
     iot_collection = get_collection("iot_metrics")
-    animals_collection = get_collection("animals")
     
-    # Verify the animal belongs to the current user
-    try:
-        animal = await animals_collection.find_one({"_id": ObjectId(animal_id)})
-        if not animal:
+    if settings.iot_latest_cache_enabled:
+        recent_metrics = await latest_readings.recent(animal_id, limit)
+    else:
+        cursor = iot_collection.find({"animal_id": animal_id}).sort(METRICS_SORT).limit(limit)
+        recent_metrics = await cursor.to_list(length=limit)
+    
+    metrics = []
+    for metric in recent_metrics:
+        metric["_id"] = str(metric["_id"])
+        metrics.append(IoTMetricsResponse(**metric))
+    
+    return IoTMetricsListResponse(
+        metrics=metrics,
+        total=len(metrics),
+        animal_id=animal_id,
+        last_updated=datetime.utcnow()
+    )
+
+@router.get("/stream")
+async def stream_iot_metrics(
+    request: Request,
+    animal_ids: Optional[str] = Query(None, description="Comma-separated animal IDs (default all owned animals)"),
+    current_user: TokenUser = Depends(get_current_active_user)
+):
+    """Push new IoT readings as Server-Sent Events.
+    
+    Each event carries one reading. A slow client receives only the newest
+    pending reading per animal instead of an unbounded backlog.
+    """
+    owned_ids = await ownership.animal_ids_of(current_user.id)
+    
+    if animal_ids:
+        requested_ids = {animal_id.strip() for animal_id in animal_ids.split(",") if animal_id.strip()}
+        if not requested_ids <= owned_ids:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to access metrics for these animals"
+            )
+    else:
+        requested_ids = owned_ids
+    
+    if metrics_broadcaster.is_full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many live metrics subscribers, retry later"
+        )
+    
+    return StreamingResponse(
+        _live_metrics_events(request, requested_ids),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/fleet/latest", response_model=FleetLatestResponse)
+async def get_fleet_latest_metrics(
+    fields: Optional[str] = Query(None, description="Comma-separated reading fields to include (default all)"),
+    stale_minutes: Optional[int] = Query(
+        None, ge=1, description="Only return animals with no reading in this many minutes"
+    ),
+    current_user: TokenUser = Depends(get_current_active_user)
+):
+    """Get the latest IoT reading of every animal owned by the current user.
+    
+    One $sort/$group aggregation walks the (animal_id, timestamp) index and
+    takes the first reading per animal, so the cost does not grow with the
+    number of HTTP round trips the farm overview used to make.
+    """
+    iot_collection = get_collection("iot_metrics")
+    
+    selected_fields = FLEET_FIELDS
+    if fields:
+        selected_fields = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in selected_fields if field not in FLEET_FIELDS]
+        if unknown:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Animal not found"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}"
             )
+    
+    generated_at = datetime.utcnow()
+    
+    animal_ids = sorted(await ownership.animal_ids_of(current_user.id))
+    
+    latest = {}
+    if animal_ids:
+        group = {
+            "_id": "$animal_id",
+            "id": {"$first": "$_id"},
+            "timestamp": {"$first": "$timestamp"}
+        }
+        for field in selected_fields:
+            group[field] = {"$first": f"${field}"}
         
-        if animal["owner_id"] != current_user.id:
+        pipeline = [
+            {"$match": {"animal_id": {"$in": animal_ids}}},
+            {"$sort": {"animal_id": 1, "timestamp": -1}},
+            {"$group": group}
+        ]
+        async for reading in iot_collection.aggregate(pipeline):
+            latest[reading.pop("_id")] = reading
+    
+    cutoff = generated_at - timedelta(minutes=stale_minutes) if stale_minutes else None
+    
+    entries = []
+    stale = 0
+    for animal_id in animal_ids:
+        reading = latest.get(animal_id)
+        last_seen = reading["timestamp"] if reading else None
+        is_stale = last_seen is None or (cutoff is not None and last_seen < cutoff)
+        if is_stale:
+            stale += 1
+        elif cutoff is not None:
+            continue
+        
+        metrics = None
+        if reading:
+            metrics = {"id": str(reading["id"])}
+            metrics.update({field: reading.get(field) for field in selected_fields})
+        
+        entries.append(FleetLatestEntry(
+            animal_id=animal_id,
+            last_seen=last_seen,
+            is_stale=is_stale,
+            metrics=metrics
+        ))
+    
+    return FleetLatestResponse(
+        animals=entries,
+        total=len(entries),
+        stale=stale,
+        generated_at=generated_at
+    )
+
+@router.get("/fleet/stats", response_model=FleetStatsResponse)
+async def get_fleet_stats(
+    hours: int = Query(24, ge=1, le=8760, description="Number of hours to look back"),
+    animal_ids: Optional[str] = Query(None, description="Comma-separated animal IDs (default all owned animals)"),
+    current_user: TokenUser = Depends(get_current_active_user)
+):
+    """Get reading statistics for a whole herd from one query.
+    
+    Every animal's statistics and the pooled herd statistics come out of a
+    single vectorized pass over the window.
+    """
+    owned_ids = sorted(await ownership.animal_ids_of(current_user.id))
+    
+    selected_ids = owned_ids
+    if animal_ids:
+        selected_ids = list(dict.fromkeys(
+            animal_id.strip() for animal_id in animal_ids.split(",") if animal_id.strip()
+        ))
+        if not set(selected_ids) <= set(owned_ids):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to simulate metrics for this animal"
+                detail="Not authorized to access metrics for these animals"
             )
-            
-    except Exception as e:
+    
+    end_time = datetime.utcnow()
+    start_time = end_time - timedelta(hours=hours)
+    
+    try:
+        per_animal, pooled = await window_stats(selected_ids, start_time, end_time) if selected_ids else ([], None)
+    except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid animal ID"
+            detail=str(e)
         )
     
+    stats_by_animal = {stats["animal_id"]: stats for stats in per_animal}
+    animals = [
+        IoTAnimalStats(**stats_by_animal.get(animal_id, {"animal_id": animal_id, "count": 0, "fields": {}}))
+        for animal_id in selected_ids
+    ]
+    
+    return FleetStatsResponse(
+        animals=animals,
+        herd=pooled["fields"] if pooled else {},
+        total_readings=pooled["count"] if pooled else 0,
+        start=start_time,
+        end=end_time
+    )
+
+@router.put("/metrics/{animal_id}/simulate", response_model=IoTMetricsResponse)
+async def simulate_iot_metrics(
+    animal_id: str,
+    current_user: TokenUser = Depends(get_current_farmer)
+):
+    """Simulate new IoT metrics for an animal (for demo purposes)."""
+    # Verify the animal belongs to the current user
+    await require_animal_owner(animal_id, current_user, "Not authorized to simulate metrics for this animal")
+    
     # Generate simulated metrics
     simulated_metrics = {
         "animal_id": animal_id,
@@ -210,66 +543,305 @@ async def simulate_iot_metrics(
     }
     
     # Insert new metrics
-    result = await iot_collection.insert_one(simulated_metrics)
-    simulated_metrics["_id"] = str(result.inserted_id)
+    write_errors = await insert_metrics([simulated_metrics])
+    if write_errors:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to store metrics"
+        )
+    simulated_metrics["_id"] = str(simulated_metrics["_id"])
     
     return IoTMetricsResponse(**simulated_metrics)
 
-@router.get("/metrics/{animal_id}/history", response_model=IoTMetricsListResponse)
+@router.get(
+    "/metrics/{animal_id}/history",
+    response_model=Union[IoTMetricsListResponse, IoTMetricsRollupListResponse, IoTMetricsColumnarResponse]
+)
 async def get_iot_metrics_history(
-    animal_id: str,
-    hours: int = Query(24, ge=1, le=168, description="Number of hours to look back"),
-    current_user: UserInDB = Depends(get_current_active_user)
+    animal_id: str = Depends(owned_metrics_animal),
+    hours: int = Query(24, ge=1, le=8760, description="Number of hours to look back"),
+    resolution: MetricsResolution = Query(
+        MetricsResolution.RAW,
+        description="raw readings, a rollup tier (minute, hour, day) or auto"
+    ),
+    limit: Optional[int] = Query(None, ge=1, le=10000, description="Page size for raw readings"),
+    after: Optional[str] = Query(None, description="Continuation token from next_cursor"),
+    format: MetricsFormat = Query(
+        MetricsFormat.JSON, description="json, ndjson or columnar (raw readings only)"
+    )
 ):
-    """Get IoT metrics history for a specific animal."""
-    iot_collection = get_collection("iot_metrics")
-    animals_collection = get_collection("animals")
+    """Get IoT metrics history for a specific animal.
     
-    # Verify the animal belongs to the current user
-    try:
-        animal = await animals_collection.find_one({"_id": ObjectId(animal_id)})
-        if not animal:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Animal not found"
-            )
-        
-        if animal["owner_id"] != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to access metrics for this animal"
-            )
-            
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid animal ID"
-        )
+    Raw history returned in one response covers up to a week; streamed
+    (ndjson) or paginated (limit/after) raw history covers the full window.
+    Rollup resolutions return min/max/avg per bucket for any window; auto
+    picks the tier from the window length. Raw readings can also be returned
+    column-wise. Readings past the retention window are merged in from the
+    archive.
+    """
+    iot_collection = get_collection("iot_metrics")
     
     # Calculate time range
     end_time = datetime.utcnow()
     start_time = end_time - timedelta(hours=hours)
     
+    if resolution == MetricsResolution.AUTO:
+        resolution = choose_resolution(end_time - start_time)
+    
+    if resolution != MetricsResolution.RAW:
+        rollups = await get_rollups(animal_id, resolution, start_time, end_time)
+        return IoTMetricsRollupListResponse(
+            rollups=rollups,
+            resolution=resolution,
+            total=len(rollups),
+            animal_id=animal_id,
+            last_updated=end_time
+        )
+    
+    # Streamed and paginated exports hold one page at a time, so only a
+    # single unpaginated response is capped
+    if hours > RAW_HISTORY_MAX_HOURS and format != MetricsFormat.NDJSON and limit is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Raw history is limited to {RAW_HISTORY_MAX_HOURS} hours per response; "
+                "use a rollup resolution, format=ndjson or limit/after"
+            )
+        )
+    
     # Get metrics within time range
     filter_query = {
         "animal_id": animal_id,
         "timestamp": {"$gte": start_time, "$lte": end_time}
     }
     
-    # Count total documents
-    total = await iot_collection.count_documents(filter_query)
+    page_query = dict(filter_query)
+    position = decode_cursor(after) if after else None
+    if position:
+        page_query.update(keyset_filter("timestamp", *position))
     
-    # Get metrics
-    cursor = iot_collection.find(filter_query).sort("timestamp", -1)
+    # Get metrics, one extra when paginating to detect the next page
+    cursor = iot_collection.find(page_query).sort(METRICS_SORT).batch_size(settings.iot_stream_batch_size)
+    if limit is not None:
+        cursor = cursor.limit(limit + 1)
     
-    metrics = []
-    async for metric in cursor:
-        metric["_id"] = str(metric["_id"])
-        metrics.append(IoTMetricsResponse(**metric))
+    # Readings past the retention window are streamed back from the archive
+    cutoff = retention_cutoff(end_time)
+    reads_archive = cutoff is not None and start_time < cutoff
+    if reads_archive:
+        archived = read_archived(animal_id, start_time, min(end_time, cutoff), before=position)
+        cursor = merge_readings(cursor, archived, limit)
+    
+    if format == MetricsFormat.NDJSON:
+        return StreamingResponse(_stream_metrics(cursor, limit), media_type="application/x-ndjson")
+    
+    # Count total documents over the whole window, not just this page
+    if reads_archive:
+        total = await count_merged(animal_id, start_time, end_time, cutoff)
+    else:
+        total = await iot_collection.count_documents(filter_query)
+    
+    if format == MetricsFormat.COLUMNAR:
+        return await _columnar_response(cursor, limit, total, animal_id, end_time)
+    
+    metrics, next_cursor = await _collect_metrics(cursor, limit)
     
     return IoTMetricsListResponse(
         metrics=metrics,
         total=total,
         animal_id=animal_id,
-        last_updated=end_time
+        last_updated=end_time,
+        next_cursor=next_cursor
     )
+
+@router.get("/metrics/{animal_id}/stats", response_model=IoTMetricsStatsResponse)
+async def get_iot_metrics_stats(
+    animal_id: str = Depends(owned_metrics_animal),
+    hours: int = Query(24, ge=1, le=8760, description="Number of hours to look back")
+):
+    """Get mean, spread, percentiles, trend and time-in-range of each reading field."""
+    end_time = datetime.utcnow()
+    start_time = end_time - timedelta(hours=hours)
+    
+    try:
+        window = await load_window([animal_id], start_time, end_time)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    groups = summarize(window)
+    stats = groups[0] if groups else {"animal_id": animal_id, "count": 0, "fields": {}}
+    
+    return IoTMetricsStatsResponse(**stats, start=start_time, end=end_time)
+
+@router.get("/alerts", response_model=IoTAlertListResponse)
+async def get_iot_alerts(
+    animal_id: Optional[str] = Query(None, description="Filter by animal ID"),
+    is_resolved: Optional[bool] = Query(None, description="Filter by resolution state"),
+    alert_type: Optional[str] = Query(None, description="Filter by alert type"),
+    limit: int = Query(50, ge=1, le=500, description="Number of alerts to return"),
+    after: Optional[str] = Query(None, description="Continuation token from a previous page"),
+    current_user: TokenUser = Depends(get_current_active_user)
+):
+    """Get alerts raised for the current user's animals, newest first."""
+    alerts_collection = get_collection("alerts")
+    
+    owned_ids = sorted(await ownership.animal_ids_of(current_user.id))
+    
+    if animal_id:
+        if animal_id not in owned_ids:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to access alerts for this animal"
+            )
+        filter_query = {"animal_id": animal_id}
+    else:
+        filter_query = {"animal_id": {"$in": owned_ids}}
+    
+    if is_resolved is not None:
+        filter_query["is_resolved"] = is_resolved
+    if alert_type:
+        filter_query["alert_type"] = alert_type
+    
+    page_query = dict(filter_query)
+    if after:
+        page_query.update(keyset_filter("timestamp", *decode_cursor(after)))
+    
+    cursor = alerts_collection.find(page_query).sort(METRICS_SORT).limit(limit + 1)
+    alerts = []
+    next_cursor = None
+    async for alert in cursor:
+        if len(alerts) == limit:
+            next_cursor = encode_cursor(alerts[-1].timestamp, alerts[-1].id)
+            break
+        
+        alert["_id"] = str(alert["_id"])
+        alerts.append(IoTAlertResponse(**alert))
+    
+    total = await alerts_collection.count_documents(filter_query)
+    
+    return IoTAlertListResponse(alerts=alerts, total=total, next_cursor=next_cursor)
+
+@router.post("/alerts/{alert_id}/resolve", response_model=IoTAlertResponse)
+async def resolve_iot_alert(
+    alert_id: str,
+    current_user: TokenUser = Depends(get_current_active_user)
+):
+    """Resolve an open alert by hand.
+    
+    The alert opens again if its condition still holds for the debounce
+    window after this.
+    """
+    alerts_collection = get_collection("alerts")
+    
+    if not ObjectId.is_valid(alert_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid alert ID"
+        )
+    
+    alert = await alerts_collection.find_one({"_id": ObjectId(alert_id)})
+    if not alert:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Alert not found"
+        )
+    
+    if await ownership.owner_of(alert["animal_id"]) != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to resolve this alert"
+        )
+    
+    if not alert["is_resolved"]:
+        update = {"is_resolved": True, "resolved_at": datetime.utcnow(), "resolved_by": current_user.id}
+        await alerts_collection.update_one({"_id": alert["_id"]}, {"$set": update})
+        alert.update(update)
+        alert_engine.forget(alert["animal_id"], alert["alert_type"])
+    
+    alert["_id"] = str(alert["_id"])
+    return IoTAlertResponse(**alert)
+
+@router.post("/devices", response_model=IoTDeviceCreatedResponse, status_code=status.HTTP_201_CREATED)
+async def create_iot_device(
+    device_data: IoTDeviceCreate,
+    current_user: TokenUser = Depends(get_current_farmer)
+):
+    """Register a collar for the line-protocol gateway.
+    
+    The device key is only returned in this response.
+    """
+    devices_collection = get_collection("devices")
+    
+    await require_animal_owner(device_data.animal_id, current_user, "Not authorized to register devices for this animal")
+    
+    key = new_device_key()
+    device_dict = {
+        "animal_id": device_data.animal_id,
+        "name": device_data.name,
+        "key_hash": hash_device_key(key),
+        "created_at": datetime.utcnow(),
+        "last_seen": None
+    }
+    result = await devices_collection.insert_one(device_dict)
+    device_dict["_id"] = str(result.inserted_id)
+    
+    return IoTDeviceCreatedResponse(**device_dict, key=key)
+
+@router.get("/devices", response_model=IoTDeviceListResponse)
+async def get_iot_devices(
+    animal_id: Optional[str] = Query(None, description="Filter by animal ID"),
+    current_user: TokenUser = Depends(get_current_active_user)
+):
+    """Get the gateway devices registered for the current user's animals."""
+    devices_collection = get_collection("devices")
+    
+    owned_ids = sorted(await ownership.animal_ids_of(current_user.id))
+    
+    if animal_id:
+        if animal_id not in owned_ids:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to access devices for this animal"
+            )
+        filter_query = {"animal_id": animal_id}
+    else:
+        filter_query = {"animal_id": {"$in": owned_ids}}
+    
+    devices = []
+    async for device in devices_collection.find(filter_query, {"key_hash": 0}).sort("created_at", -1):
+        device["_id"] = str(device["_id"])
+        devices.append(IoTDeviceResponse(**device))
+    
+    return IoTDeviceListResponse(devices=devices, total=len(devices))
+
+@router.delete("/devices/{device_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_iot_device(
+    device_id: str,
+    current_user: TokenUser = Depends(get_current_farmer)
+):
+    """Revoke a gateway device; the gateway drops it at its next device refresh."""
+    devices_collection = get_collection("devices")
+    
+    if not ObjectId.is_valid(device_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid device ID"
+        )
+    
+    device = await devices_collection.find_one({"_id": ObjectId(device_id)}, {"animal_id": 1})
+    if not device:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Device not found"
+        )
+    
+    if await ownership.owner_of(device["animal_id"]) != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to delete this device"
+        )
+    
+    await devices_collection.delete_one({"_id": device["_id"]})
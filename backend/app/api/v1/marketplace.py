@@ -3,48 +3,262 @@ from typing import List, Optional
 from app.database import get_collection
 from app.models.listing import (
     ListingCreate, ListingUpdate, ListingResponse, ListingListResponse,
-    ListingInDB, ListingStatus, ListingFilter
+    ListingInDB, ListingStatus, ListingSort, ListingFilter
 )
-from app.auth.dependencies import get_current_active_user, get_current_farmer, get_current_buyer
-from app.models.user import UserInDB
+from app.auth.dependencies import get_current_active_user, get_current_farmer, get_current_buyer, require_animal_owner
+from app.models.user import TokenUser
+from app.services.listing_read_model import listing_details, normalize_species
+from app.services.listing_views import listing_views
+from app.pagination import decode_cursor, keyset_filter, split_page
+from app.geocoding import EARTH_RADIUS_KM, bbox_polygon, geocode, point
+from app.search import prefilter_trigrams, text_trigrams
+from app.config import settings
 from bson import ObjectId
 from datetime import datetime
+import asyncio
 
 router = APIRouter(prefix="/marketplace", tags=["marketplace"])
 
+# Newest first; _id breaks ties so keyset pages never skip or repeat listings
+LISTINGS_SORT = [("created_at", -1), ("_id", -1)]
+
+def _listing_responses(listings: List[dict]) -> List[ListingResponse]:
+    """Listing documents as responses; seller and animal details are stored on each listing."""
+    responses = []
+    for listing in listings:
+        listing["_id"] = str(listing["_id"])
+        try:
+            responses.append(ListingResponse(**listing))
+        except Exception:
+            # Skip listings with invalid data
+            continue
+    return responses
+
+def _listing_point(location: str, latitude: Optional[float], longitude: Optional[float]) -> Optional[dict]:
+    """GeoJSON point for a listing: explicit coordinates, else the geocoded location text."""
+    if (latitude is None) != (longitude is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="latitude and longitude must be given together"
+        )
+    if latitude is not None:
+        return point(longitude, latitude)
+    return geocode(location)
+
+async def _animal_point(animal_id: str) -> Optional[dict]:
+    """GeoJSON point of a listing's animal, used when the listing's location is not recognised."""
+    if not ObjectId.is_valid(animal_id):
+        return None
+    animal = await get_collection("animals").find_one({"_id": ObjectId(animal_id)}, {"location_geo": 1})
+    return animal.get("location_geo") if animal else None
+
+def _parse_bbox(bbox: str) -> List[float]:
+    """min_lng,min_lat,max_lng,max_lat as four floats."""
+    try:
+        min_lng, min_lat, max_lng, max_lat = [float(value) for value in bbox.split(",")]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox must be min_lng,min_lat,max_lng,max_lat"
+        )
+    if not (-180 <= min_lng < max_lng <= 180 and -90 <= min_lat < max_lat <= 90):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox is out of range or empty"
+        )
+    return [min_lng, min_lat, max_lng, max_lat]
+
+async def _search_nearby(
+    filter_query: dict,
+    center: dict,
+    area: Optional[dict],
+    radius_km: Optional[float],
+    page: int,
+    size: int,
+    after: Optional[str] = None,
+    q: Optional[str] = None
+) -> ListingListResponse:
+    """Listings around center, nearest first, within radius_km and/or inside area.
+    
+    Served by the location_geo 2dsphere index through $geoNear, which
+    returns documents in distance order and sets distance_km on each.
+    Distance order has no keyset, so these results page with page only.
+    """
+    if after:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="after cannot be combined with a location search; use page"
+        )
+    if q:
+        # $geoNear and $text must each be the first stage of a pipeline
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="q cannot be combined with a location search"
+        )
+    listings_collection = get_collection("listings")
+    
+    geo_query = dict(filter_query)
+    near = {
+        "near": center,
+        "key": "location_geo",
+        "distanceField": "distance_km",
+        "distanceMultiplier": 0.001,
+        "spherical": True,
+        "query": geo_query
+    }
+    count_areas = []
+    if area is not None:
+        geo_query["location_geo"] = {"$geoWithin": {"$geometry": area}}
+        count_areas.append({"location_geo": geo_query["location_geo"]})
+    if area is None or radius_km is not None:
+        radius_km = radius_km or settings.listing_search_radius_km
+        near["maxDistance"] = radius_km * 1000
+        count_areas.append({
+            "location_geo": {"$geoWithin": {"$centerSphere": [center["coordinates"], radius_km / EARTH_RADIUS_KM]}}
+        })
+    
+    # Count total documents ($geoNear itself cannot count; a radius inside a box must match both)
+    count_query = dict(filter_query)
+    if len(count_areas) == 1:
+        count_query.update(count_areas[0])
+    else:
+        count_query["$and"] = count_areas
+    total = await listings_collection.count_documents(count_query)
+    
+    pipeline = [{"$geoNear": near}, {"$skip": (page - 1) * size}, {"$limit": size}]
+    documents = await listings_collection.aggregate(pipeline).to_list(length=size)
+    for document in documents:
+        document["distance_km"] = round(document["distance_km"], 3)
+    
+    return ListingListResponse(
+        listings=_listing_responses(documents),
+        total=total,
+        page=page,
+        size=size
+    )
+
+async def _search_text(
+    filter_query: dict,
+    q: str,
+    sort: ListingSort,
+    page: int,
+    size: int,
+    after: Optional[str] = None
+) -> ListingListResponse:
+    """Listings whose title or description match q, via the weighted text index.
+    
+    Ordered by relevance then newest, or newest only; only the latter can
+    page with after. When no listing matches the words of q, falls back to
+    _search_similar so misspelt titles are still found.
+    """
+    listings_collection = get_collection("listings")
+    text_query = {**filter_query, "$text": {"$search": q}}
+    
+    # Count total documents
+    total = await listings_collection.count_documents(text_query)
+    if total == 0 and not after:
+        return await _search_similar(filter_query, q, page, size)
+    
+    if sort == ListingSort.RELEVANCE:
+        if after:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="after pages newest-first results; use page with sort=relevance"
+            )
+        relevance = {"$meta": "textScore"}
+        cursor = listings_collection.find(text_query, {"relevance": relevance})
+        cursor = cursor.sort([("relevance", relevance), *LISTINGS_SORT]).skip((page - 1) * size).limit(size)
+        documents, next_cursor = await cursor.to_list(length=size), None
+    else:
+        if after:
+            text_query.update(keyset_filter("created_at", *decode_cursor(after)))
+        cursor = listings_collection.find(text_query).sort(LISTINGS_SORT).limit(size + 1)
+        if not after:
+            cursor = cursor.skip((page - 1) * size)
+        documents, next_cursor = split_page(await cursor.to_list(length=size + 1), size)
+    
+    return ListingListResponse(
+        listings=_listing_responses(documents),
+        total=total,
+        page=page,
+        size=size,
+        next_cursor=next_cursor
+    )
+
+async def _trigram_prefilter(trigrams: List[str]) -> dict:
+    """search_trigrams condition for similar titles, from index counts capped at the candidate limit."""
+    listings_collection = get_collection("listings")
+    cap = settings.listing_search_max_candidates
+    frequencies = await asyncio.gather(*(
+        listings_collection.count_documents({"search_trigrams": trigram}, limit=cap) for trigram in trigrams
+    ))
+    return {"$in": prefilter_trigrams(trigrams, frequencies, settings.listing_search_min_similarity)}
+
+async def _search_similar(filter_query: dict, q: str, page: int, size: int) -> ListingListResponse:
+    """Listings whose titles share enough trigrams with q, most similar first.
+    
+    Candidates come from the multikey index on search_trigrams, matching
+    only the rarest trigrams any similar title must contain, and at most
+    LISTING_SEARCH_MAX_CANDIDATES of them are scored. Relevance is the
+    fraction of q's trigrams found in the title.
+    """
+    trigrams = text_trigrams(q)
+    if not trigrams:
+        return ListingListResponse(listings=[], total=0, page=page, size=size)
+    
+    pipeline = [
+        {"$match": {**filter_query, "search_trigrams": await _trigram_prefilter(trigrams)}},
+        {"$limit": settings.listing_search_max_candidates},
+        {"$addFields": {"relevance": {
+            "$divide": [{"$size": {"$setIntersection": ["$search_trigrams", trigrams]}}, len(trigrams)]
+        }}},
+        {"$match": {"relevance": {"$gte": settings.listing_search_min_similarity}}},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "listings": [
+                {"$sort": {"relevance": -1, "created_at": -1, "_id": -1}},
+                {"$skip": (page - 1) * size},
+                {"$limit": size},
+                {"$project": {"search_trigrams": 0}}
+            ]
+        }}
+    ]
+    result = (await get_collection("listings").aggregate(pipeline).to_list(length=1))[0]
+    
+    return ListingListResponse(
+        listings=_listing_responses(result["listings"]),
+        total=result["total"][0]["count"] if result["total"] else 0,
+        page=page,
+        size=size
+    )
+
 @router.post("/listings", response_model=ListingResponse, status_code=status.HTTP_201_CREATED)
 async def create_listing(
     listing_data: ListingCreate,
-    current_user: UserInDB = Depends(get_current_farmer)
+    current_user: TokenUser = Depends(get_current_farmer)
 ):
     """Create a new marketplace listing."""
     listings_collection = get_collection("listings")
-    animals_collection = get_collection("animals")
     
     # Verify the animal belongs to the current user
-    try:
-        animal = await animals_collection.find_one({"_id": ObjectId(listing_data.animal_id)})
-        if not animal:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Animal not found"
-            )
-        
-        if animal["owner_id"] != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to create listing for this animal"
-            )
-            
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid animal ID"
-        )
+    await require_animal_owner(listing_data.animal_id, current_user, "Not authorized to create listing for this animal")
     
     # Create listing
-    listing_dict = listing_data.dict()
+    listing_dict = listing_data.dict(exclude={"latitude", "longitude"})
     listing_dict["seller_id"] = current_user.id
+    animal = await get_collection("animals").find_one(
+        {"_id": ObjectId(listing_data.animal_id)},
+        {"name": 1, "health_score": 1, "species": 1, "location_geo": 1}
+    )
+    listing_dict.update(listing_details(animal, current_user.name))
+    listing_dict["search_trigrams"] = text_trigrams(listing_data.title)
+    listing_dict["location_geo"] = (
+        _listing_point(listing_data.location, listing_data.latitude, listing_data.longitude)
+        or (animal or {}).get("location_geo")
+    )
+    listing_dict["status"] = ListingStatus.ACTIVE
+    listing_dict["views"] = 0
+    listing_dict["offers"] = 0
     listing_dict["created_at"] = datetime.utcnow()
     listing_dict["updated_at"] = datetime.utcnow()
     
@@ -60,15 +274,30 @@ async def get_listings(
     min_price: Optional[float] = Query(None, ge=0, description="Minimum price"),
     max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
     species: Optional[str] = Query(None, description="Filter by animal species"),
-    location: Optional[str] = Query(None, description="Filter by location"),
+    location: Optional[str] = Query(None, description="Search near a place name, or match the location text if unknown"),
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Search near this latitude"),
+    lng: Optional[float] = Query(None, ge=-180, le=180, description="Search near this longitude"),
+    radius_km: Optional[float] = Query(None, gt=0, le=settings.listing_search_max_radius_km, description="Search radius in kilometres"),
+    bbox: Optional[str] = Query(None, description="Search inside min_lng,min_lat,max_lng,max_lat"),
+    q: Optional[str] = Query(None, min_length=1, max_length=200, description="Search title and description"),
+    sort: ListingSort = Query(ListingSort.RELEVANCE, description="Order of q results"),
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Page size"),
-    current_user: UserInDB = Depends(get_current_active_user)
+    after: Optional[str] = Query(None, description="Continuation token from next_cursor; replaces page"),
+    current_user: TokenUser = Depends(get_current_active_user)
 ):
-    """Get marketplace listings with optional filtering."""
+    """Get marketplace listings with optional filtering.
+    
+    Pass the returned next_cursor as after to fetch the following page; it
+    stays fast at any depth, unlike page, which skips documents.
+    
+    With lat and lng, a known place name in location, or bbox, results are
+    ordered nearest first, carry distance_km and page with page only.
+    
+    With q, results match title (weighted above description) and carry
+    relevance; misspelt words fall back to title similarity.
+    """
     listings_collection = get_collection("listings")
-    animals_collection = get_collection("animals")
-    users_collection = get_collection("users")
     
     # Build filter
     filter_query = {}
@@ -83,50 +312,58 @@ async def get_listings(
             filter_query["price"]["$lte"] = max_price
         else:
             filter_query["price"] = {"$lte": max_price}
+    if species:
+        filter_query["species"] = normalize_species(species)
+    
+    # Resolve a search center; unknown place names fall back to the location text
+    center = None
+    area = None
+    if lat is not None or lng is not None:
+        center = _listing_point(location, lat, lng)
+    elif location:
+        center = geocode(location)
+        if center is None:
+            filter_query["location"] = location
+    if bbox:
+        min_lng, min_lat, max_lng, max_lat = _parse_bbox(bbox)
+        area = bbox_polygon(min_lng, min_lat, max_lng, max_lat)
+        if center is None:
+            center = point((min_lng + max_lng) / 2, (min_lat + max_lat) / 2)
+    
+    if center is not None:
+        return await _search_nearby(filter_query, center, area, radius_km, page, size, after, q)
+    if q:
+        return await _search_text(filter_query, q, sort, page, size, after)
     
     # Count total documents
     total = await listings_collection.count_documents(filter_query)
     
-    # Get paginated results
-    skip = (page - 1) * size
-    cursor = listings_collection.find(filter_query).skip(skip).limit(size).sort("created_at", -1)
+    # Get paginated results, one extra to detect the next page
+    page_query = dict(filter_query)
+    if after:
+        page_query.update(keyset_filter("created_at", *decode_cursor(after)))
+    cursor = listings_collection.find(page_query).sort(LISTINGS_SORT).limit(size + 1)
+    if not after:
+        cursor = cursor.skip((page - 1) * size)
+    documents, next_cursor = split_page(await cursor.to_list(length=size + 1), size)
     
-    listings = []
-    async for listing in cursor:
-        listing["_id"] = str(listing["_id"])
-        
-        # Get additional details
-        try:
-            animal = await animals_collection.find_one({"_id": ObjectId(listing["animal_id"])})
-            seller = await users_collection.find_one({"_id": ObjectId(listing["seller_id"])})
-            
-            listing_response = ListingResponse(
-                **listing,
-                seller_name=seller["name"] if seller else None,
-                animal_name=animal["name"] if animal else None,
-                animal_health_score=animal["health_score"] if animal else None
-            )
-            listings.append(listing_response)
-        except Exception as e:
-            # Skip listings with invalid references
-            continue
+    listings = _listing_responses(documents)
     
     return ListingListResponse(
         listings=listings,
         total=total,
         page=page,
-        size=size
+        size=size,
+        next_cursor=next_cursor
     )
 
 @router.get("/listings/{listing_id}", response_model=ListingResponse)
 async def get_listing(
     listing_id: str,
-    current_user: UserInDB = Depends(get_current_active_user)
+    current_user: TokenUser = Depends(get_current_active_user)
 ):
     """Get a specific marketplace listing."""
     listings_collection = get_collection("listings")
-    animals_collection = get_collection("animals")
-    users_collection = get_collection("users")
     
     try:
         listing = await listings_collection.find_one({"_id": ObjectId(listing_id)})
@@ -138,22 +375,11 @@ async def get_listing(
         
         listing["_id"] = str(listing["_id"])
         
-        # Get additional details
-        animal = await animals_collection.find_one({"_id": ObjectId(listing["animal_id"])})
-        seller = await users_collection.find_one({"_id": ObjectId(listing["seller_id"])})
+        # Count the view; it is written in bulk by the view flusher
+        listing_views.record(listing["_id"], current_user.id)
+        listing["views"] = listing.get("views", 0) + listing_views.pending(listing["_id"])
         
-        # Increment view count
-        await listings_collection.update_one(
-            {"_id": ObjectId(listing_id)},
-            {"$inc": {"views": 1}}
-        )
-        
-        return ListingResponse(
-            **listing,
-            seller_name=seller["name"] if seller else None,
-            animal_name=animal["name"] if animal else None,
-            animal_health_score=animal["health_score"] if animal else None
-        )
+        return ListingResponse(**listing)
         
     except Exception as e:
         raise HTTPException(
@@ -165,11 +391,20 @@ async def get_listing(
 async def update_listing(
     listing_id: str,
     listing_update: ListingUpdate,
-    current_user: UserInDB = Depends(get_current_farmer)
+    current_user: TokenUser = Depends(get_current_farmer)
 ):
     """Update a marketplace listing."""
     listings_collection = get_collection("listings")
     
+    update_data = listing_update.dict(exclude_unset=True)
+    latitude = update_data.pop("latitude", None)
+    longitude = update_data.pop("longitude", None)
+    if (latitude is None) != (longitude is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="latitude and longitude must be given together"
+        )
+    
     try:
         # Check if listing exists and belongs to current user
         listing = await listings_collection.find_one({"_id": ObjectId(listing_id)})
@@ -186,16 +421,28 @@ async def update_listing(
             )
         
         # Update listing
-        update_data = listing_update.dict(exclude_unset=True)
         update_data["updated_at"] = datetime.utcnow()
+        if "title" in update_data:
+            update_data["search_trigrams"] = text_trigrams(update_data["title"])
+        update = {"$set": update_data}
+        if update_data.get("location") or latitude is not None:
+            location_geo = _listing_point(update_data.get("location", listing["location"]), latitude, longitude)
+            if location_geo is None:
+                # Unrecognised new location: fall back to the animal's point, as on create
+                location_geo = await _animal_point(listing["animal_id"])
+            if location_geo is not None:
+                update_data["location_geo"] = location_geo
+            else:
+                update["$unset"] = {"location_geo": ""}
         
         await listings_collection.update_one(
             {"_id": ObjectId(listing_id)},
-            {"$set": update_data}
+            update
         )
         
         # Get updated listing
         updated_listing = await listings_collection.find_one({"_id": ObjectId(listing_id)})
+        
         updated_listing["_id"] = str(updated_listing["_id"])
         
         return ListingResponse(**updated_listing)
@@ -209,7 +456,7 @@ async def update_listing(
 @router.delete("/listings/{listing_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_listing(
     listing_id: str,
-    current_user: UserInDB = Depends(get_current_farmer)
+    current_user: TokenUser = Depends(get_current_farmer)
 ):
     """Delete a marketplace listing."""
     listings_collection = get_collection("listings")
@@ -242,39 +489,30 @@ async def delete_listing(
 async def get_my_listings(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Page size"),
-    current_user: UserInDB = Depends(get_current_farmer)
+    after: Optional[str] = Query(None, description="Continuation token from next_cursor; replaces page"),
+    current_user: TokenUser = Depends(get_current_farmer)
 ):
-    """Get current user's marketplace listings."""
+    """Get current user's marketplace listings (paginate with page or after, see get_listings)."""
     listings_collection = get_collection("listings")
-    animals_collection = get_collection("animals")
     
     # Count total documents
     total = await listings_collection.count_documents({"seller_id": current_user.id})
     
-    # Get paginated results
-    skip = (page - 1) * size
-    cursor = listings_collection.find({"seller_id": current_user.id}).skip(skip).limit(size).sort("created_at", -1)
+    # Get paginated results, one extra to detect the next page
+    page_query = {"seller_id": current_user.id}
+    if after:
+        page_query.update(keyset_filter("created_at", *decode_cursor(after)))
+    cursor = listings_collection.find(page_query).sort(LISTINGS_SORT).limit(size + 1)
+    if not after:
+        cursor = cursor.skip((page - 1) * size)
+    documents, next_cursor = split_page(await cursor.to_list(length=size + 1), size)
     
-    listings = []
-    async for listing in cursor:
-        listing["_id"] = str(listing["_id"])
-        
-        # Get animal details
-        try:
-            animal = await animals_collection.find_one({"_id": ObjectId(listing["animal_id"])})
-            listing_response = ListingResponse(
-                **listing,
-                seller_name=current_user.name,
-                animal_name=animal["name"] if animal else None,
-                animal_health_score=animal["health_score"] if animal else None
-            )
-            listings.append(listing_response)
-        except Exception as e:
-            continue
+    listings = _listing_responses(documents)
     
     return ListingListResponse(
         listings=listings,
         total=total,
         page=page,
-        size=size
+        size=size,
+        next_cursor=next_cursor
     )
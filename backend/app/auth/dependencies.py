@@ -1,26 +1,30 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.database import get_collection
 from app.auth.jwt import verify_token
-from app.models.user import TokenData, UserInDB
+from app.config import settings
+from app.models.user import TokenData, TokenUser, UserInDB
+from app.services.ownership import ownership
+from app.services.token_revocations import token_revocations
+from app.services.user_cache import get_user
 from bson import ObjectId
 
 security = HTTPBearer()
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserInDB:
-    """Get the current authenticated user."""
-    token = credentials.credentials
+def authenticate_token(token: str) -> TokenData:
+    """Decode a bearer token, rejecting invalid and revoked ones."""
     token_data = verify_token(token)
     
-    if token_data is None:
+    if token_data is None or token_revocations.is_revoked(token_data.user_id, token_data.token_version):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    users_collection = get_collection("users")
-    user = await users_collection.find_one({"_id": ObjectId(token_data.user_id)})
+    return token_data
+
+async def load_token_user(token_data: TokenData) -> UserInDB:
+    """Read the user a token belongs to (cached per worker, see app/services/user_cache.py)."""
+    user = await get_user(token_data.user_id)
     
     if user is None:
         raise HTTPException(
@@ -29,11 +33,35 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Convert MongoDB document to UserInDB model
-    user["_id"] = str(user["_id"])
-    return UserInDB(**user)
+    return user
 
-async def get_current_active_user(current_user: UserInDB = Depends(get_current_user)) -> UserInDB:
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserInDB:
+    """Get the current authenticated user with their full profile."""
+    token_data = authenticate_token(credentials.credentials)
+    return await load_token_user(token_data)
+
+async def get_token_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> TokenUser:
+    """Get the current user for authorization checks.
+    
+    With JWT_CLAIMS_ENABLED, tokens that carry role claims are trusted as they
+    are and no user is read. Other tokens fall back to reading the user.
+    Either way only id, email, name, role and is_active are returned; use
+    get_current_user for the full profile.
+    """
+    token_data = authenticate_token(credentials.credentials)
+    
+    if settings.jwt_claims_enabled and token_data.role is not None:
+        return TokenUser(
+            id=token_data.user_id,
+            email=token_data.email,
+            name=token_data.name or "",
+            role=token_data.role,
+            is_active=token_data.is_active is not False
+        )
+    user = await load_token_user(token_data)
+    return TokenUser(id=user.id, email=user.email, name=user.name, role=user.role, is_active=user.is_active)
+
+async def get_current_active_user(current_user: TokenUser = Depends(get_token_user)) -> TokenUser:
     """Get the current active user."""
     if not current_user.is_active:
         raise HTTPException(
@@ -42,7 +70,7 @@ async def get_current_active_user(current_user: UserInDB = Depends(get_current_u
         )
     return current_user
 
-async def get_current_farmer(current_user: UserInDB = Depends(get_current_active_user)) -> UserInDB:
+async def get_current_farmer(current_user: TokenUser = Depends(get_current_active_user)) -> TokenUser:
     """Get the current user if they are a farmer."""
     if current_user.role.value != "farmer":
         raise HTTPException(
@@ -51,7 +79,7 @@ async def get_current_farmer(current_user: UserInDB = Depends(get_current_active
         )
     return current_user
 
-async def get_current_buyer(current_user: UserInDB = Depends(get_current_active_user)) -> UserInDB:
+async def get_current_buyer(current_user: TokenUser = Depends(get_current_active_user)) -> TokenUser:
     """Get the current user if they are a buyer."""
     if current_user.role.value != "buyer":
         raise HTTPException(
@@ -60,7 +88,7 @@ async def get_current_buyer(current_user: UserInDB = Depends(get_current_active_
         )
     return current_user
 
-async def get_current_vet(current_user: UserInDB = Depends(get_current_active_user)) -> UserInDB:
+async def get_current_vet(current_user: TokenUser = Depends(get_current_active_user)) -> TokenUser:
     """Get the current user if they are a veterinarian."""
     if current_user.role.value != "vet":
         raise HTTPException(
@@ -68,3 +96,39 @@ async def get_current_vet(current_user: UserInDB = Depends(get_current_active_us
             detail="Access denied. Veterinarian role required."
         )
     return current_user
+
+async def get_current_admin(current_user: TokenUser = Depends(get_current_active_user)) -> TokenUser:
+    """Get the current user if they are an administrator."""
+    if current_user.role.value != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied. Admin role required."
+        )
+    return current_user
+
+async def require_animal_owner(animal_id: str, user: TokenUser, detail: str = "Not authorized to access this animal") -> str:
+    """Return animal_id if the user owns the animal, else raise 400, 404 or 403."""
+    owner_id = await ownership.owner_of(animal_id)
+    if owner_id is None:
+        if not ObjectId.is_valid(animal_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid animal ID"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Animal not found"
+        )
+    
+    if owner_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=detail
+        )
+    return animal_id
+
+def owned_animal_id(detail: str = "Not authorized to access this animal"):
+    """Dependency for an ``{animal_id}`` path parameter the current user must own."""
+    async def dependency(animal_id: str, current_user: TokenUser = Depends(get_current_active_user)) -> str:
+        return await require_animal_owner(animal_id, current_user, detail)
+    return dependency
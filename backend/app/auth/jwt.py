@@ -3,7 +3,7 @@ from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
-from app.models.user import TokenData
+from app.models.user import TokenData, UserRole
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -27,6 +27,20 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
+def user_token_claims(user: dict) -> dict:
+    """Claims for a user's access token.
+
+    Every token carries the user's token version so it can be revoked. With
+    JWT_CLAIMS_ENABLED, role, active flag and name are signed in as well so
+    requests can be authorized without reading the user.
+    """
+    claims = {"sub": user["email"], "user_id": str(user["_id"]), "ver": user.get("token_version", 0)}
+    if settings.jwt_claims_enabled:
+        claims["role"] = UserRole(user["role"]).value
+        claims["active"] = user.get("is_active", True)
+        claims["name"] = user["name"]
+    return claims
+
 def verify_token(token: str) -> Optional[TokenData]:
     """Verify and decode a JWT token."""
     try:
@@ -37,7 +51,14 @@ def verify_token(token: str) -> Optional[TokenData]:
         if email is None or user_id is None:
             return None
             
-        token_data = TokenData(email=email, user_id=user_id)
+        token_data = TokenData(
+            email=email,
+            user_id=user_id,
+            token_version=payload.get("ver", 0),
+            role=payload.get("role"),
+            is_active=payload.get("active"),
+            name=payload.get("name")
+        )
         return token_data
-    except JWTError:
+    except (JWTError, ValueError):
         return None
@@ -0,0 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from fastapi import HTTPException, status
+from app.auth.jwt import get_password_hash, verify_password
+from app.config import settings
+import asyncio
+import time
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated, bounded thread pool.
+
+    A bcrypt round takes tens of milliseconds of CPU. Called from a handler
+    it would stall every other request on the event loop, so hashing and
+    verification run on ``concurrency`` worker threads instead (bcrypt
+    releases the GIL while it works). Callers beyond that limit wait at most
+    ``queue_timeout`` seconds for a slot and then get a 503, which keeps a
+    login burst from piling up unbounded work. A concurrency of 0 hashes on
+    the event loop as before.
+    """
+
+    def __init__(self, concurrency: int, queue_timeout: float):
+        self.concurrency = concurrency
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if concurrency > 0:
+            self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bcrypt")
+        self._slots = asyncio.Semaphore(max(concurrency, 1))
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+
+    async def hash(self, password: str) -> str:
+        """Hash a password."""
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash."""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def _run(self, function: Callable, *args):
+        if self._executor is None:
+            return function(*args)
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-in requests, retry later",
+                headers={"Retry-After": "1"}
+            )
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+        finally:
+            self.busy_seconds += time.perf_counter() - started
+            self.completed += 1
+            self.in_flight -= 1
+            self._slots.release()
+
+    def shutdown(self):
+        """Stop the worker threads once running hashes finish."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """Pool size, queue depth and rejection counters."""
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "mean_ms": round(self.busy_seconds / self.completed * 1000, 2) if self.completed else 0,
+        }
+
+password_hasher = PasswordHasher(
+    concurrency=settings.password_hash_concurrency,
+    queue_timeout=settings.password_hash_queue_timeout_seconds
+)
@@ -11,12 +11,81 @@ class Settings(BaseSettings):
     secret_key: str = "your-secret-key-here-make-it-long-and-secure"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    jwt_claims_enabled: bool = False  # Sign role, active flag and name into tokens; role checks skip the user read
+    token_revocation_refresh_seconds: int = 5  # How quickly revocations from other workers apply
+    password_hash_concurrency: int = 4  # bcrypt worker threads; 0 hashes on the event loop
+    password_hash_queue_timeout_seconds: float = 5.0  # Wait for a free worker before answering 503
     
     # Application Configuration
     app_name: str = "Smart Animal Platform API"
     debug: bool = True
     cors_origins: List[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
     
+    # IoT Ingest Configuration
+    iot_batch_max_size: int = 5000
+    iot_timeseries_enabled: bool = False
+    iot_timeseries_granularity: str = "seconds"  # seconds, minutes or hours
+    iot_rollups_enabled: bool = True
+    iot_rollup_max_points: int = 1500  # Upper bound on buckets returned by resolution=auto
+    iot_stream_batch_size: int = 1000  # Cursor batch size for NDJSON streaming
+    iot_latest_cache_enabled: bool = True
+    iot_latest_cache_size: int = 16  # Readings kept per animal
+    iot_latest_cache_max_animals: int = 100000
+    iot_latest_cache_idle_seconds: int = 3600
+    iot_latest_cache_refresh_seconds: int = 5  # Reload from Mongo after this age to see other processes' writes; 0 only with one process or the change stream
+    iot_stream_max_subscribers: int = 10000  # Live metrics connections per worker
+    iot_stream_heartbeat_seconds: int = 15
+    iot_stream_change_stream: bool = False  # Follow inserts from every process (needs a replica set)
+    iot_alerts_enabled: bool = True
+    iot_alert_debounce_readings: int = 2  # Consecutive readings needed to open or resolve an alert
+    iot_alert_missing_minutes: int = 30  # Silence before a data_missing alert
+    iot_alert_missing_lookback_hours: int = 24  # Animals silent longer than this are not alerted on again
+    iot_alert_sweep_seconds: int = 60
+    iot_analytics_max_readings: int = 2000000  # Readings loaded per stats request
+    iot_retention_days: int = 0  # Archive and delete raw readings older than this; 0 keeps them forever
+    iot_archive_dir: str = "data/iot_archive"
+    iot_retention_sweep_seconds: int = 3600
+    iot_write_behind_enabled: bool = False  # Acknowledge readings with 202 and write them in batches
+    iot_write_behind_max_queue: int = 50000  # Readings held in memory before ingest answers 429
+    iot_write_behind_batch_size: int = 1000
+    iot_write_behind_flush_ms: int = 50  # Longest a queued reading waits for its batch
+    iot_gateway_host: str = "0.0.0.0"
+    iot_gateway_tcp_port: int = 7070  # 0 disables the TCP listener
+    iot_gateway_udp_port: int = 7070  # 0 disables the UDP listener
+    iot_gateway_max_line_bytes: int = 512
+    iot_gateway_idle_seconds: int = 300  # Close TCP connections silent this long
+    iot_gateway_device_refresh_seconds: int = 60  # Device reload, last_seen write and stats interval
+    iot_gateway_max_lookups: int = 32  # Concurrent database lookups of UDP devices missing from the cache
+    
+    # Marketplace Configuration
+    listing_reconcile_seconds: int = 3600  # Repair drifted seller/animal details on listings; 0 disables
+    listing_search_radius_km: float = 50  # Default radius of nearby listing searches
+    listing_search_max_radius_km: float = 500
+    listing_search_min_similarity: float = 0.4  # Share of query trigrams a title needs in typo-tolerant search
+    listing_search_max_candidates: int = 5000  # Titles scored per typo-tolerant search
+    listing_view_flush_seconds: float = 5  # Longest a counted view waits to be written
+    listing_view_dedupe_seconds: int = 1800  # Repeat views by one user count once per window; 0 counts every view
+    listing_view_dedupe_max_size: int = 100000  # (user, listing) pairs remembered for deduplication
+    
+    # Cache Configuration
+    ownership_cache_ttl_seconds: int = 60  # Bounds staleness across workers
+    ownership_cache_max_animals: int = 200000
+    ownership_cache_max_owners: int = 20000
+    user_cache_enabled: bool = True
+    user_cache_ttl_seconds: int = 30  # Longest another worker may serve a changed user
+    user_cache_max_size: int = 50000
+    
+    # Rate Limiting
+    rate_limit_enabled: bool = False  # Opt in; size the iot_ingest rate for a whole herd per account
+    rate_limit_backend: str = "memory"  # memory (per worker) or mongo (shared by all workers)
+    rate_limit_cleanup_seconds: int = 60  # How often idle in-memory buckets are dropped
+    rate_limit_auth_per_second: float = 0.5  # Login/register attempts per client IP
+    rate_limit_auth_burst: int = 10
+    rate_limit_iot_per_second: float = 50  # Ingest requests per user (a batch counts once)
+    rate_limit_iot_burst: int = 200
+    rate_limit_browse_per_second: float = 10  # Marketplace reads per user
+    rate_limit_browse_burst: int = 50
+    
     # Optional: External APIs
     weather_api_key: str = ""
     payment_api_key: str = ""
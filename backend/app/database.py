@@ -40,23 +40,79 @@ async def create_indexes():
         await db.db.users.create_index("email", unique=True)
         await db.db.users.create_index("phone")
         
+        # Token revocations are only needed until the revoked tokens expire
+        await db.db.token_revocations.create_index("expires_at", expireAfterSeconds=0)
+        await db.db.token_revocations.create_index("updated_at")
+        
         # Animals collection indexes
         await db.db.animals.create_index("owner_id")
         await db.db.animals.create_index("species")
         await db.db.animals.create_index("status")
-        await db.db.animals.create_index([("location", "2dsphere")])
+        # location is display text; the point is in location_geo
+        await drop_index_if_exists(db.db.animals, "location_2dsphere")
+        await db.db.animals.create_index([("location_geo", "2dsphere")])
+        # Keyset pagination: newest first with _id as tie-breaker, overall and per owner
+        await db.db.animals.create_index([("created_at", -1), ("_id", -1)])
+        await db.db.animals.create_index([("owner_id", 1), ("created_at", -1), ("_id", -1)])
         
         # Listings collection indexes
         await db.db.listings.create_index("seller_id")
         await db.db.listings.create_index("animal_id")
         await db.db.listings.create_index("status")
         await db.db.listings.create_index("price")
-        await db.db.listings.create_index([("location", "2dsphere")])
+        await drop_index_if_exists(db.db.listings, "location_2dsphere")
+        await db.db.listings.create_index([("location_geo", "2dsphere")])
+        # Keyset pagination: newest first with _id as tie-breaker, overall, per seller and per status;
+        # seller and animal details are stored on the listing
+        await db.db.listings.create_index([("created_at", -1), ("_id", -1)])
+        await db.db.listings.create_index([("seller_id", 1), ("created_at", -1), ("_id", -1)])
+        await db.db.listings.create_index([("status", 1), ("created_at", -1), ("_id", -1)])
+        await db.db.listings.create_index([("species", 1), ("created_at", -1), ("_id", -1)])
+        # Search: words weighted title above description, trigrams of titles for misspellings
+        await db.db.listings.create_index(
+            [("title", "text"), ("description", "text")],
+            weights={"title": 5, "description": 1},
+            default_language="english",
+            name="listing_text"
+        )
+        await db.db.listings.create_index("search_trigrams")
         
         # IoT metrics collection indexes
-        await db.db.iot_metrics.create_index("animal_id")
-        await db.db.iot_metrics.create_index("timestamp")
-        await db.db.iot_metrics.create_index([("animal_id", 1), ("timestamp", -1)])
+        if settings.iot_timeseries_enabled:
+            # Time-series buckets already cluster by animal and time
+            await ensure_iot_timeseries_collection()
+            await db.db.iot_metrics.create_index([("animal_id", 1), ("timestamp", -1)])
+        else:
+            await db.db.iot_metrics.create_index("animal_id")
+            await db.db.iot_metrics.create_index("timestamp")
+            # _id breaks timestamp ties so keyset pagination needs no in-memory sort
+            await db.db.iot_metrics.create_index([("animal_id", 1), ("timestamp", -1), ("_id", -1)])
+        
+        # IoT rollups collection indexes
+        await db.db.iot_rollups.create_index(
+            [("animal_id", 1), ("resolution", 1), ("bucket", -1)],
+            unique=True
+        )
+        
+        # Alerts collection indexes
+        await db.db.alerts.create_index([("animal_id", 1), ("timestamp", -1), ("_id", -1)])
+        await db.db.alerts.create_index([("is_resolved", 1), ("timestamp", -1)])
+        await db.db.alerts.create_index([("alert_type", 1), ("is_resolved", 1)])
+        # At most one open alert per animal and type, even with several workers
+        await db.db.alerts.create_index(
+            [("animal_id", 1), ("alert_type", 1)],
+            unique=True,
+            partialFilterExpression={"is_resolved": False}
+        )
+        
+        # Newest reading time per animal, read by the missing-data sweep
+        await db.db.iot_last_seen.create_index("last_seen")
+        
+        # IoT devices collection indexes
+        await db.db.devices.create_index("animal_id")
+        
+        # Shared rate-limit buckets are dropped once idle
+        await db.db.rate_limits.create_index("expires_at", expireAfterSeconds=0)
         
         # Orders collection indexes
         await db.db.orders.create_index("buyer_id")
@@ -68,6 +124,40 @@ async def create_indexes():
     except Exception as e:
         logger.error(f"Error creating indexes: {e}")
 
+async def drop_index_if_exists(collection, index_name: str):
+    """Drop an index by name if the collection has it."""
+    if index_name in await collection.index_information():
+        await collection.drop_index(index_name)
+        logger.info(f"Dropped index {collection.name}.{index_name}")
+
+async def get_collection_options(collection_name: str, database=None):
+    """Get the creation options of a collection, or None if it does not exist."""
+    database = database if database is not None else db.db
+    async for info in database.list_collections(filter={"name": collection_name}):
+        return info.get("options", {})
+    return None
+
+async def ensure_iot_timeseries_collection(database=None):
+    """Create iot_metrics as a time-series collection if it does not exist yet."""
+    database = database if database is not None else db.db
+    options = await get_collection_options("iot_metrics", database)
+    
+    if options is None:
+        await database.create_collection(
+            "iot_metrics",
+            timeseries={
+                "timeField": "timestamp",
+                "metaField": "animal_id",
+                "granularity": settings.iot_timeseries_granularity
+            }
+        )
+        logger.info("Created iot_metrics as a time-series collection")
+    elif "timeseries" not in options:
+        logger.warning(
+            "iot_metrics is a plain collection; run "
+            "'python -m app.migrations.iot_timeseries' to convert it"
+        )
+
 def get_collection(collection_name: str):
     """Get a MongoDB collection."""
     return db.db[collection_name]
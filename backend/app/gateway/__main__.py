@@ -0,0 +1,101 @@
+"""
+Run the collar ingest gateway.
+
+Usage (from the backend directory):
+    python -m app.gateway
+
+Listens on IOT_GATEWAY_TCP_PORT and IOT_GATEWAY_UDP_PORT (0 disables a
+listener) and writes readings to the configured MongoDB in batches.
+
+The gateway shares nothing in memory with the API workers: they see its
+readings through MongoDB. Run the API with IOT_STREAM_CHANGE_STREAM=True
+so its live streams and latest-readings caches pick them up as they are
+inserted; otherwise /latest lags by up to IOT_LATEST_CACHE_REFRESH_SECONDS
+and live streams never carry them.
+"""
+
+import asyncio
+import logging
+import signal
+
+from app.config import settings
+from app.database import connect_to_mongo, close_mongo_connection
+from app.gateway.devices import device_registry
+from app.gateway.server import Gateway, GatewayDatagramProtocol
+from app.services.ingest_buffer import ingest_buffer
+from app.services.iot_alerts import alert_engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("app.gateway")
+
+async def report(gateway: Gateway, interval_seconds: int):
+    """Log gateway counters periodically."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        logger.info(
+            f"Gateway stats: {gateway.stats()} buffer: {ingest_buffer.stats()} "
+            f"registry: {device_registry.stats()}"
+        )
+
+async def main():
+    """Start the listeners and serve until SIGINT or SIGTERM."""
+    # Nothing reads the latest-readings cache in this process; the API serves /latest
+    settings.iot_latest_cache_enabled = False
+    if not settings.iot_stream_change_stream:
+        logger.warning(
+            "IOT_STREAM_CHANGE_STREAM is off: API workers will not stream gateway readings live "
+            "and will show them in /latest only after IOT_LATEST_CACHE_REFRESH_SECONDS"
+        )
+
+    await connect_to_mongo()
+    await device_registry.load()
+    ingest_buffer.start()
+
+    background_tasks = [
+        asyncio.create_task(device_registry.run_refresh(settings.iot_gateway_device_refresh_seconds))
+    ]
+    if settings.iot_alerts_enabled:
+        # Threshold alerts are evaluated here as readings arrive; the sweeper also reloads open
+        # alerts resolved through the API, and the lease keeps one missing-data sweep at a time
+        await alert_engine.load_open_alerts()
+        background_tasks.append(asyncio.create_task(alert_engine.run_sweeper(settings.iot_alert_sweep_seconds)))
+
+    gateway = Gateway(device_registry, ingest_buffer)
+    background_tasks.append(asyncio.create_task(report(gateway, settings.iot_gateway_device_refresh_seconds)))
+
+    loop = asyncio.get_running_loop()
+    tcp_server = None
+    udp_transport = None
+    if settings.iot_gateway_tcp_port:
+        tcp_server = await asyncio.start_server(
+            gateway.handle_connection, settings.iot_gateway_host, settings.iot_gateway_tcp_port
+        )
+        logger.info(f"Gateway listening on tcp://{settings.iot_gateway_host}:{settings.iot_gateway_tcp_port}")
+    if settings.iot_gateway_udp_port:
+        udp_transport, _ = await loop.create_datagram_endpoint(
+            lambda: GatewayDatagramProtocol(gateway),
+            local_addr=(settings.iot_gateway_host, settings.iot_gateway_udp_port)
+        )
+        logger.info(f"Gateway listening on udp://{settings.iot_gateway_host}:{settings.iot_gateway_udp_port}")
+
+    stop = asyncio.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    await stop.wait()
+
+    logger.info("Shutting down gateway...")
+    if tcp_server:
+        tcp_server.close()
+    if udp_transport:
+        udp_transport.close()
+    await gateway.finish_lookups()
+    await ingest_buffer.stop()
+    await device_registry.flush_seen()
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await close_mongo_connection()
+    logger.info(f"Gateway stopped: {gateway.stats()}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
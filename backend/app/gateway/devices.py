@@ -0,0 +1,125 @@
+"""
+Per-device keys for collars that talk to the gateway.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+import asyncio
+import hashlib
+import hmac
+import logging
+import secrets
+import time
+
+from bson import ObjectId
+
+from app.database import get_collection
+
+logger = logging.getLogger(__name__)
+
+# Unknown device ids are not looked up again for this long
+MISS_TTL_SECONDS = 30
+MAX_MISSES = 100000
+
+def new_device_key() -> str:
+    """Random key handed to a device once at registration."""
+    return secrets.token_hex(16)
+
+def hash_device_key(key: str) -> str:
+    """Stored form of a device key."""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+class DeviceRegistry:
+    """Device id -> (key hash, animal id), cached from the ``devices`` collection.
+
+    Known devices are checked without touching MongoDB. The whole table is
+    reloaded every refresh, which is when new registrations outside the
+    cache and deletions take effect; last_seen is written back at the same
+    time in one update per refresh.
+    """
+
+    def __init__(self):
+        self._devices: Dict[str, Tuple[str, str]] = {}
+        self._misses: Dict[str, float] = {}
+        self._seen: Set[str] = set()
+
+    async def load(self):
+        """Replace the cache with every registered device."""
+        devices_collection = get_collection("devices")
+        devices = {}
+        async for device in devices_collection.find({}, {"key_hash": 1, "animal_id": 1}):
+            devices[str(device["_id"])] = (device["key_hash"], device["animal_id"])
+        self._devices = devices
+        self._misses.clear()
+        logger.info(f"Loaded {len(devices)} gateway devices")
+
+    def lookup(self, device_id: str) -> Optional[Tuple[str, str]]:
+        """Cached (key hash, animal id) of a device, without I/O."""
+        return self._devices.get(device_id)
+
+    def is_unknown(self, device_id: str) -> bool:
+        """True when the device was looked up recently and does not exist."""
+        expires = self._misses.get(device_id)
+        return expires is not None and expires > time.monotonic()
+
+    async def fetch(self, device_id: str) -> Optional[Tuple[str, str]]:
+        """Load one device registered since the last refresh."""
+        if self.is_unknown(device_id) or not ObjectId.is_valid(device_id):
+            return None
+
+        device = await get_collection("devices").find_one(
+            {"_id": ObjectId(device_id)}, {"key_hash": 1, "animal_id": 1}
+        )
+        if not device:
+            if len(self._misses) >= MAX_MISSES:
+                self._misses.clear()
+            self._misses[device_id] = time.monotonic() + MISS_TTL_SECONDS
+            return None
+
+        entry = (device["key_hash"], device["animal_id"])
+        self._devices[device_id] = entry
+        return entry
+
+    def verify(self, device_id: str, entry: Tuple[str, str], key: str) -> Optional[str]:
+        """Animal ID for a correct key, else None."""
+        key_hash, animal_id = entry
+        if not hmac.compare_digest(key_hash, hash_device_key(key)):
+            return None
+        self._seen.add(device_id)
+        return animal_id
+
+    async def authenticate(self, device_id: str, key: str) -> Optional[str]:
+        """Animal ID the device reports for, or None if unknown or the key is wrong."""
+        entry = self.lookup(device_id) or await self.fetch(device_id)
+        if entry is None:
+            return None
+        return self.verify(device_id, entry, key)
+
+    async def flush_seen(self):
+        """Record last_seen for devices heard from since the previous flush."""
+        if not self._seen:
+            return
+        ids = [ObjectId(device_id) for device_id in self._seen]
+        self._seen = set()
+        await get_collection("devices").update_many(
+            {"_id": {"$in": ids}},
+            {"$set": {"last_seen": datetime.utcnow()}}
+        )
+
+    async def run_refresh(self, interval_seconds: int):
+        """Reload devices and write last_seen periodically until cancelled."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.flush_seen()
+                await self.load()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error refreshing gateway devices: {e}")
+
+    def stats(self) -> dict:
+        """Cache size."""
+        return {"devices": len(self._devices), "unknown_ids": len(self._misses)}
+
+device_registry = DeviceRegistry()
@@ -0,0 +1,100 @@
+"""
+Compact line protocol spoken by collars.
+
+    AUTH <device_id> <key>                        TCP, once per connection
+    t=38.6,h=61,a=42,f=fed,w=80,b=91,s=strong     TCP, one reading per line
+    <device_id> <key> t=38.6,h=61,a=42,...        UDP, one reading per line
+
+Readings use the IoTMetricsBase field names or their one-letter short forms
+and are checked against the same bounds and choices as the REST API.
+"""
+
+from enum import Enum
+from typing import Dict, List, Tuple
+import math
+
+from app.models.iot import IoTMetricsBase
+
+SHORT_NAMES = {
+    "t": "temperature",
+    "h": "humidity",
+    "a": "activity_level",
+    "f": "feeding_status",
+    "w": "water_level",
+    "b": "battery_level",
+    "s": "signal_strength",
+}
+
+class ProtocolError(ValueError):
+    """A line that cannot be accepted; the message is sent back to TCP clients."""
+
+def _field_rules() -> Dict[str, tuple]:
+    """(lower, upper) bounds or allowed values per reading field, from IoTMetricsBase."""
+    rules = {}
+    for name, field in IoTMetricsBase.model_fields.items():
+        if name == "animal_id":
+            continue
+        if isinstance(field.annotation, type) and issubclass(field.annotation, Enum):
+            rules[name] = ("choice", frozenset(member.value for member in field.annotation))
+            continue
+
+        lower, upper = -math.inf, math.inf
+        for constraint in field.metadata:
+            lower = getattr(constraint, "ge", lower)
+            upper = getattr(constraint, "le", upper)
+        rules[name] = ("number", (lower, upper))
+    return rules
+
+FIELD_RULES = _field_rules()
+REQUIRED_FIELDS = frozenset(FIELD_RULES)
+FIELD_NAMES = {**{name: name for name in FIELD_RULES}, **SHORT_NAMES}
+
+def parse_reading(text: str) -> Dict[str, object]:
+    """Parse and validate the key=value part of a reading line."""
+    reading: Dict[str, object] = {}
+    for pair in text.strip().split(","):
+        key, separator, raw = pair.partition("=")
+        name = FIELD_NAMES.get(key.strip())
+        if name is None or not separator:
+            raise ProtocolError(f"unknown field {key.strip()!r}")
+
+        kind, rule = FIELD_RULES[name]
+        raw = raw.strip()
+        if kind == "choice":
+            if raw not in rule:
+                raise ProtocolError(f"{name}: expected one of {', '.join(sorted(rule))}")
+            reading[name] = raw
+            continue
+
+        try:
+            value = float(raw)
+        except ValueError:
+            raise ProtocolError(f"{name}: not a number")
+        lower, upper = rule
+        if not lower <= value <= upper:
+            raise ProtocolError(f"{name}: outside {lower:g}..{upper:g}")
+        reading[name] = value
+
+    if len(reading) != len(REQUIRED_FIELDS):
+        missing = sorted(REQUIRED_FIELDS.difference(reading))
+        raise ProtocolError(f"missing {', '.join(missing)}")
+    return reading
+
+def parse_auth(line: str) -> Tuple[str, str]:
+    """Parse a TCP ``AUTH <device_id> <key>`` line."""
+    parts = line.split()
+    if len(parts) != 3 or parts[0] != "AUTH":
+        raise ProtocolError("expected AUTH <device_id> <key>")
+    return parts[1], parts[2]
+
+def parse_datagram_line(line: str) -> Tuple[str, str, str]:
+    """Split a UDP ``<device_id> <key> <reading>`` line."""
+    parts = line.split(None, 2)
+    if len(parts) != 3:
+        raise ProtocolError("expected <device_id> <key> <reading>")
+    return parts[0], parts[1], parts[2]
+
+def split_lines(buffer: bytes) -> Tuple[List[str], bytes]:
+    """Complete lines in a receive buffer, plus the unterminated remainder."""
+    *lines, rest = buffer.split(b"\n")
+    return [line.decode("utf-8", "replace") for line in lines if line.strip()], rest
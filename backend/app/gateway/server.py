@@ -0,0 +1,197 @@
+"""
+TCP and UDP listeners that turn collar lines into stored readings.
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Optional, Set
+import asyncio
+import logging
+
+from app.config import settings
+from app.gateway.devices import DeviceRegistry
+from app.gateway.protocol import (
+    ProtocolError, parse_auth, parse_datagram_line, parse_reading, split_lines
+)
+from app.services.ingest_buffer import IngestBuffer
+
+logger = logging.getLogger(__name__)
+
+class Gateway:
+    """Validates readings from authenticated devices and queues them for writing.
+
+    Readings go through the write-behind ingest buffer, so they reach
+    ``iot_metrics`` in insert_many batches and update rollups and alerts
+    exactly like readings posted to the REST API.
+    """
+
+    def __init__(self, registry: DeviceRegistry, buffer: IngestBuffer, max_lookups: Optional[int] = None):
+        self.registry = registry
+        self.buffer = buffer
+        self.max_lookups = max_lookups if max_lookups is not None else settings.iot_gateway_max_lookups
+        # Device ids of UDP datagrams waiting for a database lookup, and the tasks doing them
+        self._lookups: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.connections = 0
+        self.received = 0
+        self.accepted = 0
+        self.errors: Counter = Counter()
+
+    def submit(self, animal_id: str, text: str) -> Optional[str]:
+        """Queue one reading; returns an error message when it is refused."""
+        self.received += 1
+        try:
+            document = parse_reading(text)
+        except ProtocolError as e:
+            self.errors["invalid"] += 1
+            return str(e)
+
+        document["animal_id"] = animal_id
+        document["timestamp"] = datetime.utcnow()
+        document["location"] = {}
+        document["additional_data"] = {}
+        if not self.buffer.offer([document]):
+            self.errors["busy"] += 1
+            return "busy"
+
+        self.accepted += 1
+        return None
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one TCP connection: AUTH once, then one reading per line."""
+        self.connections += 1
+        try:
+            await self._serve(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            line = await asyncio.wait_for(reader.readline(), settings.iot_gateway_idle_seconds)
+            device_id, key = parse_auth(line.decode("utf-8", "replace"))
+        except asyncio.TimeoutError:
+            return
+        except ValueError as e:
+            writer.write(f"ERR {e}\n".encode())
+            return
+
+        animal_id = await self.registry.authenticate(device_id, key)
+        if animal_id is None:
+            self.errors["unauthorized"] += 1
+            writer.write(b"ERR unauthorized\n")
+            return
+        writer.write(b"OK\n")
+
+        pending = b""
+        while True:
+            try:
+                chunk = await asyncio.wait_for(reader.read(65536), settings.iot_gateway_idle_seconds)
+            except asyncio.TimeoutError:
+                return
+            if not chunk:
+                return
+
+            # Deleted devices are dropped once the registry refreshes
+            if self.registry.lookup(device_id) is None:
+                writer.write(b"ERR unauthorized\n")
+                return
+
+            lines, pending = split_lines(pending + chunk)
+            if len(pending) > settings.iot_gateway_max_line_bytes:
+                self.errors["line_too_long"] += 1
+                writer.write(b"ERR line too long\n")
+                return
+
+            replies = []
+            for line in lines:
+                error = self.submit(animal_id, line)
+                if error:
+                    replies.append(f"ERR {error}\n")
+            if replies:
+                writer.write("".join(replies).encode())
+                await writer.drain()
+
+    def handle_datagram(self, data: bytes):
+        """Handle one UDP datagram of ``<device_id> <key> <reading>`` lines.
+
+        A device missing from the cache is looked up in the background, one
+        lookup per device id and at most max_lookups at once; readings that
+        would need another lookup are dropped, as UDP readings may be.
+        """
+        lines, _ = split_lines(data + b"\n")
+        for line in lines:
+            try:
+                device_id, key, reading = parse_datagram_line(line)
+            except ProtocolError:
+                self.received += 1
+                self.errors["invalid"] += 1
+                continue
+
+            entry = self.registry.lookup(device_id)
+            if entry is None:
+                if self.registry.is_unknown(device_id):
+                    self.received += 1
+                    self.errors["unauthorized"] += 1
+                elif device_id in self._lookups or len(self._lookups) >= self.max_lookups:
+                    self.received += 1
+                    self.errors["lookup_busy"] += 1
+                else:
+                    self._lookups.add(device_id)
+                    task = asyncio.create_task(self._handle_new_device(device_id, key, reading))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                continue
+
+            animal_id = self.registry.verify(device_id, entry, key)
+            if animal_id is None:
+                self.received += 1
+                self.errors["unauthorized"] += 1
+                continue
+            self.submit(animal_id, reading)
+
+    async def _handle_new_device(self, device_id: str, key: str, reading: str):
+        """Slow path for a datagram from a device missing from the cache."""
+        try:
+            animal_id = await self.registry.authenticate(device_id, key)
+        except Exception as e:
+            self.received += 1
+            self.errors["lookup_failed"] += 1
+            logger.warning(f"Gateway device lookup failed: {e}")
+            return
+        finally:
+            self._lookups.discard(device_id)
+        if animal_id is None:
+            self.received += 1
+            self.errors["unauthorized"] += 1
+            return
+        self.submit(animal_id, reading)
+
+    async def finish_lookups(self):
+        """Wait for device lookups still in flight, so their readings reach the buffer."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        """Message counters."""
+        return {
+            "connections": self.connections,
+            "lookups": len(self._lookups),
+            "received": self.received,
+            "accepted": self.accepted,
+            "errors": dict(self.errors),
+        }
+
+class GatewayDatagramProtocol(asyncio.DatagramProtocol):
+    """UDP endpoint; datagrams carry their own credentials and get no reply."""
+
+    def __init__(self, gateway: Gateway):
+        self.gateway = gateway
+
+    def datagram_received(self, data: bytes, addr):
+        self.gateway.handle_datagram(data)
+
+    def error_received(self, exc: Exception):
+        logger.warning(f"Gateway UDP error: {exc}")
@@ -0,0 +1,112 @@
+from typing import Dict, Optional, Tuple
+import re
+
+EARTH_RADIUS_KM = 6378.1
+
+# (longitude, latitude) of common place names, looked up without any network call
+PLACES: Dict[str, Tuple[float, float]] = {
+    "agra": (78.0081, 27.1767),
+    "ahmedabad": (72.5714, 23.0225),
+    "ajmer": (74.6399, 26.4499),
+    "allahabad": (81.8463, 25.4358),
+    "amritsar": (74.8723, 31.6340),
+    "anand": (72.9289, 22.5645),
+    "aurangabad": (75.3433, 19.8762),
+    "bangalore": (77.5946, 12.9716),
+    "bareilly": (79.4304, 28.3670),
+    "bathinda": (74.9455, 30.2110),
+    "belagavi": (74.4977, 15.8497),
+    "bengaluru": (77.5946, 12.9716),
+    "bhopal": (77.4126, 23.2599),
+    "bhubaneswar": (85.8245, 20.2961),
+    "bikaner": (73.3119, 28.0229),
+    "chandigarh": (76.7794, 30.7333),
+    "chennai": (80.2707, 13.0827),
+    "coimbatore": (76.9558, 11.0168),
+    "dehradun": (78.0322, 30.3165),
+    "delhi": (77.2090, 28.6139),
+    "erode": (77.7172, 11.3410),
+    "ghaziabad": (77.4538, 28.6692),
+    "guntur": (80.4365, 16.3067),
+    "gurgaon": (77.0266, 28.4595),
+    "gurugram": (77.0266, 28.4595),
+    "guwahati": (91.7362, 26.1445),
+    "hisar": (75.7217, 29.1492),
+    "hubli": (75.1240, 15.3647),
+    "hyderabad": (78.4867, 17.3850),
+    "indore": (75.8577, 22.7196),
+    "jaipur": (75.7873, 26.9124),
+    "jalandhar": (75.5762, 31.3260),
+    "jammu": (74.8570, 32.7266),
+    "jodhpur": (73.0243, 26.2389),
+    "kanpur": (80.3319, 26.4499),
+    "karnal": (76.9905, 29.6857),
+    "kochi": (76.2673, 9.9312),
+    "kolhapur": (74.2433, 16.7050),
+    "kolkata": (88.3639, 22.5726),
+    "kota": (75.8648, 25.2138),
+    "lucknow": (80.9462, 26.8467),
+    "ludhiana": (75.8573, 30.9010),
+    "madurai": (78.1198, 9.9252),
+    "meerut": (77.7064, 28.9845),
+    "mehsana": (72.3693, 23.5880),
+    "mumbai": (72.8777, 19.0760),
+    "mysore": (76.6394, 12.2958),
+    "mysuru": (76.6394, 12.2958),
+    "nagpur": (79.0882, 21.1458),
+    "nashik": (73.7898, 19.9975),
+    "new delhi": (77.2090, 28.6139),
+    "noida": (77.3910, 28.5355),
+    "panipat": (76.9635, 29.3909),
+    "patiala": (76.3869, 30.3398),
+    "patna": (85.1376, 25.5941),
+    "prayagraj": (81.8463, 25.4358),
+    "pune": (73.8567, 18.5204),
+    "raipur": (81.6296, 21.2514),
+    "rajkot": (70.8022, 22.3039),
+    "ranchi": (85.3096, 23.3441),
+    "rohtak": (76.6066, 28.8955),
+    "salem": (78.1460, 11.6643),
+    "shimla": (77.1734, 31.1048),
+    "srinagar": (74.7973, 34.0837),
+    "surat": (72.8311, 21.1702),
+    "thiruvananthapuram": (76.9366, 8.5241),
+    "udaipur": (73.7125, 24.5854),
+    "vadodara": (73.1812, 22.3072),
+    "varanasi": (82.9739, 25.3176),
+    "vijayawada": (80.6480, 16.5062),
+    "visakhapatnam": (83.2185, 17.6868),
+    "warangal": (79.5941, 17.9689),
+}
+
+_COORDINATES = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+def point(longitude: float, latitude: float) -> dict:
+    """GeoJSON point."""
+    return {"type": "Point", "coordinates": [longitude, latitude]}
+
+def geocode(place: str) -> Optional[dict]:
+    """GeoJSON point for a place name or a "lat, lng" string; None when unknown.
+
+    Names are matched case-insensitively, first in full and then by their
+    first comma-separated part, so "Ludhiana, Punjab" resolves to Ludhiana.
+    """
+    match = _COORDINATES.match(place)
+    if match:
+        latitude, longitude = float(match.group(1)), float(match.group(2))
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            return point(longitude, latitude)
+        return None
+
+    name = " ".join(place.lower().split())
+    coordinates = PLACES.get(name) or PLACES.get(name.split(",")[0].strip())
+    return point(*coordinates) if coordinates else None
+
+def bbox_polygon(min_lng: float, min_lat: float, max_lng: float, max_lat: float) -> dict:
+    """GeoJSON polygon for a longitude/latitude box."""
+    return {
+        "type": "Polygon",
+        "coordinates": [[
+            [min_lng, min_lat], [max_lng, min_lat], [max_lng, max_lat], [min_lng, max_lat], [min_lng, min_lat]
+        ]]
+    }
@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+from app.database import get_collection
+import os
+import socket
+import uuid
+
+# Identifies this process as a lease holder so it can renew its own leases
+OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+async def acquire_lease(lease_id: str, seconds: float) -> bool:
+    """Take a named lease for seconds so only one process runs a periodic job.
+
+    The lease is a document in ``locks``; whoever updates it after it has
+    expired holds it, and everyone else hits the unique _id and gets False.
+    """
+    locks_collection = get_collection("locks")
+    now = datetime.utcnow()
+    try:
+        await locks_collection.update_one(
+            {"_id": lease_id, "locked_until": {"$lt": now}},
+            {"$set": {"locked_until": now + timedelta(seconds=seconds), "owner": OWNER}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+async def renew_lease(lease_id: str, seconds: float) -> bool:
+    """Extend a lease this process holds to seconds from now; False if it was lost."""
+    locks_collection = get_collection("locks")
+    now = datetime.utcnow()
+    result = await locks_collection.update_one(
+        {"_id": lease_id, "owner": OWNER},
+        {"$set": {"locked_until": now + timedelta(seconds=seconds)}}
+    )
+    return result.matched_count == 1
@@ -6,7 +6,20 @@ import logging
 
 from app.config import settings
 from app.database import connect_to_mongo, close_mongo_connection
+from app.rate_limit import RateLimitMiddleware, rate_limiter
 from app.api.v1 import auth, animals, marketplace, iot
+from app.auth.passwords import password_hasher
+from app.services.ingest_buffer import ingest_buffer
+from app.services.iot_alerts import alert_engine
+from app.services.iot_archive import run_retention
+from app.services.latest_readings import latest_readings
+from app.services.listing_read_model import listing_read_model
+from app.services.listing_views import listing_views
+from app.services.metrics_broadcast import metrics_broadcaster
+from app.services.ownership import ownership
+from app.services.token_revocations import token_revocations
+from app.services.user_cache import user_cache
+import asyncio
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,9 +30,31 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up Smart Animal Platform API...")
     await connect_to_mongo()
+    background_tasks = []
+    await token_revocations.refresh()
+    background_tasks.append(asyncio.create_task(token_revocations.run_refresh(settings.token_revocation_refresh_seconds)))
+    if settings.iot_stream_change_stream:
+        background_tasks.append(asyncio.create_task(metrics_broadcaster.follow_change_stream()))
+    if settings.iot_alerts_enabled:
+        await alert_engine.load_open_alerts()
+        background_tasks.append(asyncio.create_task(alert_engine.run_sweeper(settings.iot_alert_sweep_seconds)))
+    if settings.iot_retention_days > 0:
+        background_tasks.append(asyncio.create_task(run_retention(settings.iot_retention_sweep_seconds)))
+    if settings.listing_reconcile_seconds > 0:
+        background_tasks.append(asyncio.create_task(listing_read_model.run_reconciler(settings.listing_reconcile_seconds)))
+    listing_views.start()
+    if settings.iot_write_behind_enabled:
+        ingest_buffer.start()
     yield
     # Shutdown
     logger.info("Shutting down Smart Animal Platform API...")
+    if settings.iot_write_behind_enabled:
+        await ingest_buffer.stop()
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await listing_views.stop()
+    password_hasher.shutdown()
     await close_mongo_connection()
 
 # Create FastAPI app
@@ -32,6 +67,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Add rate limiting (before CORS, so 429 responses carry CORS headers too)
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -64,7 +102,20 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": "2024-01-20T10:00:00Z",
-        "service": "Smart Animal Platform API"
+        "service": "Smart Animal Platform API",
+        "caches": {
+            "iot_latest_readings": latest_readings.stats(),
+            "animal_ownership": ownership.stats(),
+            "users": user_cache.stats()
+        },
+        "iot_stream": metrics_broadcaster.stats(),
+        "iot_ingest_buffer": ingest_buffer.stats(),
+        "iot_alerts": alert_engine.stats(),
+        "password_hashing": password_hasher.stats(),
+        "token_revocations": token_revocations.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "listing_read_model": listing_read_model.stats(),
+        "listing_views": listing_views.stats()
     }
 
 @app.exception_handler(HTTPException)
@@ -72,7 +123,8 @@ async def http_exception_handler(request, exc):
     """Global HTTP exception handler."""
     return JSONResponse(
         status_code=exc.status_code,
-        content={"detail": exc.detail}
+        content={"detail": exc.detail},
+        headers=exc.headers
     )
 
 @app.exception_handler(Exception)
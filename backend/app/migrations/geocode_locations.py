@@ -0,0 +1,77 @@
+"""
+Backfill location_geo on animals and listings stored before it existed.
+
+Each document's location text is geocoded with the offline place table;
+documents whose location is not recognised are left without a point and
+do not appear in nearby searches until their location is edited. Listings
+fall back to their animal's point. The species copied onto listings is
+backfilled by the listing reconciler.
+
+Usage:
+    python -m app.migrations.geocode_locations [--batch-size 1000]
+"""
+
+import argparse
+import asyncio
+import logging
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.geocoding import geocode
+
+logger = logging.getLogger(__name__)
+
+async def backfill(collection, batch_size: int, fallback=None) -> tuple:
+    """Set location_geo where missing; returns (updated, unresolved)."""
+    updated = 0
+    unresolved = 0
+    operations = []
+    cursor = collection.find({"location_geo": None}, {"location": 1, "animal_id": 1}).batch_size(batch_size)
+    async for document in cursor:
+        location_geo = geocode(document.get("location") or "")
+        if location_geo is None and fallback is not None:
+            location_geo = await fallback(document)
+        if location_geo is None:
+            unresolved += 1
+            continue
+        operations.append(UpdateOne({"_id": document["_id"]}, {"$set": {"location_geo": location_geo}}))
+        if len(operations) >= batch_size:
+            await collection.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+        updated += len(operations)
+    return updated, unresolved
+
+async def migrate(database, batch_size: int):
+    """Backfill animals first so listings can fall back to them."""
+    async def animal_point(listing):
+        if not ObjectId.is_valid(listing.get("animal_id", "")):
+            return None
+        animal = await database.animals.find_one({"_id": ObjectId(listing["animal_id"])}, {"location_geo": 1})
+        return animal.get("location_geo") if animal else None
+
+    for name, fallback in (("animals", None), ("listings", animal_point)):
+        updated, unresolved = await backfill(database[name], batch_size, fallback)
+        logger.info(f"{name}: set location_geo on {updated}, {unresolved} locations not recognised")
+
+async def main():
+    """Run the backfill against the configured database."""
+    parser = argparse.ArgumentParser(description="Backfill GeoJSON points from location text")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Updates per bulk write")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.mongodb_url)
+    try:
+        await migrate(client[settings.mongodb_db], args.batch_size)
+        logger.info("Location backfill finished")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+"""
+Rebuild IoT rollups (minute/hour/day) from the raw iot_metrics readings.
+
+Rollups are maintained incrementally on ingest; run this once to backfill
+readings stored before rollups existed, or to repair drift. Buckets are
+recomputed from scratch and replaced, so pause ingest or expect the few
+buckets being written to during the rebuild to be re-run.
+
+Usage:
+    python -m app.migrations.iot_rollups [--since 2024-01-01] [--resolution hour]
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.config import settings
+from app.models.iot import MetricsResolution
+from app.services.iot_rollups import ROLLUP_COLLECTION, ROLLUP_INTERVALS, rebuild_pipeline
+
+logger = logging.getLogger(__name__)
+
+async def rebuild(database, resolutions, since=None):
+    """Recompute the given rollup tiers from raw readings."""
+    await database[ROLLUP_COLLECTION].create_index(
+        [("animal_id", 1), ("resolution", 1), ("bucket", -1)],
+        unique=True
+    )
+
+    for resolution in resolutions:
+        logger.info(f"Rebuilding {resolution.value} rollups")
+        await database.iot_metrics.aggregate(
+            rebuild_pipeline(resolution, since),
+            allowDiskUse=True
+        ).to_list(length=None)
+
+async def main():
+    """Run the rebuild against the configured database."""
+    parser = argparse.ArgumentParser(description="Rebuild IoT rollups from raw readings")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only rebuild buckets from this UTC time on")
+    parser.add_argument(
+        "--resolution",
+        choices=[resolution.value for resolution in ROLLUP_INTERVALS],
+        help="Only rebuild one tier"
+    )
+    args = parser.parse_args()
+
+    resolutions = [MetricsResolution(args.resolution)] if args.resolution else list(ROLLUP_INTERVALS)
+
+    client = AsyncIOMotorClient(settings.mongodb_url)
+    try:
+        await rebuild(client[settings.mongodb_db], resolutions, args.since)
+        logger.info("Rollup rebuild finished")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
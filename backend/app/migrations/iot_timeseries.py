@@ -0,0 +1,151 @@
+"""
+Convert a plain iot_metrics collection into a time-series collection.
+
+The plain collection is renamed to iot_metrics_legacy and iot_metrics is
+created straight away as a time-series collection (timestamp as timeField,
+animal_id as metaField); MongoDB cannot rename time-series collections, so
+it is never built elsewhere and moved into place. Stop ingest (API workers
+and gateway) first: the migration refuses to start while readings are
+still arriving, and fails rather than continue if a write recreated
+iot_metrics as a plain collection between the two steps. Once it has
+logged the new collection, ingest can be restarted while the legacy
+readings are copied over in batches. Progress is checkpointed in the
+migrations collection and the first batch of every run skips readings
+already copied, so an interrupted run resumes where it stopped without
+duplicating readings.
+
+Usage:
+    python -m app.migrations.iot_timeseries [--batch-size 5000] [--quiet-seconds 60] [--drop-legacy]
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.config import settings
+from app.database import get_collection_options, ensure_iot_timeseries_collection
+
+logger = logging.getLogger(__name__)
+
+LEGACY_COLLECTION = "iot_metrics_legacy"
+CHECKPOINT_ID = "iot_timeseries"
+
+async def swap_collections(database, quiet_seconds: int):
+    """Move a plain iot_metrics to the legacy name and create a time-series one in its place."""
+    options = await get_collection_options("iot_metrics", database)
+
+    if options is not None and "timeseries" not in options:
+        if await get_collection_options(LEGACY_COLLECTION, database) is not None:
+            raise RuntimeError(f"{LEGACY_COLLECTION} already exists; refusing to overwrite it")
+
+        newest = await database.iot_metrics.find_one({}, sort=[("timestamp", -1)])
+        if newest and isinstance(newest.get("timestamp"), datetime):
+            if newest["timestamp"] > datetime.utcnow() - timedelta(seconds=quiet_seconds):
+                raise RuntimeError(
+                    f"iot_metrics received readings in the last {quiet_seconds}s; "
+                    "stop the API workers and gateway before converting it"
+                )
+
+        await database.iot_metrics.rename(LEGACY_COLLECTION)
+        logger.info(f"Renamed plain iot_metrics to {LEGACY_COLLECTION}")
+
+    # Also completes a run interrupted right after the rename
+    await ensure_iot_timeseries_collection(database)
+    options = await get_collection_options("iot_metrics", database)
+    if "timeseries" not in options:
+        raise RuntimeError(
+            f"iot_metrics was recreated as a plain collection by a write after the rename; stop ingest, "
+            f"copy its readings into {LEGACY_COLLECTION}, drop it and run the migration again"
+        )
+    await database.iot_metrics.create_index([("animal_id", 1), ("timestamp", -1)])
+
+async def _already_copied(database, documents: list) -> set:
+    """_ids of documents already in iot_metrics; the timestamp bounds let buckets be skipped."""
+    timestamps = [doc["timestamp"] for doc in documents]
+    cursor = database.iot_metrics.find(
+        {
+            "_id": {"$in": [doc["_id"] for doc in documents]},
+            "timestamp": {"$gte": min(timestamps), "$lte": max(timestamps)}
+        },
+        {"_id": 1}
+    )
+    return {doc["_id"] async for doc in cursor}
+
+async def migrate(database, batch_size: int = 5000, drop_legacy: bool = False, quiet_seconds: int = 60) -> int:
+    """Copy legacy readings into the time-series collection and return how many were copied."""
+    await swap_collections(database, quiet_seconds)
+
+    if await get_collection_options(LEGACY_COLLECTION, database) is None:
+        logger.info("No legacy IoT metrics to migrate")
+        return 0
+
+    legacy_collection = database[LEGACY_COLLECTION]
+    checkpoint = await database.migrations.find_one({"_id": CHECKPOINT_ID})
+    last_id = checkpoint["last_id"] if checkpoint else None
+
+    copied = 0
+    skipped = 0
+    # The batch after the checkpoint may have been inserted before a crash
+    check_copied = True
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = await legacy_collection.find(query).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+
+        # Time-series collections reject documents without a date timeField
+        documents = [doc for doc in batch if isinstance(doc.get("timestamp"), datetime)]
+        skipped += len(batch) - len(documents)
+
+        if documents and check_copied:
+            existing = await _already_copied(database, documents)
+            documents = [doc for doc in documents if doc["_id"] not in existing]
+            check_copied = False
+
+        if documents:
+            await database.iot_metrics.insert_many(documents, ordered=False)
+
+        last_id = batch[-1]["_id"]
+        await database.migrations.update_one(
+            {"_id": CHECKPOINT_ID},
+            {"$set": {"last_id": last_id, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+
+        copied += len(documents)
+        logger.info(f"Copied {copied} readings (last _id {last_id})")
+
+    if skipped:
+        logger.warning(f"Skipped {skipped} readings without a valid timestamp")
+
+    if drop_legacy:
+        await legacy_collection.drop()
+        await database.migrations.delete_one({"_id": CHECKPOINT_ID})
+        logger.info(f"Dropped {LEGACY_COLLECTION}")
+
+    return copied
+
+async def main():
+    """Run the migration against the configured database."""
+    parser = argparse.ArgumentParser(description="Convert iot_metrics into a time-series collection")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Readings copied per batch")
+    parser.add_argument(
+        "--quiet-seconds", type=int, default=60,
+        help="Refuse to start if a reading arrived this recently"
+    )
+    parser.add_argument("--drop-legacy", action="store_true", help=f"Drop {LEGACY_COLLECTION} when done")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.mongodb_url)
+    try:
+        copied = await migrate(client[settings.mongodb_db], args.batch_size, args.drop_legacy, args.quiet_seconds)
+        logger.info(f"Migration finished: {copied} readings copied")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
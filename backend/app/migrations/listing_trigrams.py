@@ -0,0 +1,58 @@
+"""
+Backfill search_trigrams on listings stored before typo-tolerant search.
+
+The text index covers existing listings as soon as it is built; the
+trigrams used when a query matches no words are only written on create
+and title updates, so run this once for older listings.
+
+Usage:
+    python -m app.migrations.listing_trigrams [--batch-size 1000]
+"""
+
+import argparse
+import asyncio
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.search import text_trigrams
+
+logger = logging.getLogger(__name__)
+
+async def backfill(database, batch_size: int) -> int:
+    """Set search_trigrams where missing; returns the number of listings updated."""
+    updated = 0
+    operations = []
+    cursor = database.listings.find({"search_trigrams": None}, {"title": 1}).batch_size(batch_size)
+    async for listing in cursor:
+        operations.append(UpdateOne(
+            {"_id": listing["_id"]},
+            {"$set": {"search_trigrams": text_trigrams(listing.get("title") or "")}}
+        ))
+        if len(operations) >= batch_size:
+            await database.listings.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await database.listings.bulk_write(operations, ordered=False)
+        updated += len(operations)
+    return updated
+
+async def main():
+    """Run the backfill against the configured database."""
+    parser = argparse.ArgumentParser(description="Backfill title trigrams for typo-tolerant search")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Updates per bulk write")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.mongodb_url)
+    try:
+        updated = await backfill(client[settings.mongodb_db], args.batch_size)
+        logger.info(f"Set search_trigrams on {updated} listings")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
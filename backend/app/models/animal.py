@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -41,7 +41,7 @@ class AnimalInDB(AnimalBase):
     updated_at: datetime
 
 class AnimalResponse(AnimalBase):
-    id: str
+    id: str = Field(validation_alias=AliasChoices("id", "_id"))
     owner_id: str
     photos: List[str]
     health_score: float
@@ -54,3 +54,4 @@ class AnimalListResponse(BaseModel):
     total: int
     page: int
     size: int
+    next_cursor: Optional[str] = None
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from pydantic import AliasChoices, BaseModel, Field
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from enum import Enum
 
@@ -23,6 +23,11 @@ class IoTMetricsBase(BaseModel):
     battery_level: float = Field(..., ge=0, le=100)  # Percentage
     signal_strength: SignalStrength
 
+# Numeric reading fields that are aggregated into rollups
+NUMERIC_METRIC_FIELDS = [
+    name for name, field in IoTMetricsBase.model_fields.items() if field.annotation is float
+]
+
 class IoTMetricsCreate(IoTMetricsBase):
     pass
 
@@ -42,7 +47,7 @@ class IoTMetricsInDB(IoTMetricsBase):
     additional_data: Dict[str, Any] = Field(default_factory=dict)
 
 class IoTMetricsResponse(IoTMetricsBase):
-    id: str
+    id: str = Field(validation_alias=AliasChoices("id", "_id"))
     timestamp: datetime
     location: Dict[str, float]
     additional_data: Dict[str, Any]
@@ -52,6 +57,105 @@ class IoTMetricsListResponse(BaseModel):
     total: int
     animal_id: str
     last_updated: datetime
+    next_cursor: Optional[str] = None
+
+class MetricsResolution(str, Enum):
+    RAW = "raw"
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
+    AUTO = "auto"
+
+class MetricsFormat(str, Enum):
+    JSON = "json"
+    NDJSON = "ndjson"
+    COLUMNAR = "columnar"
+
+class IoTMetricsColumnarResponse(BaseModel):
+    # One array per field; see app/services/iot_columnar.py for the encoding
+    format: str = "columnar"
+    count: int
+    total: int
+    animal_id: str
+    last_updated: datetime
+    next_cursor: Optional[str] = None
+    timestamp_encoding: str = "delta_ms"
+    columns: Dict[str, List[Any]]
+    dictionaries: Dict[str, List[Any]]
+    extras: List[Dict[str, Any]]
+
+class IoTMetricStats(BaseModel):
+    min: float
+    max: float
+    avg: float
+    count: int
+
+class IoTMetricsRollup(BaseModel):
+    bucket: datetime
+    count: int
+    stats: Dict[str, IoTMetricStats]
+
+class IoTMetricsRollupListResponse(BaseModel):
+    rollups: List[IoTMetricsRollup]
+    resolution: MetricsResolution
+    total: int
+    animal_id: str
+    last_updated: datetime
+
+class IoTFieldStats(BaseModel):
+    count: int
+    mean: float
+    std: float
+    min: float
+    max: float
+    percentiles: Dict[str, float]  # p5, p25, p50, p75, p95
+    slope_per_hour: Optional[float] = None  # Least-squares trend
+    time_in_range: Optional[float] = None  # Share of readings in the normal range
+
+class IoTAnimalStats(BaseModel):
+    animal_id: str
+    count: int
+    first_timestamp: Optional[datetime] = None
+    last_timestamp: Optional[datetime] = None
+    fields: Dict[str, IoTFieldStats]
+
+class IoTMetricsStatsResponse(IoTAnimalStats):
+    start: datetime
+    end: datetime
+
+class FleetStatsResponse(BaseModel):
+    animals: List[IoTAnimalStats]
+    herd: Dict[str, IoTFieldStats]  # All readings of the selected animals pooled
+    total_readings: int
+    start: datetime
+    end: datetime
+
+class IoTMetricsBatchCreate(BaseModel):
+    # Records are validated one by one so a bad reading only rejects itself
+    metrics: List[Dict[str, Any]] = Field(..., min_length=1)
+
+class IoTMetricsBatchResult(BaseModel):
+    index: int
+    accepted: bool
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class IoTMetricsBatchResponse(BaseModel):
+    accepted: int
+    rejected: int
+    results: List[IoTMetricsBatchResult]
+
+class FleetLatestEntry(BaseModel):
+    animal_id: str
+    last_seen: Optional[datetime] = None
+    is_stale: bool
+    metrics: Optional[Dict[str, Any]] = None
+
+class FleetLatestResponse(BaseModel):
+    animals: List[FleetLatestEntry]
+    total: int
+    stale: int
+    generated_at: datetime
 
 class IoTAlert(BaseModel):
     animal_id: str
@@ -60,3 +164,34 @@ class IoTAlert(BaseModel):
     severity: str  # low, medium, high, critical
     timestamp: datetime
     is_resolved: bool = False
+
+class IoTAlertResponse(IoTAlert):
+    id: str = Field(validation_alias=AliasChoices("id", "_id"))
+    value: Optional[float] = None
+    reading_id: Optional[str] = None
+    resolved_at: Optional[datetime] = None
+    resolved_by: Optional[str] = None
+
+class IoTAlertListResponse(BaseModel):
+    alerts: List[IoTAlertResponse]
+    total: int
+    next_cursor: Optional[str] = None
+
+class IoTDeviceCreate(BaseModel):
+    animal_id: str
+    name: Optional[str] = Field(None, max_length=100)
+
+class IoTDeviceResponse(BaseModel):
+    id: str = Field(validation_alias=AliasChoices("id", "_id"))
+    animal_id: str
+    name: Optional[str] = None
+    created_at: datetime
+    last_seen: Optional[datetime] = None
+
+class IoTDeviceCreatedResponse(IoTDeviceResponse):
+    # Returned once at registration; only a hash of the key is stored
+    key: str
+
+class IoTDeviceListResponse(BaseModel):
+    devices: List[IoTDeviceResponse]
+    total: int
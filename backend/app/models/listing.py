@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -9,6 +9,10 @@ class ListingStatus(str, Enum):
     EXPIRED = "expired"
     CANCELLED = "cancelled"
 
+class ListingSort(str, Enum):
+    RELEVANCE = "relevance"
+    NEWEST = "newest"
+
 class ListingBase(BaseModel):
     animal_id: str
     title: str = Field(..., min_length=1, max_length=200)
@@ -18,12 +22,17 @@ class ListingBase(BaseModel):
 
 class ListingCreate(ListingBase):
     seller_id: str
+    # Exact position; when omitted, location is geocoded
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
 
 class ListingUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=1, max_length=200)
     description: Optional[str] = Field(None, min_length=10, max_length=1000)
     price: Optional[float] = Field(None, gt=0)
     location: Optional[str] = Field(None, min_length=1)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     status: Optional[ListingStatus] = None
 
 class ListingInDB(ListingBase):
@@ -36,7 +45,7 @@ class ListingInDB(ListingBase):
     updated_at: datetime
 
 class ListingResponse(ListingBase):
-    id: str
+    id: str = Field(validation_alias=AliasChoices("id", "_id"))
     seller_id: str
     status: ListingStatus
     views: int
@@ -46,12 +55,18 @@ class ListingResponse(ListingBase):
     seller_name: Optional[str] = None
     animal_name: Optional[str] = None
     animal_health_score: Optional[float] = None
+    species: Optional[str] = None
+    # Set by location searches
+    distance_km: Optional[float] = None
+    # Set by text searches
+    relevance: Optional[float] = None
 
 class ListingListResponse(BaseModel):
     listings: List[ListingResponse]
     total: int
     page: int
     size: int
+    next_cursor: Optional[str] = None
 
 class ListingFilter(BaseModel):
     seller_id: Optional[str] = None
@@ -60,3 +75,4 @@ class ListingFilter(BaseModel):
     max_price: Optional[float] = None
     species: Optional[str] = None
     location: Optional[str] = None
+    q: Optional[str] = None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import AliasChoices, BaseModel, EmailStr, Field
 from typing import Optional
 from datetime import datetime
 from enum import Enum
@@ -30,6 +30,10 @@ class UserUpdate(BaseModel):
     location: Optional[str] = None
     kyc_status: Optional[KYCStatus] = None
 
+class AdminUserUpdate(UserUpdate):
+    role: Optional[UserRole] = None
+    is_active: Optional[bool] = None
+
 class UserInDB(UserBase):
     id: str = Field(alias="_id")
     hashed_password: str
@@ -41,7 +45,7 @@ class UserInDB(UserBase):
     is_active: bool = True
 
 class UserResponse(UserBase):
-    id: str
+    id: str = Field(validation_alias=AliasChoices("id", "_id"))
     kyc_status: KYCStatus
     rating: float
     total_transactions: int
@@ -60,3 +64,15 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     email: Optional[str] = None
     user_id: Optional[str] = None
+    token_version: int = 0
+    # Only present in tokens issued with JWT_CLAIMS_ENABLED
+    role: Optional[UserRole] = None
+    is_active: Optional[bool] = None
+    name: Optional[str] = None
+
+class TokenUser(BaseModel):
+    id: str
+    email: str
+    name: str
+    role: UserRole
+    is_active: bool = True
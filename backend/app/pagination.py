@@ -0,0 +1,42 @@
+from fastapi import HTTPException, status
+from typing import List, Optional, Tuple
+from bson import ObjectId
+from datetime import datetime
+import base64
+
+def encode_cursor(value: datetime, document_id) -> str:
+    """Encode a (sort value, _id) position as an opaque continuation token."""
+    raw = f"{value.isoformat()}|{document_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(token: str) -> Tuple[datetime, ObjectId]:
+    """Decode a continuation token produced by encode_cursor."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        value, document_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(value), ObjectId(document_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def keyset_filter(field: str, value: datetime, document_id: ObjectId) -> dict:
+    """Match documents that come after a position in (field desc, _id desc) order."""
+    return {
+        "$or": [
+            {field: {"$lt": value}},
+            {field: value, "_id": {"$lt": document_id}}
+        ]
+    }
+
+def split_page(documents: List[dict], size: int, field: str = "created_at") -> Tuple[List[dict], Optional[str]]:
+    """Trim a fetch of size + 1 documents to one page and build the token for the next.
+    
+    Call before converting ``_id`` to a string.
+    """
+    if len(documents) <= size:
+        return documents, None
+    documents = documents[:size]
+    last = documents[-1]
+    return documents, encode_cursor(last[field], last["_id"])
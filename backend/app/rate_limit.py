@@ -0,0 +1,257 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from pymongo import ReturnDocument
+from app.auth.jwt import verify_token
+from app.cache import TTLCache
+from app.config import settings
+from app.database import get_collection
+import json
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+class RateLimitPolicy(NamedTuple):
+    name: str
+    methods: Tuple[str, ...]
+    prefix: str
+    rate: float  # Tokens added per second
+    burst: int  # Bucket size
+    per_user: bool  # Key by token user ID when present, else always by client IP
+
+class MemoryBucketStore:
+    """Token buckets in a dict, for one worker.
+
+    Buckets are ``[tokens, last refill]`` lists updated in place. A bucket
+    that has refilled completely holds no information, so full buckets are
+    dropped every ``cleanup_interval`` seconds to keep memory proportional
+    to recently active clients.
+    """
+
+    name = "memory"
+
+    def __init__(self, cleanup_interval: float = 60.0):
+        self._buckets: Dict[str, list] = {}
+        self._rates: Dict[str, Tuple[float, int]] = {}
+        self.cleanup_interval = cleanup_interval
+        self._next_cleanup = time.monotonic() + cleanup_interval
+
+    def take_now(self, key: str, rate: float, burst: int) -> float:
+        """Take one token; returns 0 when allowed, else seconds until one is available."""
+        now = time.monotonic()
+        if now >= self._next_cleanup:
+            self.cleanup(now)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = [burst - 1.0, now]
+            self._rates[key] = (rate, burst)
+            return 0.0
+
+        tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / rate
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Async form of take_now, matching the shared store."""
+        return self.take_now(key, rate, burst)
+
+    def cleanup(self, now: Optional[float] = None):
+        """Drop buckets that have refilled completely."""
+        now = time.monotonic() if now is None else now
+        full = [
+            key for key, (tokens, last) in self._buckets.items()
+            if tokens + (now - last) * self._rates[key][0] >= self._rates[key][1]
+        ]
+        for key in full:
+            del self._buckets[key]
+            del self._rates[key]
+        self._next_cleanup = now + self.cleanup_interval
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+class MongoBucketStore:
+    """Token buckets shared by every worker through a MongoDB collection.
+
+    Each take is a single find_one_and_update with an aggregation pipeline,
+    so the refill, the check and the decrement happen atomically on the
+    server against its own clock. Idle buckets expire through a TTL index
+    on ``expires_at``. If MongoDB cannot be reached requests are allowed.
+    """
+
+    name = "mongo"
+
+    def __init__(self, collection_name: str = "rate_limits"):
+        self.collection_name = collection_name
+        self.errors = 0
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take one token; returns 0 when allowed, else seconds until one is available."""
+        # Long enough for any bucket to refill completely
+        idle_ms = int(burst / rate * 1000) + 60000
+        refilled = {
+            "$min": [
+                burst,
+                {"$add": [
+                    {"$ifNull": ["$tokens", burst]},
+                    {"$multiply": [
+                        {"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]},
+                        rate / 1000
+                    ]}
+                ]}
+            ]
+        }
+        try:
+            bucket = await get_collection(self.collection_name).find_one_and_update(
+                {"_id": key},
+                [
+                    {"$set": {"tokens": refilled, "updated_at": "$$NOW"}},
+                    {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                    {"$set": {
+                        "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                        "expires_at": {"$add": ["$$NOW", idle_ms]}
+                    }}
+                ],
+                projection={"tokens": 1, "allowed": 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Rate limit backend unavailable, allowing request: {e}")
+            return 0.0
+
+        if bucket["allowed"]:
+            return 0.0
+        return (1 - bucket["tokens"]) / rate
+
+    def __len__(self) -> int:
+        # Buckets live in MongoDB; none are held here
+        return 0
+
+def default_policies() -> List[RateLimitPolicy]:
+    """Policies from settings; the first matching policy applies to a request."""
+    return [
+        RateLimitPolicy(
+            "auth", ("POST",), "/api/v1/auth/",
+            settings.rate_limit_auth_per_second, settings.rate_limit_auth_burst, per_user=False
+        ),
+        RateLimitPolicy(
+            "iot_ingest", ("POST",), "/api/v1/iot/metrics",
+            settings.rate_limit_iot_per_second, settings.rate_limit_iot_burst, per_user=True
+        ),
+        RateLimitPolicy(
+            "marketplace_browse", ("GET",), "/api/v1/marketplace/",
+            settings.rate_limit_browse_per_second, settings.rate_limit_browse_burst, per_user=True
+        ),
+    ]
+
+def create_bucket_store():
+    """Bucket store selected by RATE_LIMIT_BACKEND."""
+    if settings.rate_limit_backend == "mongo":
+        return MongoBucketStore()
+    return MemoryBucketStore(settings.rate_limit_cleanup_seconds)
+
+class RateLimiter:
+    """Applies token-bucket policies to requests by method and path prefix.
+
+    Authenticated requests are keyed by the user ID in their bearer token
+    (the signature is checked, so a forged token cannot drain someone
+    else's bucket); everything else by client IP. The first matching policy
+    applies; requests matching none are not limited.
+    """
+
+    def __init__(self, policies: List[RateLimitPolicy], store):
+        self.policies = policies
+        self.store = store
+        self.allowed = 0
+        self.limited: Dict[str, int] = {policy.name: 0 for policy in policies}
+        # Verified token -> user ID, so a client's repeated requests skip the signature check;
+        # only used to pick a bucket, the handlers still validate the token themselves
+        self._token_users = TTLCache(max_size=10000, ttl=60)
+
+    async def check(self, scope) -> float:
+        """0 when the request may proceed, else seconds the client should wait."""
+        policy = self._match(scope["method"], scope["path"])
+        if policy is None:
+            return 0.0
+
+        key = f"{policy.name}:{self._client_key(scope, policy)}"
+        retry_after = await self.store.take(key, policy.rate, policy.burst)
+        if retry_after == 0:
+            self.allowed += 1
+        else:
+            self.limited[policy.name] += 1
+        return retry_after
+
+    def _match(self, method: str, path: str) -> Optional[RateLimitPolicy]:
+        for policy in self.policies:
+            if method in policy.methods and path.startswith(policy.prefix):
+                return policy
+        return None
+
+    def _client_key(self, scope, policy: RateLimitPolicy) -> str:
+        if policy.per_user:
+            for name, value in scope["headers"]:
+                if name == b"authorization":
+                    scheme, _, token = value.decode("latin-1").partition(" ")
+                    if scheme.lower() == "bearer":
+                        user_id = self._token_users.get(token)
+                        if user_id is None:
+                            token_data = verify_token(token)
+                            if token_data is not None:
+                                user_id = token_data.user_id
+                                self._token_users.set(token, user_id)
+                        if user_id is not None:
+                            return f"user:{user_id}"
+                    break
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    def stats(self) -> dict:
+        """Backend, live buckets and decision counters."""
+        return {
+            "backend": self.store.name,
+            "buckets": len(self.store),
+            "allowed": self.allowed,
+            "limited": dict(self.limited),
+        }
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware in front of the routers.
+
+    Limited requests get a 429 with ``Retry-After`` before any dependency,
+    handler or database work runs.
+    """
+
+    def __init__(self, app, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and settings.rate_limit_enabled:
+            retry_after = await self.limiter.check(scope)
+            if retry_after:
+                await self._reject(send, retry_after)
+                return
+        await self.app(scope, receive, send)
+
+    async def _reject(self, send, retry_after: float):
+        body = json.dumps({"detail": "Rate limit exceeded, retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+rate_limiter = RateLimiter(default_policies(), create_bucket_store())
@@ -0,0 +1,32 @@
+from typing import List, Sequence
+import re
+
+_WORDS = re.compile(r"\w+")
+
+def text_trigrams(text: str) -> List[str]:
+    """Sorted distinct trigrams of the words in text, for typo-tolerant matching.
+
+    Words are lowercased and padded with a space on each side, so
+    "Holstein" gives " ho", "hol", ..., "in ". A misspelling shares most
+    trigrams with the intended word; "holstien" shares half of them.
+    """
+    trigrams = set()
+    for word in _WORDS.findall(text.lower()):
+        padded = f" {word} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return sorted(trigrams)
+
+def prefilter_trigrams(trigrams: Sequence[str], frequencies: Sequence[int], min_similarity: float) -> List[str]:
+    """The rarest trigrams of which every similar enough title contains at least one.
+
+    A title matching min_similarity shares at least ``needed`` of the n
+    query trigrams, so it misses at most n - needed of them and must hold
+    one of any n - needed + 1. Picking the rarest keeps an $in on them
+    selective without losing matches. frequencies[i] is how many listings
+    hold trigrams[i].
+    """
+    count = len(trigrams)
+    # Same division as the relevance computed by the search pipeline
+    needed = next((k for k in range(1, count + 1) if k / count >= min_similarity), count)
+    by_rarity = [trigram for _, trigram in sorted(zip(frequencies, trigrams))]
+    return by_rarity[:count - needed + 1]
@@ -0,0 +1,137 @@
+from collections import deque
+from typing import List, Optional
+from app.config import settings
+from app.services.iot_ingest import insert_metrics
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class IngestBuffer:
+    """Write-behind queue that group-commits IoT readings.
+
+    Handlers enqueue validated documents (with their ``_id`` already set) and
+    answer right away; one flusher writes them with insert_many once
+    ``batch_size`` readings are waiting or the oldest has waited
+    ``flush_interval`` seconds. The queue is bounded, so when MongoDB falls
+    behind offers fail and callers push back on devices instead of growing
+    memory. Failed writes are retried with backoff without losing readings.
+    """
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.enqueued = 0
+        self.flushed = 0
+        self.batches = 0
+        self.rejected = 0
+        self.refused = 0
+        self.failures = 0
+        self.max_depth = 0
+
+    def offer(self, documents: List[dict]) -> bool:
+        """Queue documents for writing; False when they do not all fit."""
+        if self.closed or len(self._pending) + len(documents) > self.max_size:
+            self.refused += len(documents)
+            return False
+
+        self._pending.extend(documents)
+        self.enqueued += len(documents)
+        self.max_depth = max(self.max_depth, len(self._pending))
+        self._wakeup.set()
+        if len(self._pending) >= self.batch_size:
+            self._full.set()
+        return True
+
+    def start(self) -> asyncio.Task:
+        """Start the background flusher."""
+        self.closed = False
+        self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def stop(self, timeout: float = 30.0):
+        """Stop accepting readings and flush everything still queued."""
+        self.closed = True
+        self._wakeup.set()
+        self._full.set()
+        if self._task is None:
+            return
+
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Ingest buffer drain timed out; {len(self._pending)} readings were not written")
+        self._task = None
+
+    def stats(self) -> dict:
+        """Queue depth and flush counters."""
+        return {
+            "depth": len(self._pending),
+            "max_depth": self.max_depth,
+            "capacity": self.max_size,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "avg_batch": round(self.flushed / self.batches, 1) if self.batches else 0,
+            "rejected": self.rejected,
+            "refused": self.refused,
+            "failures": self.failures,
+        }
+
+    async def _run(self):
+        while self._pending or not self.closed:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            # Group commit: wait for a full batch, at most flush_interval
+            if len(self._pending) < self.batch_size and not self.closed:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+            await self._flush()
+
+    async def _flush(self):
+        """Write the oldest batch, retrying it until MongoDB accepts it.
+
+        While a batch is retried the queue keeps filling, so a stalled
+        database turns into 429s at the API rather than lost readings.
+        Once draining for shutdown, a batch is given up after three tries.
+        """
+        count = min(self.batch_size, len(self._pending))
+        batch = [self._pending.popleft() for _ in range(count)]
+
+        attempt = 0
+        while True:
+            try:
+                write_errors = await insert_metrics(batch)
+                break
+            except Exception as e:
+                self.failures += 1
+                attempt += 1
+                if self.closed and attempt >= 3:
+                    logger.error(f"Dropping {len(batch)} IoT readings after repeated write failures: {e}")
+                    return
+                delay = min(0.1 * 2 ** attempt, 5.0)
+                logger.warning(f"IoT write-behind flush failed, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+        self.batches += 1
+        self.flushed += len(batch) - len(write_errors)
+        self.rejected += len(write_errors)
+
+ingest_buffer = IngestBuffer(
+    max_size=settings.iot_write_behind_max_queue,
+    batch_size=settings.iot_write_behind_batch_size,
+    flush_interval=settings.iot_write_behind_flush_ms / 1000
+)
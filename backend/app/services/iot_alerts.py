@@ -0,0 +1,361 @@
+from array import array
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.config import settings
+from app.database import get_collection
+from app.leases import acquire_lease
+import asyncio
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+ALERT_COLLECTION = "alerts"
+LAST_SEEN_COLLECTION = "iot_last_seen"
+MISSING_DATA = "data_missing"
+SWEEP_LEASE_ID = "iot_alert_sweep"
+DUPLICATE_KEY_ERROR = 11000
+EPOCH = datetime(1970, 1, 1)
+
+class ThresholdRule:
+    """Alert while a field is beyond a limit.
+
+    The alert opens past ``trigger`` and resolves only once the value is back
+    past ``clear``; readings in between (the hysteresis band) change nothing.
+    """
+    __slots__ = ("alert_type", "field", "above", "trigger", "clear", "severity")
+
+    def __init__(self, alert_type: str, field: str, above: bool, trigger: float, clear: float, severity: str):
+        self.alert_type = alert_type
+        self.field = field
+        self.above = above
+        self.trigger = trigger
+        self.clear = clear
+        self.severity = severity
+
+    def check(self, document: dict, state: "_AnimalState", slot: int) -> Optional[bool]:
+        """True when the alert condition holds, False when it has cleared, None in the band."""
+        value = document[self.field]
+        if self.above:
+            return True if value > self.trigger else False if value < self.clear else None
+        return True if value < self.trigger else False if value > self.clear else None
+
+    def message(self, document: dict) -> str:
+        label = self.field.replace("_", " ").capitalize()
+        direction = "above" if self.above else "below"
+        return f"{label} {document[self.field]:g} {direction} {self.trigger:g}"
+
+class RateOfChangeRule:
+    """Alert when a field changes too fast.
+
+    The change is measured against an anchor reading at least ``window_minutes``
+    old and scaled to the window, so sensor noise between frequent readings
+    does not register as a spike. Only the anchor is kept per animal.
+    """
+    __slots__ = ("alert_type", "field", "window_seconds", "max_change", "clear_change", "severity")
+
+    def __init__(
+        self, alert_type: str, field: str, window_minutes: float,
+        max_change: float, clear_change: float, severity: str
+    ):
+        self.alert_type = alert_type
+        self.field = field
+        self.window_seconds = window_minutes * 60
+        self.max_change = max_change
+        self.clear_change = clear_change
+        self.severity = severity
+
+    def check(self, document: dict, state: "_AnimalState", slot: int) -> Optional[bool]:
+        """Compare against the anchor once a full window has passed."""
+        value = document[self.field]
+        seconds = (document["timestamp"] - EPOCH).total_seconds()
+        elapsed = seconds - state.anchor_times[slot]
+
+        if math.isnan(elapsed) or elapsed < 0 or elapsed > 3 * self.window_seconds:
+            # No usable anchor (first reading, out of order or a long gap)
+            state.anchor_values[slot] = value
+            state.anchor_times[slot] = seconds
+            return None
+        if elapsed < self.window_seconds:
+            return None
+
+        change = abs(value - state.anchor_values[slot]) * self.window_seconds / elapsed
+        state.anchor_values[slot] = value
+        state.anchor_times[slot] = seconds
+        return True if change > self.max_change else False if change < self.clear_change else None
+
+    def message(self, document: dict) -> str:
+        label = self.field.replace("_", " ").capitalize()
+        return f"{label} changed by more than {self.max_change:g} within {self.window_seconds / 60:g} minutes"
+
+DEFAULT_RULES = [
+    ThresholdRule("temperature_high", "temperature", above=True, trigger=40.0, clear=39.5, severity="high"),
+    ThresholdRule("temperature_low", "temperature", above=False, trigger=37.0, clear=37.5, severity="high"),
+    ThresholdRule("battery_low", "battery_level", above=False, trigger=20.0, clear=25.0, severity="low"),
+    ThresholdRule("water_low", "water_level", above=False, trigger=20.0, clear=30.0, severity="medium"),
+    ThresholdRule("activity_low", "activity_level", above=False, trigger=5.0, clear=10.0, severity="medium"),
+    RateOfChangeRule(
+        "temperature_spike", "temperature", window_minutes=10, max_change=1.0, clear_change=0.5, severity="high"
+    ),
+]
+
+class _AnimalState:
+    """Per-animal rule state: one bit per open alert plus debounce counters."""
+    __slots__ = ("active", "counts", "anchor_values", "anchor_times")
+
+    def __init__(self, rule_count: int):
+        self.active = 0
+        self.counts = array("H", bytes(2 * rule_count))
+        self.anchor_values = array("d", [math.nan]) * rule_count
+        self.anchor_times = array("d", [math.nan]) * rule_count
+
+class AlertEngine:
+    """Evaluate alert rules against readings as they are ingested.
+
+    Each reading costs one pass over the rules with O(1) work per rule, and
+    the alerts a batch opens or resolves are written with a single
+    bulk_write. An alert needs ``debounce`` readings past its trigger (or
+    clear level) without one on the other side in between, which together
+    with the hysteresis band keeps values hovering at a threshold from
+    producing alert storms.
+
+    Missing data is not tracked per process: every ingest batch records
+    each animal's newest reading time in iot_last_seen, and the sweep reads
+    that and the open data_missing alerts from MongoDB, so it sees readings
+    from every worker and the gateway, and runs in one process at a time
+    under a lease.
+    """
+
+    def __init__(self, rules: list, debounce: int, missing_minutes: int, lookback_hours: int):
+        self.rules = rules
+        self.debounce = max(1, debounce)
+        self.missing_seconds = missing_minutes * 60
+        self.lookback_seconds = lookback_hours * 3600
+        self._bits = {rule.alert_type: 1 << index for index, rule in enumerate(rules)}
+        self._states: Dict[str, _AnimalState] = {}
+        self.opened = 0
+        self.resolved = 0
+
+    def evaluate(self, documents: List[dict]) -> list:
+        """Run the rules over stored readings and return the alert writes they cause."""
+        operations = []
+        rule_count = len(self.rules)
+
+        for document in documents:
+            animal_id = document["animal_id"]
+            state = self._states.get(animal_id)
+            if state is None:
+                state = self._states[animal_id] = _AnimalState(rule_count)
+
+            counts = state.counts
+            for slot, rule in enumerate(self.rules):
+                condition = rule.check(document, state, slot)
+                if condition is None:
+                    continue  # no evidence either way
+
+                bit = 1 << slot
+                if condition == bool(state.active & bit):
+                    counts[slot] = 0
+                    continue
+
+                counts[slot] += 1
+                if counts[slot] < self.debounce:
+                    continue
+
+                counts[slot] = 0
+                if condition:
+                    state.active |= bit
+                    operations.append(self._open(
+                        animal_id, rule.alert_type, rule.severity, rule.message(document),
+                        document["timestamp"], document[rule.field], document.get("_id")
+                    ))
+                else:
+                    state.active &= ~bit
+                    operations.append(self._resolve(animal_id, rule.alert_type))
+
+        return operations
+
+    async def process(self, documents: List[dict]):
+        """Evaluate stored readings, persist the resulting alert changes and record when animals reported."""
+        operations = self.evaluate(documents)
+        if operations:
+            await self._write(operations)
+        await self.touch(documents)
+
+    async def touch(self, documents: List[dict]):
+        """Raise the last_seen time of each animal in the batch to its newest reading."""
+        newest: Dict[str, datetime] = {}
+        for document in documents:
+            animal_id = document["animal_id"]
+            if animal_id not in newest or document["timestamp"] > newest[animal_id]:
+                newest[animal_id] = document["timestamp"]
+        if not newest:
+            return
+
+        operations = [
+            UpdateOne({"_id": animal_id}, {"$max": {"last_seen": timestamp}}, upsert=True)
+            for animal_id, timestamp in newest.items()
+        ]
+        last_seen_collection = get_collection(LAST_SEEN_COLLECTION)
+        try:
+            await last_seen_collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # Two processes upserted a new animal at once; the retry updates the winner's document
+            errors = e.details["writeErrors"]
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+                raise
+            await last_seen_collection.bulk_write([operations[error["index"]] for error in errors], ordered=False)
+
+    async def sweep(self, now: Optional[datetime] = None) -> int:
+        """Open and resolve data_missing alerts from iot_last_seen; returns the writes made.
+
+        An animal that reported within the lookback window but not within
+        the missing window gets an alert; an open alert is resolved once its
+        animal has a reading newer than the missing window. Animals silent
+        for longer than the lookback keep their open alert but are not
+        alerted on again. Both queries use the last_seen index, so a sweep
+        reads only the silent animals and those with an open alert.
+        """
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(seconds=self.missing_seconds)
+        since = now - timedelta(seconds=self.lookback_seconds)
+        last_seen_collection = get_collection(LAST_SEEN_COLLECTION)
+        cursor = get_collection(ALERT_COLLECTION).find(
+            {"alert_type": MISSING_DATA, "is_resolved": False}, {"animal_id": 1}
+        )
+        missing = {alert["animal_id"] async for alert in cursor}
+
+        operations = []
+        minutes = self.missing_seconds // 60
+        silent = last_seen_collection.find({"last_seen": {"$gte": since, "$lt": cutoff}}, {"_id": 1})
+        async for animal in silent:
+            if animal["_id"] not in missing:
+                operations.append(self._open(
+                    animal["_id"], MISSING_DATA, "medium", f"No readings for {minutes} minutes",
+                    now, None, None
+                ))
+
+        if missing:
+            reporting = last_seen_collection.find(
+                {"_id": {"$in": list(missing)}, "last_seen": {"$gte": cutoff}}, {"_id": 1}
+            )
+            async for animal in reporting:
+                operations.append(self._resolve(animal["_id"], MISSING_DATA))
+
+        if operations:
+            await self._write(operations)
+        return len(operations)
+
+    async def run_sweeper(self, interval_seconds: int):
+        """Reload open alerts and sweep for missing data periodically until cancelled.
+
+        Every process reloads; only one at a time sweeps, under a lease.
+        """
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.load_open_alerts()
+            except Exception as e:
+                logger.error(f"Error reloading open IoT alerts: {e}")
+            try:
+                if await acquire_lease(SWEEP_LEASE_ID, interval_seconds):
+                    await self.sweep()
+            except Exception as e:
+                logger.error(f"Error sweeping for missing IoT data: {e}")
+
+    async def load_open_alerts(self):
+        """Set the open state of the rule alerts to what the alerts collection holds.
+
+        Runs at startup and then before every sweep in each process, so an
+        alert resolved by hand through another worker, or opened by one, is
+        picked up here within one sweep interval. data_missing alerts need
+        no local state; the sweep reads them from the collection.
+        """
+        alerts_collection = get_collection(ALERT_COLLECTION)
+        cursor = alerts_collection.find({"is_resolved": False}, {"animal_id": 1, "alert_type": 1})
+
+        open_bits: Dict[str, int] = {}
+        async for alert in cursor:
+            bit = self._bits.get(alert["alert_type"])
+            if bit is not None:
+                open_bits[alert["animal_id"]] = open_bits.get(alert["animal_id"], 0) | bit
+
+        rule_count = len(self.rules)
+        for animal_id, state in self._states.items():
+            active = open_bits.pop(animal_id, 0)
+            changed = state.active ^ active
+            for slot in range(rule_count):
+                if changed >> slot & 1:
+                    state.counts[slot] = 0
+            state.active = active
+        for animal_id, active in open_bits.items():
+            state = self._states[animal_id] = _AnimalState(rule_count)
+            state.active = active
+
+    def forget(self, animal_id: str, alert_type: str):
+        """Clear the open state of an alert that was resolved by hand.
+
+        Only this process is updated right away; the others pick the change
+        up when they reload open alerts before their next sweep.
+        """
+        state = self._states.get(animal_id)
+        bit = self._bits.get(alert_type)
+        if state is None or bit is None:
+            return
+        state.active &= ~bit
+        state.counts[bit.bit_length() - 1] = 0
+
+    def stats(self) -> dict:
+        """Tracked animals and alert counters."""
+        return {
+            "animals": len(self._states),
+            "open": sum(bin(state.active).count("1") for state in self._states.values()),
+            "opened": self.opened,
+            "resolved": self.resolved,
+        }
+
+    def _open(
+        self, animal_id: str, alert_type: str, severity: str, message: str,
+        timestamp: datetime, value: Optional[float], reading_id
+    ) -> InsertOne:
+        self.opened += 1
+        return InsertOne({
+            "animal_id": animal_id,
+            "alert_type": alert_type,
+            "message": message,
+            "severity": severity,
+            "timestamp": timestamp,
+            "is_resolved": False,
+            "value": value,
+            "reading_id": str(reading_id) if reading_id is not None else None,
+        })
+
+    def _resolve(self, animal_id: str, alert_type: str) -> UpdateOne:
+        self.resolved += 1
+        return UpdateOne(
+            {"animal_id": animal_id, "alert_type": alert_type, "is_resolved": False},
+            {"$set": {"is_resolved": True, "resolved_at": datetime.utcnow()}}
+        )
+
+    async def _write(self, operations: list):
+        """Apply alert writes in order, skipping alerts another worker already opened."""
+        alerts_collection = get_collection(ALERT_COLLECTION)
+        start = 0
+        while start < len(operations):
+            try:
+                await alerts_collection.bulk_write(operations[start:], ordered=True)
+                return
+            except BulkWriteError as e:
+                error = e.details["writeErrors"][0]
+                if error.get("code") != DUPLICATE_KEY_ERROR:
+                    raise
+                start += error["index"] + 1
+
+alert_engine = AlertEngine(
+    rules=DEFAULT_RULES,
+    debounce=settings.iot_alert_debounce_readings,
+    missing_minutes=settings.iot_alert_missing_minutes,
+    lookback_hours=settings.iot_alert_missing_lookback_hours
+)
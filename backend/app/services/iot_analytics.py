@@ -0,0 +1,204 @@
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta
+from app.config import settings
+from app.database import get_collection
+from app.models.iot import NUMERIC_METRIC_FIELDS
+import numpy as np
+
+EPOCH = datetime(1970, 1, 1)
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Normal ranges for time-in-range; they mirror the alert clear levels
+NORMAL_RANGES = {
+    "temperature": (37.5, 39.5),
+    "activity_level": (10.0, 100.0),
+    "water_level": (30.0, 100.0),
+    "battery_level": (25.0, 100.0),
+}
+
+def _group_order(codes, keys) -> np.ndarray:
+    """Row order by (code, key), NaN keys last; two argsorts beat np.lexsort here."""
+    order = np.argsort(keys)
+    return order[np.argsort(codes[order], kind="stable")]
+
+class ReadingWindow:
+    """Readings of one or more animals loaded into NumPy arrays.
+
+    Rows are sorted by animal, then time. ``codes`` holds the index of each
+    row's animal in ``animal_ids``, ``hours`` the time since the window start
+    and ``values`` one column per field of NUMERIC_METRIC_FIELDS (NaN where a
+    reading lacks the field).
+    """
+    __slots__ = ("start", "animal_ids", "codes", "hours", "values")
+
+    def __init__(self, start: datetime, animal_ids: List[str], codes, hours, values):
+        order = _group_order(codes, hours)
+        self.start = start
+        self.animal_ids = animal_ids
+        self.codes = codes[order]
+        self.hours = hours[order]
+        self.values = values[order]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+async def load_window(animal_ids: List[str], start: datetime, end: datetime) -> ReadingWindow:
+    """Load the readings of a window from Mongo, one cursor batch at a time.
+
+    Raises ValueError when the window holds more than
+    IOT_ANALYTICS_MAX_READINGS readings.
+    """
+    iot_collection = get_collection("iot_metrics")
+    projection = {"_id": 0, "animal_id": 1, "timestamp": 1}
+    projection.update({field: 1 for field in NUMERIC_METRIC_FIELDS})
+
+    max_readings = settings.iot_analytics_max_readings
+    batch_size = settings.iot_stream_batch_size
+    cursor = iot_collection.find(
+        {"animal_id": {"$in": animal_ids}, "timestamp": {"$gte": start, "$lte": end}},
+        projection
+    ).batch_size(batch_size).limit(max_readings + 1)
+
+    animal_codes = {animal_id: code for code, animal_id in enumerate(animal_ids)}
+    origin = (start - EPOCH).total_seconds()
+    nan = float("nan")
+    codes, hours, values = [], [], []
+    loaded = 0
+
+    while True:
+        batch = await cursor.to_list(length=batch_size)
+        if not batch:
+            break
+
+        loaded += len(batch)
+        if loaded > max_readings:
+            raise ValueError(f"Window holds more than {max_readings} readings; use a shorter window")
+
+        codes.append(np.fromiter((animal_codes[reading["animal_id"]] for reading in batch), np.int32, len(batch)))
+        hours.append(np.fromiter(
+            ((reading["timestamp"] - EPOCH).total_seconds() - origin for reading in batch), np.float64, len(batch)
+        ) / 3600)
+        values.append(np.array(
+            [[reading.get(field, nan) for field in NUMERIC_METRIC_FIELDS] for reading in batch],
+            dtype=np.float64
+        ))
+
+    if not codes:
+        return ReadingWindow(
+            start, animal_ids, np.empty(0, np.int32), np.empty(0), np.empty((0, len(NUMERIC_METRIC_FIELDS)))
+        )
+
+    return ReadingWindow(start, animal_ids, np.concatenate(codes), np.concatenate(hours), np.concatenate(values))
+
+def _group_percentiles(values, codes, starts, valid_counts) -> np.ndarray:
+    """Linearly interpolated percentiles of every group, shape (groups, len(PERCENTILES)).
+
+    Sorting by (group, value) puts each group's values in order with NaNs
+    last, so every percentile is two gathers and an interpolation.
+    """
+    ordered = values[_group_order(codes, values)]
+    results = np.full((len(starts), len(PERCENTILES)), np.nan)
+    has_values = valid_counts > 0
+    last = starts + np.maximum(valid_counts - 1, 0)
+
+    for rank, percentile in enumerate(PERCENTILES):
+        position = starts + (percentile / 100) * np.maximum(valid_counts - 1, 0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, last)
+        fraction = position - lower
+        interpolated = ordered[lower] + (ordered[upper] - ordered[lower]) * fraction
+        results[:, rank] = np.where(has_values, interpolated, np.nan)
+
+    return results
+
+def _none_if_nan(value) -> Optional[float]:
+    value = float(value)
+    return None if np.isnan(value) else value
+
+def summarize(window: ReadingWindow, pooled: bool = False) -> List[dict]:
+    """Compute per-field statistics for every animal in the window in one pass.
+
+    With pooled, all readings are treated as a single group instead.
+    """
+    if not len(window):
+        return []
+
+    codes = np.zeros(len(window), np.int32) if pooled else window.codes
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    sizes = np.diff(np.r_[starts, len(codes)])
+    hours = window.hours
+
+    if pooled:
+        spans = [(hours.min(), hours.max())]
+    else:
+        # Rows are time-ordered within each animal
+        spans = [(hours[start], hours[start + size - 1]) for start, size in zip(starts, sizes)]
+
+    groups = [
+        {
+            "count": int(size),
+            "first_timestamp": window.start + timedelta(hours=float(first)),
+            "last_timestamp": window.start + timedelta(hours=float(last)),
+            "fields": {}
+        }
+        for size, (first, last) in zip(sizes, spans)
+    ]
+    if not pooled:
+        for group, start in zip(groups, starts):
+            group["animal_id"] = window.animal_ids[codes[start]]
+
+    for column, field in enumerate(NUMERIC_METRIC_FIELDS):
+        values = window.values[:, column]
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+
+        counts = np.add.reduceat(valid.astype(np.int64), starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.add.reduceat(filled, starts) / counts
+            deviations = np.where(valid, values - np.repeat(means, sizes), 0.0)
+            stds = np.sqrt(np.add.reduceat(deviations ** 2, starts) / counts)
+
+            # Least-squares slope of value over time, per hour
+            time_means = np.add.reduceat(np.where(valid, hours, 0.0), starts) / counts
+            time_deviations = np.where(valid, hours - np.repeat(time_means, sizes), 0.0)
+            slopes = (
+                np.add.reduceat(time_deviations * deviations, starts)
+                / np.add.reduceat(time_deviations ** 2, starts)
+            )
+
+        minimums = np.fmin.reduceat(values, starts)
+        maximums = np.fmax.reduceat(values, starts)
+        percentiles = _group_percentiles(values, codes, starts, counts)
+
+        in_range = None
+        if field in NORMAL_RANGES:
+            low, high = NORMAL_RANGES[field]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                inside = (valid & (values >= low) & (values <= high)).astype(np.int64)
+                in_range = np.add.reduceat(inside, starts) / counts
+
+        for index, group in enumerate(groups):
+            if not counts[index]:
+                continue
+            group["fields"][field] = {
+                "count": int(counts[index]),
+                "mean": float(means[index]),
+                "std": float(stds[index]),
+                "min": float(minimums[index]),
+                "max": float(maximums[index]),
+                "percentiles": {
+                    f"p{percentile}": float(percentiles[index, rank])
+                    for rank, percentile in enumerate(PERCENTILES)
+                },
+                "slope_per_hour": _none_if_nan(slopes[index]),
+                "time_in_range": _none_if_nan(in_range[index]) if in_range is not None else None
+            }
+
+    return groups
+
+async def window_stats(animal_ids: List[str], start: datetime, end: datetime) -> Tuple[List[dict], Optional[dict]]:
+    """Per-animal statistics plus the pooled statistics of all their readings."""
+    window = await load_window(animal_ids, start, end)
+    per_animal = summarize(window)
+    pooled = summarize(window, pooled=True)
+    return per_animal, pooled[0] if pooled else None
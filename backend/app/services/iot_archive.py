@@ -0,0 +1,239 @@
+from typing import AsyncIterator, List, Optional
+from datetime import datetime, timedelta
+from pathlib import Path
+from bson import ObjectId
+from app.config import settings
+from app.database import get_collection
+from app.leases import acquire_lease, renew_lease
+import asyncio
+import gzip
+import json
+import logging
+import os
+import uuid
+
+logger = logging.getLogger(__name__)
+
+LEASE_ID = "iot_retention"
+DELETE_CHUNK_SIZE = 5000
+
+def retention_cutoff(now: Optional[datetime] = None) -> Optional[datetime]:
+    """Start of the oldest UTC day kept in Mongo, or None when retention is off."""
+    if settings.iot_retention_days <= 0:
+        return None
+    now = now or datetime.utcnow()
+    return (now - timedelta(days=settings.iot_retention_days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+def archive_path(animal_id: str, day: datetime) -> Path:
+    """File holding one animal's archived readings of one UTC day."""
+    return Path(settings.iot_archive_dir) / animal_id / f"{day:%Y-%m-%d}.ndjson.gz"
+
+def _encode(reading: dict) -> str:
+    document = dict(reading)
+    document["_id"] = str(document["_id"])
+    document["timestamp"] = document["timestamp"].isoformat()
+    return json.dumps(document, default=str)
+
+def _decode(line: str) -> dict:
+    document = json.loads(line)
+    document["_id"] = ObjectId(document["_id"])
+    document["timestamp"] = datetime.fromisoformat(document["timestamp"])
+    return document
+
+def _read_file(path: Path) -> List[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [_decode(line) for line in f if line.strip()]
+
+def _write_day(animal_id: str, day: datetime, readings: List[dict]):
+    """Write (or merge into) an animal's archive for a day, atomically."""
+    path = archive_path(animal_id, day)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    merged = {reading["_id"]: reading for reading in (_read_file(path) if path.exists() else [])}
+    merged.update((reading["_id"], reading) for reading in readings)
+    ordered = sorted(merged.values(), key=lambda reading: (reading["timestamp"], reading["_id"]))
+
+    # Unique per writer, so a second process never writes into this file
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+    with gzip.open(temporary, "wt", encoding="utf-8") as f:
+        for reading in ordered:
+            f.write(_encode(reading) + "\n")
+    os.replace(temporary, path)
+
+def _position(reading: dict) -> tuple:
+    return (reading["timestamp"], reading["_id"])
+
+def _read_day(animal_id: str, day: datetime, start: datetime, end: datetime, before: Optional[tuple]) -> List[dict]:
+    """Archived readings of an animal on one day in [start, end) and before a position, newest first."""
+    path = archive_path(animal_id, day)
+    if not path.exists():
+        return []
+    readings = [
+        reading for reading in _read_file(path)
+        if start <= reading["timestamp"] < end and (before is None or _position(reading) < before)
+    ]
+    readings.sort(key=_position, reverse=True)
+    return readings
+
+def _days(start: datetime, end: datetime) -> List[datetime]:
+    """UTC days overlapping [start, end), newest first."""
+    days = []
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < end:
+        days.append(day)
+        day += timedelta(days=1)
+    days.reverse()
+    return days
+
+async def read_archived(
+    animal_id: str, start: datetime, end: datetime, before: Optional[tuple] = None
+) -> AsyncIterator[dict]:
+    """Yield archived readings of an animal in [start, end), newest first.
+
+    One day file is held in memory at a time and read in an executor, so
+    neither disk nor gzip blocks the event loop. With before, a
+    (timestamp, _id) position, only older readings are yielded.
+    """
+    loop = asyncio.get_running_loop()
+    for day in _days(start, end):
+        readings = await loop.run_in_executor(None, _read_day, animal_id, day, start, end, before)
+        for reading in readings:
+            yield reading
+
+async def count_merged(animal_id: str, start: datetime, end: datetime, cutoff: datetime) -> int:
+    """Readings of an animal in [start, end] across Mongo and the archive, each counted once.
+
+    Readings before cutoff are counted a day at a time: the archived ones
+    of that day plus any the sweep has archived but not deleted yet, so
+    only one day of _ids is held at once.
+    """
+    iot_collection = get_collection("iot_metrics")
+    loop = asyncio.get_running_loop()
+    total = await iot_collection.count_documents(
+        {"animal_id": animal_id, "timestamp": {"$gte": cutoff, "$lte": end}}
+    )
+
+    archive_end = min(end, cutoff)
+    for day in _days(start, archive_end):
+        day_start = max(start, day)
+        day_end = min(archive_end, day + timedelta(days=1))
+        archived = await loop.run_in_executor(None, _read_day, animal_id, day, day_start, day_end, None)
+        ids = {reading["_id"] for reading in archived}
+        expired = iot_collection.find(
+            {"animal_id": animal_id, "timestamp": {"$gte": day_start, "$lt": day_end}}, {"_id": 1}
+        )
+        ids.update([reading["_id"] async for reading in expired])
+        total += len(ids)
+    return total
+
+async def _next(readings: AsyncIterator[dict]) -> Optional[dict]:
+    try:
+        return await readings.__anext__()
+    except StopAsyncIteration:
+        return None
+
+async def merge_readings(cursor, archived: AsyncIterator[dict], limit: Optional[int]) -> AsyncIterator[dict]:
+    """Merge a (timestamp desc, _id desc) cursor with archived readings in the same order.
+
+    Readings archived but not yet deleted from Mongo are yielded once. With
+    a limit, at most limit + 1 readings are yielded, like a paginated cursor.
+    """
+    remaining = limit + 1 if limit is not None else -1
+    candidate = await _next(archived)
+
+    async for reading in cursor:
+        position = _position(reading)
+        while candidate is not None and _position(candidate) >= position:
+            if _position(candidate) != position:  # otherwise still in Mongo as well
+                yield candidate
+                remaining -= 1
+                if remaining == 0:
+                    return
+            candidate = await _next(archived)
+
+        yield reading
+        remaining -= 1
+        if remaining == 0:
+            return
+
+    while candidate is not None:
+        yield candidate
+        remaining -= 1
+        if remaining == 0:
+            return
+        candidate = await _next(archived)
+
+async def _archive_day(day: datetime) -> int:
+    """Archive and delete every reading of one UTC day, one animal at a time.
+
+    Each animal's day is read with an (animal_id, timestamp) range that the
+    iot_metrics indexes cover, and _write_day orders it, so no query needs
+    an in-memory sort over the whole day.
+    """
+    iot_collection = get_collection("iot_metrics")
+    loop = asyncio.get_running_loop()
+    day_range = {"$gte": day, "$lt": day + timedelta(days=1)}
+
+    archived = 0
+    for animal_id in await iot_collection.distinct("animal_id", {"timestamp": day_range}):
+        cursor = iot_collection.find(
+            {"animal_id": animal_id, "timestamp": day_range}
+        ).batch_size(settings.iot_stream_batch_size)
+        readings = [reading async for reading in cursor]
+        if not readings:
+            continue
+
+        await loop.run_in_executor(None, _write_day, animal_id, day, readings)
+        ids = [reading["_id"] for reading in readings]
+        for offset in range(0, len(ids), DELETE_CHUNK_SIZE):
+            await iot_collection.delete_many({"_id": {"$in": ids[offset:offset + DELETE_CHUNK_SIZE]}})
+        archived += len(readings)
+
+    return archived
+
+async def archive_expired(now: Optional[datetime] = None, lease_seconds: Optional[float] = None) -> int:
+    """Move readings older than the retention window from Mongo into the archive.
+
+    Whole UTC days are archived, oldest first. Files are merged on rewrite
+    and only archived _ids are deleted, so an interrupted sweep can simply
+    run again. With lease_seconds, the retention lease is renewed before
+    each day and the sweep stops if another process has taken it over.
+    """
+    cutoff = retention_cutoff(now)
+    if cutoff is None:
+        return 0
+
+    iot_collection = get_collection("iot_metrics")
+    oldest = await iot_collection.find_one({"timestamp": {"$lt": cutoff}}, sort=[("timestamp", 1)])
+    if not oldest:
+        return 0
+
+    archived = 0
+    day = oldest["timestamp"].replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < cutoff:
+        if lease_seconds is not None and not await renew_lease(LEASE_ID, lease_seconds):
+            logger.warning(f"Lost the {LEASE_ID} lease; stopping before {day:%Y-%m-%d}")
+            break
+        count = await _archive_day(day)
+        if count:
+            logger.info(f"Archived {count} IoT readings from {day:%Y-%m-%d}")
+        archived += count
+        day += timedelta(days=1)
+
+    return archived
+
+async def run_retention(interval_seconds: int):
+    """Archive expired readings periodically until cancelled.
+
+    A catch-up run can outlast the interval, so the lease is renewed for
+    another interval before every archived day.
+    """
+    while True:
+        try:
+            if await acquire_lease(LEASE_ID, interval_seconds):
+                await archive_expired(lease_seconds=interval_seconds)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error archiving expired IoT readings: {e}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,90 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+from app.models.iot import NUMERIC_METRIC_FIELDS, FeedingStatus, SignalStrength
+from app.pagination import encode_cursor
+
+EPOCH = datetime(1970, 1, 1)
+MILLISECOND = timedelta(milliseconds=1)
+
+def _encode(codes: Dict[Any, int], value) -> int:
+    """Dictionary-encode a value, adding it to the dictionary when new."""
+    code = codes.get(value)
+    if code is None:
+        code = codes[value] = len(codes)
+    return code
+
+async def collect_columnar(cursor, limit: Optional[int]) -> Tuple[dict, Optional[str]]:
+    """Build a column-per-field payload straight from a cursor of stored readings.
+
+    ``animal_id``, ``feeding_status`` and ``signal_strength`` hold indexes
+    into ``dictionaries``; ``timestamp`` holds epoch milliseconds of the first
+    reading followed by the difference to the previous reading. Readings
+    with a location or additional_data list them in ``extras`` by row.
+    When paginating, the cursor is expected to fetch limit + 1 readings.
+    """
+    ids: List[str] = []
+    animal_ids: List[int] = []
+    timestamps: List[int] = []
+    numeric = {field: [] for field in NUMERIC_METRIC_FIELDS}
+    feeding: List[int] = []
+    signal: List[int] = []
+    extras: List[dict] = []
+
+    animal_codes: Dict[str, int] = {}
+    feeding_codes = {feeding_status.value: code for code, feeding_status in enumerate(FeedingStatus)}
+    signal_codes = {signal_strength.value: code for code, signal_strength in enumerate(SignalStrength)}
+
+    numeric_columns = [(field, numeric[field].append) for field in NUMERIC_METRIC_FIELDS]
+    previous = 0
+    last_position = None
+    next_cursor = None
+
+    async for metric in cursor:
+        if limit is not None and len(ids) == limit:
+            next_cursor = encode_cursor(*last_position)
+            break
+
+        timestamp = metric["timestamp"]
+        last_position = (timestamp, metric["_id"])
+        ids.append(str(metric["_id"]))
+        animal_ids.append(_encode(animal_codes, metric["animal_id"]))
+
+        milliseconds = (timestamp - EPOCH) // MILLISECOND
+        timestamps.append(milliseconds - previous)
+        previous = milliseconds
+
+        for field, append in numeric_columns:
+            append(metric.get(field))
+        feeding.append(_encode(feeding_codes, metric.get("feeding_status")))
+        signal.append(_encode(signal_codes, metric.get("signal_strength")))
+
+        location = metric.get("location")
+        additional_data = metric.get("additional_data")
+        if location or additional_data:
+            extras.append({
+                "row": len(ids) - 1,
+                "location": location or {},
+                "additional_data": additional_data or {}
+            })
+
+    columns = {
+        "id": ids,
+        "animal_id": animal_ids,
+        "timestamp": timestamps,
+        **numeric,
+        "feeding_status": feeding,
+        "signal_strength": signal
+    }
+    payload = {
+        "format": "columnar",
+        "count": len(ids),
+        "timestamp_encoding": "delta_ms",
+        "columns": columns,
+        "dictionaries": {
+            "animal_id": list(animal_codes),
+            "feeding_status": list(feeding_codes),
+            "signal_strength": list(signal_codes)
+        },
+        "extras": extras
+    }
+    return payload, next_cursor
@@ -0,0 +1,61 @@
+from typing import Dict, List
+from pymongo.errors import BulkWriteError
+from app.config import settings
+from app.database import get_collection
+from app.services.iot_alerts import alert_engine
+from app.services.iot_rollups import update_rollups
+from app.services.latest_readings import latest_readings
+from app.services.metrics_broadcast import metrics_broadcaster
+import logging
+
+logger = logging.getLogger(__name__)
+
+async def insert_metrics(documents: List[dict]) -> Dict[int, str]:
+    """Store IoT readings with a single unordered insert_many.
+
+    Every document receives its ``_id`` in place. Returns a mapping of
+    document index to error message for the readings the server rejected.
+    Stored readings are then checked against the alert rules and folded
+    into the rollup tiers.
+    """
+    if not documents:
+        return {}
+
+    iot_collection = get_collection("iot_metrics")
+    write_errors: Dict[int, str] = {}
+
+    try:
+        await iot_collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        logger.warning(f"Rejected {len(errors)} of {len(documents)} IoT readings")
+        write_errors = {error["index"]: error.get("errmsg", "Write failed") for error in errors}
+
+    stored = [document for index, document in enumerate(documents) if index not in write_errors]
+    await _after_insert(stored)
+
+    return write_errors
+
+async def _after_insert(documents: List[dict]):
+    """Update derived views of the stored readings without failing the ingest."""
+    if not documents:
+        return
+
+    if settings.iot_latest_cache_enabled:
+        latest_readings.record(documents)
+
+    # With the change stream enabled, readings are published from there instead
+    if not settings.iot_stream_change_stream:
+        metrics_broadcaster.publish(documents)
+
+    if settings.iot_alerts_enabled:
+        try:
+            await alert_engine.process(documents)
+        except Exception as e:
+            logger.error(f"Error evaluating IoT alerts: {e}")
+
+    if settings.iot_rollups_enabled:
+        try:
+            await update_rollups(documents)
+        except Exception as e:
+            logger.error(f"Error updating IoT rollups: {e}")
@@ -0,0 +1,168 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from app.config import settings
+from app.database import get_collection
+from app.models.iot import (
+    NUMERIC_METRIC_FIELDS, MetricsResolution, IoTMetricStats, IoTMetricsRollup
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLLECTION = "iot_rollups"
+
+# Rollup tiers from finest to coarsest
+ROLLUP_INTERVALS = {
+    MetricsResolution.MINUTE: timedelta(minutes=1),
+    MetricsResolution.HOUR: timedelta(hours=1),
+    MetricsResolution.DAY: timedelta(days=1),
+}
+
+def bucket_start(timestamp: datetime, resolution: MetricsResolution) -> datetime:
+    """Truncate a timestamp to the start of its rollup bucket."""
+    if resolution == MetricsResolution.MINUTE:
+        return timestamp.replace(second=0, microsecond=0)
+    if resolution == MetricsResolution.HOUR:
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def choose_resolution(window: timedelta) -> MetricsResolution:
+    """Pick the finest rollup tier that keeps the window within the point budget."""
+    for resolution, interval in ROLLUP_INTERVALS.items():
+        if window / interval <= settings.iot_rollup_max_points:
+            return resolution
+    return MetricsResolution.DAY
+
+async def update_rollups(documents: List[dict]):
+    """Fold stored readings into every rollup tier with one bulk write.
+
+    Readings are pre-aggregated per (animal, tier, bucket) in memory first,
+    so a batch of thousands of readings turns into one upsert per bucket.
+    """
+    buckets: Dict[Tuple[str, str, datetime], dict] = {}
+
+    for document in documents:
+        timestamp = document.get("timestamp")
+        if timestamp is None:
+            continue
+
+        for resolution in ROLLUP_INTERVALS:
+            key = (document["animal_id"], resolution.value, bucket_start(timestamp, resolution))
+            bucket = buckets.setdefault(key, {"count": 0, "stats": {}})
+            bucket["count"] += 1
+
+            for field in NUMERIC_METRIC_FIELDS:
+                value = document.get(field)
+                if value is None:
+                    continue
+
+                # [min, max, sum, count]
+                stats = bucket["stats"].get(field)
+                if stats is None:
+                    bucket["stats"][field] = [value, value, value, 1]
+                else:
+                    stats[0] = min(stats[0], value)
+                    stats[1] = max(stats[1], value)
+                    stats[2] += value
+                    stats[3] += 1
+
+    if not buckets:
+        return
+
+    operations = []
+    for (animal_id, resolution, start), bucket in buckets.items():
+        minimums = {}
+        maximums = {}
+        increments = {"count": bucket["count"]}
+        for field, (minimum, maximum, total, count) in bucket["stats"].items():
+            minimums[f"stats.{field}.min"] = minimum
+            maximums[f"stats.{field}.max"] = maximum
+            increments[f"stats.{field}.sum"] = total
+            increments[f"stats.{field}.count"] = count
+
+        update = {"$inc": increments}
+        if minimums:
+            update["$min"] = minimums
+            update["$max"] = maximums
+
+        operations.append(UpdateOne(
+            {"animal_id": animal_id, "resolution": resolution, "bucket": start},
+            update,
+            upsert=True
+        ))
+
+    await get_collection(ROLLUP_COLLECTION).bulk_write(operations, ordered=False)
+
+async def get_rollups(
+    animal_id: str,
+    resolution: MetricsResolution,
+    start_time: datetime,
+    end_time: datetime
+) -> List[IoTMetricsRollup]:
+    """Get the rollup buckets of one tier overlapping a time window, newest first."""
+    cursor = get_collection(ROLLUP_COLLECTION).find({
+        "animal_id": animal_id,
+        "resolution": resolution.value,
+        "bucket": {"$gte": bucket_start(start_time, resolution), "$lte": end_time}
+    }).sort("bucket", -1)
+
+    rollups = []
+    async for rollup in cursor:
+        stats = {}
+        for field, values in rollup.get("stats", {}).items():
+            if values.get("count"):
+                stats[field] = IoTMetricStats(
+                    min=values["min"],
+                    max=values["max"],
+                    avg=values["sum"] / values["count"],
+                    count=values["count"]
+                )
+        rollups.append(IoTMetricsRollup(bucket=rollup["bucket"], count=rollup["count"], stats=stats))
+
+    return rollups
+
+def rebuild_pipeline(resolution: MetricsResolution, since: Optional[datetime] = None) -> List[dict]:
+    """Aggregation that recomputes one rollup tier from raw readings and merges it in place."""
+    group = {
+        "_id": {
+            "animal_id": "$animal_id",
+            "bucket": {"$dateTrunc": {"date": "$timestamp", "unit": resolution.value}}
+        },
+        "count": {"$sum": 1}
+    }
+    stats = {}
+    for field in NUMERIC_METRIC_FIELDS:
+        group[f"{field}_min"] = {"$min": f"${field}"}
+        group[f"{field}_max"] = {"$max": f"${field}"}
+        group[f"{field}_sum"] = {"$sum": f"${field}"}
+        group[f"{field}_count"] = {"$sum": {"$cond": [{"$isNumber": f"${field}"}, 1, 0]}}
+        stats[field] = {
+            "min": f"${field}_min",
+            "max": f"${field}_max",
+            "sum": f"${field}_sum",
+            "count": f"${field}_count"
+        }
+
+    match = {"timestamp": {"$type": "date"}}
+    if since is not None:
+        match["timestamp"] = {"$gte": bucket_start(since, resolution)}
+
+    return [
+        {"$match": match},
+        {"$group": group},
+        {"$project": {
+            "_id": 0,
+            "animal_id": "$_id.animal_id",
+            "resolution": {"$literal": resolution.value},
+            "bucket": "$_id.bucket",
+            "count": 1,
+            "stats": stats
+        }},
+        {"$merge": {
+            "into": ROLLUP_COLLECTION,
+            "on": ["animal_id", "resolution", "bucket"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert"
+        }}
+    ]
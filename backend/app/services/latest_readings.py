@@ -0,0 +1,316 @@
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from bson import ObjectId
+from app.config import settings
+from app.database import get_collection
+from app.models.iot import NUMERIC_METRIC_FIELDS, FeedingStatus, SignalStrength
+import logging
+import math
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+MILLISECOND = timedelta(milliseconds=1)
+FEEDING_STATUSES = list(FeedingStatus)
+SIGNAL_STRENGTHS = list(SignalStrength)
+# Keyed by value; str enum members hash and compare equal to their values
+FEEDING_CODES = {feeding_status.value: code for code, feeding_status in enumerate(FEEDING_STATUSES)}
+SIGNAL_CODES = {signal_strength.value: code for code, signal_strength in enumerate(SIGNAL_STRENGTHS)}
+FIELD_COUNT = len(NUMERIC_METRIC_FIELDS)
+INITIAL_SLOTS = 4
+
+class _AnimalReadings:
+    """Fixed-size ring of one animal's latest readings, stored column-wise.
+
+    Values live in flat arrays indexed by slot, so a reading costs about 80
+    bytes instead of a dict per reading. Arrays start small and double up to
+    the capacity, so animals that report rarely stay cheap. Only readings
+    with a non-trivial location or additional_data use the sparse extras map.
+    """
+    __slots__ = (
+        "capacity", "allocated", "ids", "timestamps", "values", "feeding", "signal",
+        "lat", "lng", "extras", "head", "size", "complete", "loaded_at", "last_access"
+    )
+
+    def __init__(self, capacity: int):
+        slots = min(capacity, INITIAL_SLOTS)
+        self.capacity = capacity
+        self.allocated = slots
+        self.ids = bytearray(12 * slots)
+        self.timestamps = array("q", bytes(8 * slots))  # epoch milliseconds
+        self.values = array("d", bytes(8 * slots * FIELD_COUNT))
+        self.feeding = bytearray(slots)
+        self.signal = bytearray(slots)
+        self.lat = array("d", bytes(8 * slots))
+        self.lng = array("d", bytes(8 * slots))
+        self.extras: Optional[Dict[int, tuple]] = None
+        self.head = 0  # next slot to write
+        self.size = 0
+        self.complete = False  # holds everything Mongo had when it was warmed
+        self.loaded_at = 0.0
+        self.last_access = time.monotonic()
+
+    def append(self, document: dict):
+        """Write a reading into the next slot, overwriting the oldest one."""
+        slot = self.head
+        if slot == self.allocated:
+            self._grow()
+
+        document_id = document["_id"]
+        if not isinstance(document_id, ObjectId):
+            document_id = ObjectId(document_id)
+        self.ids[slot * 12:slot * 12 + 12] = document_id.binary
+        self.timestamps[slot] = (document["timestamp"] - EPOCH) // MILLISECOND
+
+        values = self.values
+        offset = slot * FIELD_COUNT
+        for field in NUMERIC_METRIC_FIELDS:
+            values[offset] = document[field]
+            offset += 1
+
+        self.feeding[slot] = FEEDING_CODES[document["feeding_status"]]
+        self.signal[slot] = SIGNAL_CODES[document["signal_strength"]]
+
+        location = document.get("location")
+        additional_data = document.get("additional_data")
+        if self.extras is not None:
+            self.extras.pop(slot, None)
+        if not location and not additional_data:
+            self.lat[slot] = math.nan
+            self.lng[slot] = math.nan
+        elif not additional_data and location.keys() <= {"lat", "lng"}:
+            self.lat[slot] = location.get("lat", math.nan)
+            self.lng[slot] = location.get("lng", math.nan)
+        else:
+            if self.extras is None:
+                self.extras = {}
+            self.extras[slot] = (location or {}, additional_data or {})
+
+        self.head = (slot + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _grow(self):
+        """Double the allocated slots, up to the ring capacity."""
+        extra = min(self.capacity, self.allocated * 2) - self.allocated
+        self.ids.extend(bytes(12 * extra))
+        self.timestamps.extend(array("q", bytes(8 * extra)))
+        self.values.extend(array("d", bytes(8 * extra * FIELD_COUNT)))
+        self.feeding.extend(bytes(extra))
+        self.signal.extend(bytes(extra))
+        self.lat.extend(array("d", bytes(8 * extra)))
+        self.lng.extend(array("d", bytes(8 * extra)))
+        self.allocated += extra
+
+    def contains(self, document_id: bytes) -> bool:
+        """Whether a reading with this 12-byte id is in the ring."""
+        for i in range(self.size):
+            slot = (self.head - 1 - i) % self.capacity
+            if self.ids[slot * 12:slot * 12 + 12] == document_id:
+                return True
+        return False
+
+    def newest_timestamp(self) -> Optional[int]:
+        """Epoch milliseconds of the newest reading, if any."""
+        if not self.size:
+            return None
+        return self.timestamps[(self.head - 1) % self.capacity]
+
+    def read(self, animal_id: str, count: int) -> List[dict]:
+        """Rebuild up to count readings as stored documents, newest first."""
+        documents = []
+        for i in range(min(count, self.size)):
+            slot = (self.head - 1 - i) % self.capacity
+            offset = slot * FIELD_COUNT
+
+            document = {
+                "_id": str(ObjectId(bytes(self.ids[slot * 12:slot * 12 + 12]))),
+                "animal_id": animal_id,
+                "timestamp": EPOCH + self.timestamps[slot] * MILLISECOND,
+                "feeding_status": FEEDING_STATUSES[self.feeding[slot]],
+                "signal_strength": SIGNAL_STRENGTHS[self.signal[slot]],
+            }
+            for j, field in enumerate(NUMERIC_METRIC_FIELDS):
+                document[field] = self.values[offset + j]
+
+            if self.extras is not None and slot in self.extras:
+                location, additional_data = self.extras[slot]
+                document["location"] = dict(location)
+                document["additional_data"] = dict(additional_data)
+            else:
+                location = {}
+                if not math.isnan(self.lat[slot]):
+                    location["lat"] = self.lat[slot]
+                if not math.isnan(self.lng[slot]):
+                    location["lng"] = self.lng[slot]
+                document["location"] = location
+                document["additional_data"] = {}
+
+            documents.append(document)
+
+        return documents
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by this ring."""
+        total = sys.getsizeof(self)
+        for buffer in (self.ids, self.timestamps, self.values, self.feeding, self.signal, self.lat, self.lng):
+            total += sys.getsizeof(buffer)
+        if self.extras is not None:
+            total += sys.getsizeof(self.extras) + 200 * len(self.extras)
+        return total
+
+class LatestReadingsStore:
+    """In-process cache of each animal's most recent IoT readings.
+
+    Ingest paths append to it after a successful write. Reads that miss are
+    warmed from Mongo, and rings older than refresh_seconds are warmed
+    again so readings written by other processes show up; with the change
+    stream enabled, those readings are appended as they are inserted. Animals are kept in LRU order and evicted when
+    idle for too long or when the animal limit is reached, which bounds
+    memory at roughly max_animals * memory per ring.
+    """
+
+    def __init__(self, capacity: int, max_animals: int, idle_seconds: int, refresh_seconds: int):
+        self.capacity = capacity
+        self.max_animals = max_animals
+        self.idle_seconds = idle_seconds
+        self.refresh_seconds = refresh_seconds
+        self._rings: "OrderedDict[str, _AnimalReadings]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def record(self, documents: List[dict], cached_only: bool = False):
+        """Append freshly stored readings to the rings of their animals.
+
+        Readings already in a ring are skipped, so the same insert may be
+        recorded by the ingest path and by the change stream. A reading
+        older than the newest one cached drops the ring, which is then
+        warmed in timestamp order on its next read. With cached_only, no
+        rings are created for animals nobody has read.
+        """
+        dropped = set()
+        for document in documents:
+            animal_id = document["animal_id"]
+            if animal_id in dropped:
+                continue
+            ring = self._rings.get(animal_id)
+            if ring is None:
+                if cached_only:
+                    continue
+                # Only the newest reading is known until the ring is warmed
+                ring = self._rings[animal_id] = _AnimalReadings(self.capacity)
+                ring.loaded_at = time.monotonic()
+            try:
+                document_id = document["_id"]
+                if not isinstance(document_id, ObjectId):
+                    document_id = ObjectId(document_id)
+                if ring.contains(document_id.binary):
+                    continue
+                newest = ring.newest_timestamp()
+                if newest is not None and (document["timestamp"] - EPOCH) // MILLISECOND < newest:
+                    del self._rings[animal_id]
+                    dropped.add(animal_id)
+                    continue
+                ring.append(document)
+            except Exception as e:
+                logger.warning(f"Skipping reading for latest cache: {e}")
+            self._touch(animal_id, ring)
+
+        self._evict()
+
+    async def latest(self, animal_id: str) -> Optional[dict]:
+        """Get the newest reading of an animal."""
+        readings = await self.recent(animal_id, 1)
+        return readings[0] if readings else None
+
+    async def recent(self, animal_id: str, count: int) -> List[dict]:
+        """Get up to count of the newest readings of an animal, newest first."""
+        count = min(count, self.capacity)
+        ring = self._rings.get(animal_id)
+
+        if ring is not None and not self._is_stale(ring) and (ring.complete or ring.size >= count):
+            self.hits += 1
+            self._touch(animal_id, ring)
+            return ring.read(animal_id, count)
+
+        self.misses += 1
+        ring = await self._warm(animal_id)
+        return ring.read(animal_id, count)
+
+    def stats(self) -> dict:
+        """Cache counters and memory accounting."""
+        self._evict()
+        return {
+            "animals": len(self._rings),
+            "capacity_per_animal": self.capacity,
+            "max_animals": self.max_animals,
+            "memory_bytes": sum(
+                ring.memory_bytes() + sys.getsizeof(animal_id) + 100  # key plus dict entry
+                for animal_id, ring in self._rings.items()
+            ),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self):
+        """Drop every cached ring."""
+        self._rings.clear()
+
+    async def _warm(self, animal_id: str) -> _AnimalReadings:
+        """Load the newest readings of an animal from Mongo into a fresh ring."""
+        iot_collection = get_collection("iot_metrics")
+        cursor = iot_collection.find({"animal_id": animal_id}).sort(
+            [("timestamp", -1), ("_id", -1)]
+        ).limit(self.capacity)
+        documents = await cursor.to_list(length=self.capacity)
+
+        ring = _AnimalReadings(self.capacity)
+        for document in reversed(documents):
+            ring.append(document)
+
+        # Keep readings recorded by ingest while the query was in flight
+        current = self._rings.get(animal_id)
+        if current is not None:
+            newest = ring.newest_timestamp()
+            loaded_ids = {str(document["_id"]) for document in documents}
+            for document in reversed(current.read(animal_id, current.size)):
+                timestamp = (document["timestamp"] - EPOCH) // MILLISECOND
+                if document["_id"] not in loaded_ids and (newest is None or timestamp >= newest):
+                    ring.append(document)
+
+        ring.complete = True
+        ring.loaded_at = time.monotonic()
+        self._rings[animal_id] = ring
+        self._touch(animal_id, ring)
+        self._evict()
+        return ring
+
+    def _is_stale(self, ring: _AnimalReadings) -> bool:
+        """Whether a ring should be reloaded to pick up writes from other workers."""
+        return self.refresh_seconds > 0 and time.monotonic() - ring.loaded_at > self.refresh_seconds
+
+    def _touch(self, animal_id: str, ring: _AnimalReadings):
+        ring.last_access = time.monotonic()
+        self._rings.move_to_end(animal_id)
+
+    def _evict(self):
+        """Drop least recently used rings that are idle or over the animal limit."""
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._rings:
+            animal_id, ring = next(iter(self._rings.items()))
+            if len(self._rings) <= self.max_animals and ring.last_access >= cutoff:
+                break
+            del self._rings[animal_id]
+            self.evictions += 1
+
+latest_readings = LatestReadingsStore(
+    capacity=settings.iot_latest_cache_size,
+    max_animals=settings.iot_latest_cache_max_animals,
+    idle_seconds=settings.iot_latest_cache_idle_seconds,
+    refresh_seconds=settings.iot_latest_cache_refresh_seconds
+)
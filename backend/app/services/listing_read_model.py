@@ -0,0 +1,144 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from app.database import get_collection
+from app.leases import acquire_lease
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_LEASE_ID = "listing_reconcile"
+
+# Copied onto each listing from its animal and seller
+DENORMALIZED_FIELDS = ("seller_name", "animal_name", "animal_health_score", "species")
+
+def normalize_species(species: str) -> str:
+    """Species as stored on listings and matched by the species filter."""
+    return species.strip().lower()
+
+def listing_details(animal: Optional[dict], seller_name: Optional[str]) -> dict:
+    """Denormalized listing fields for an animal document and seller name."""
+    return {
+        "seller_name": seller_name,
+        "animal_name": animal["name"] if animal else None,
+        "animal_health_score": animal.get("health_score") if animal else None,
+        "species": normalize_species(animal["species"]) if animal and animal.get("species") else None,
+    }
+
+async def _documents_by_id(collection_name: str, ids: set, projection: dict) -> Dict[str, dict]:
+    """Documents for many IDs in one $in query, keyed by string ID."""
+    object_ids = [ObjectId(i) for i in ids if ObjectId.is_valid(i)]
+    if not object_ids:
+        return {}
+    cursor = get_collection(collection_name).find({"_id": {"$in": object_ids}}, projection)
+    return {str(document["_id"]): document async for document in cursor}
+
+class ListingReadModel:
+    """Keeps seller and animal details copied onto listing documents.
+
+    Marketplace reads then return listings as stored, with no lookups in
+    other collections. The animal and user write paths call the hooks
+    below to push changes to every affected listing; the reconciler
+    periodically recomputes the copies in bulk and repairs any that have
+    drifted (writes that bypassed the hooks, races between the two).
+    """
+
+    def __init__(self):
+        self.propagated = 0
+        self.repaired = 0
+        self.reconciled_at: Optional[datetime] = None
+
+    async def details_for(self, listings: List[dict]) -> List[dict]:
+        """Current denormalized fields for each listing, fetched with one query per collection."""
+        animals, sellers = await asyncio.gather(
+            _documents_by_id("animals", {listing["animal_id"] for listing in listings}, {"name": 1, "health_score": 1, "species": 1}),
+            _documents_by_id("users", {listing["seller_id"] for listing in listings}, {"name": 1})
+        )
+        details = []
+        for listing in listings:
+            seller = sellers.get(listing["seller_id"])
+            details.append(listing_details(animals.get(listing["animal_id"]), seller["name"] if seller else None))
+        return details
+
+    async def animal_changed(self, animal: dict):
+        """Copy an updated animal's details to its listings."""
+        result = await get_collection("listings").update_many(
+            {"animal_id": str(animal["_id"])},
+            {"$set": {
+                "animal_name": animal["name"],
+                "animal_health_score": animal.get("health_score"),
+                "species": normalize_species(animal["species"]),
+            }}
+        )
+        self.propagated += result.modified_count
+
+    async def animal_deleted(self, animal_id: str):
+        """Clear a deleted animal's details from its listings."""
+        result = await get_collection("listings").update_many(
+            {"animal_id": animal_id},
+            {"$set": {"animal_name": None, "animal_health_score": None, "species": None}}
+        )
+        self.propagated += result.modified_count
+
+    async def seller_changed(self, user_id: str, name: str):
+        """Copy a renamed user's name to their listings."""
+        result = await get_collection("listings").update_many(
+            {"seller_id": user_id},
+            {"$set": {"seller_name": name}}
+        )
+        self.propagated += result.modified_count
+
+    async def reconcile(self, batch_size: int = 1000) -> int:
+        """Recompute every listing's copies and fix the ones that differ; returns the number fixed."""
+        listings_collection = get_collection("listings")
+        projection = {"animal_id": 1, "seller_id": 1, **{field: 1 for field in DENORMALIZED_FIELDS}}
+        cursor = listings_collection.find({}, projection).batch_size(batch_size)
+
+        repaired = 0
+        batch = []
+        async for listing in cursor:
+            batch.append(listing)
+            if len(batch) >= batch_size:
+                repaired += await self._repair(batch)
+                batch = []
+        if batch:
+            repaired += await self._repair(batch)
+
+        self.repaired += repaired
+        self.reconciled_at = datetime.utcnow()
+        return repaired
+
+    async def _repair(self, listings: List[dict]) -> int:
+        operations = []
+        for listing, expected in zip(listings, await self.details_for(listings)):
+            if any(field not in listing or listing[field] != expected[field] for field in DENORMALIZED_FIELDS):
+                operations.append(UpdateOne({"_id": listing["_id"]}, {"$set": expected}))
+        if operations:
+            await get_collection("listings").bulk_write(operations, ordered=False)
+        return len(operations)
+
+    async def run_reconciler(self, interval_seconds: int):
+        """Reconcile now and then periodically until cancelled, one worker at a time."""
+        while True:
+            try:
+                if await acquire_lease(RECONCILE_LEASE_ID, interval_seconds):
+                    repaired = await self.reconcile()
+                    if repaired:
+                        logger.info(f"Repaired denormalized details on {repaired} listings")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error reconciling listing details: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    def stats(self) -> dict:
+        """Propagation and repair counters."""
+        return {
+            "propagated": self.propagated,
+            "repaired": self.repaired,
+            "reconciled_at": self.reconciled_at.isoformat() if self.reconciled_at else None,
+        }
+
+listing_read_model = ListingReadModel()
@@ -0,0 +1,129 @@
+from datetime import datetime
+from typing import Dict, Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from app.cache import TTLCache
+from app.config import settings
+from app.database import get_collection
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ListingViews:
+    """Counts listing detail views in memory and writes them in bulk.
+
+    Views are summed per listing and flushed every ``flush_interval``
+    seconds as one unordered bulk_write of $inc updates, so a page view
+    costs no write and a popular listing gets one update per flush instead
+    of one per view. A user viewing the same listing again within
+    ``dedupe_seconds`` is not counted. Counts from a failed or cancelled
+    flush are kept for the next one, and stop() lets the flusher finish its
+    write and flush once more; counts not yet flushed are lost only if the
+    process dies.
+    """
+
+    def __init__(self, flush_interval: float, dedupe_seconds: float, max_viewers: int):
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, int] = {}
+        self._viewers = TTLCache(max_size=max_viewers, ttl=dedupe_seconds) if dedupe_seconds > 0 else None
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.recorded = 0
+        self.deduplicated = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.flushed_at: Optional[datetime] = None
+
+    def record(self, listing_id: str, user_id: Optional[str] = None) -> bool:
+        """Count a view; False when the same user viewed the listing recently."""
+        if self._viewers is not None and user_id is not None:
+            key = (user_id, listing_id)
+            if self._viewers.peek(key) is not None:
+                self.deduplicated += 1
+                return False
+            self._viewers.set(key, True)
+
+        self._pending[listing_id] = self._pending.get(listing_id, 0) + 1
+        self.recorded += 1
+        return True
+
+    def pending(self, listing_id: str) -> int:
+        """Views counted for a listing but not yet written."""
+        return self._pending.get(listing_id, 0)
+
+    async def flush(self) -> int:
+        """Write all pending views; returns the number written."""
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, {}
+        operations = [
+            UpdateOne({"_id": ObjectId(listing_id)}, {"$inc": {"views": count}})
+            for listing_id, count in pending.items()
+        ]
+        try:
+            await get_collection("listings").bulk_write(operations, ordered=False)
+        except BaseException:
+            # Also on cancellation, so a final flush still writes them
+            self.failures += 1
+            # Put the counts back, adding any views recorded meanwhile
+            for listing_id, count in pending.items():
+                self._pending[listing_id] = self._pending.get(listing_id, 0) + count
+            raise
+
+        views = sum(pending.values())
+        self.flushed += views
+        self.batches += 1
+        self.flushed_at = datetime.utcnow()
+        return views
+
+    def start(self) -> asyncio.Task:
+        """Start the background flusher."""
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def stop(self):
+        """Stop the flusher after its current write and flush what is left."""
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing listing views on shutdown: {e}")
+
+    async def _run(self):
+        """Flush every flush_interval seconds until stopped."""
+        while True:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing listing views: {e}")
+
+    def stats(self) -> dict:
+        """Pending views and flush counters."""
+        return {
+            "pending_listings": len(self._pending),
+            "pending_views": sum(self._pending.values()),
+            "recorded": self.recorded,
+            "deduplicated": self.deduplicated,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failures": self.failures,
+            "flushed_at": self.flushed_at.isoformat() if self.flushed_at else None,
+        }
+
+listing_views = ListingViews(
+    flush_interval=settings.listing_view_flush_seconds,
+    dedupe_seconds=settings.listing_view_dedupe_seconds,
+    max_viewers=settings.listing_view_dedupe_max_size
+)
@@ -0,0 +1,137 @@
+from typing import Dict, Iterable, List, Set
+from datetime import datetime
+from app.config import settings
+from app.database import get_collection
+from app.services.latest_readings import latest_readings
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _encode_reading(document: dict) -> str:
+    """Serialize a stored reading once for every subscriber that receives it."""
+    payload = {key: value for key, value in document.items() if key != "_id"}
+    payload["id"] = str(document["_id"])
+    if isinstance(payload.get("timestamp"), datetime):
+        payload["timestamp"] = payload["timestamp"].isoformat()
+    return json.dumps(payload, default=str)
+
+class MetricsSubscription:
+    """A live-metrics client and the readings waiting to be sent to it.
+
+    Pending readings are coalesced per animal: a client that falls behind
+    only ever receives the newest reading of each animal, so memory per
+    connection is bounded by the number of animals it subscribed to.
+    """
+    __slots__ = ("animal_ids", "pending", "event", "delivered", "coalesced")
+
+    def __init__(self, animal_ids: Set[str]):
+        self.animal_ids = animal_ids
+        self.pending: Dict[str, str] = {}
+        self.event = asyncio.Event()
+        self.delivered = 0
+        self.coalesced = 0
+
+    def offer(self, animal_id: str, payload: str):
+        """Queue a reading, replacing any unsent reading of the same animal."""
+        if animal_id in self.pending:
+            self.coalesced += 1
+        self.pending[animal_id] = payload
+        self.event.set()
+
+    async def next_batch(self, timeout: float) -> List[str]:
+        """Wait up to timeout seconds for readings and take everything pending."""
+        if not self.pending:
+            try:
+                await asyncio.wait_for(self.event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+
+        payloads = list(self.pending.values())
+        self.pending = {}
+        self.event.clear()
+        self.delivered += len(payloads)
+        return payloads
+
+class MetricsBroadcaster:
+    """Fan new IoT readings out to the live subscriptions of this process."""
+
+    def __init__(self, max_subscribers: int):
+        self.max_subscribers = max_subscribers
+        self._by_animal: Dict[str, Set[MetricsSubscription]] = {}
+        self._subscriptions: Set[MetricsSubscription] = set()
+        self.published = 0
+
+    def is_full(self) -> bool:
+        """Whether the subscriber limit of this worker has been reached."""
+        return len(self._subscriptions) >= self.max_subscribers
+
+    def subscribe(self, animal_ids: Iterable[str]) -> MetricsSubscription:
+        """Register a subscription; raises RuntimeError when the worker is full."""
+        if self.is_full():
+            raise RuntimeError("Too many live metrics subscribers")
+
+        subscription = MetricsSubscription(set(animal_ids))
+        self._subscriptions.add(subscription)
+        for animal_id in subscription.animal_ids:
+            self._by_animal.setdefault(animal_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: MetricsSubscription):
+        """Remove a subscription and its per-animal index entries."""
+        self._subscriptions.discard(subscription)
+        for animal_id in subscription.animal_ids:
+            subscribers = self._by_animal.get(animal_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._by_animal[animal_id]
+
+    def publish(self, documents: List[dict]):
+        """Offer stored readings to every subscription watching their animal."""
+        for document in documents:
+            subscribers = self._by_animal.get(document["animal_id"])
+            if not subscribers:
+                continue
+
+            payload = _encode_reading(document)
+            for subscription in subscribers:
+                subscription.offer(document["animal_id"], payload)
+            self.published += 1
+
+    def stats(self) -> dict:
+        """Subscriber and delivery counters."""
+        return {
+            "subscribers": len(self._subscriptions),
+            "watched_animals": len(self._by_animal),
+            "published": self.published,
+            "pending": sum(len(subscription.pending) for subscription in self._subscriptions),
+        }
+
+    async def follow_change_stream(self):
+        """Publish readings inserted by any process, using a MongoDB change stream.
+
+        The readings are also appended to the latest-readings rings this
+        process already holds, keeping them current with other workers and
+        the gateway. Requires a replica set and a plain (not time-series)
+        iot_metrics collection. Runs until cancelled.
+        """
+        iot_collection = get_collection("iot_metrics")
+        pipeline = [{"$match": {"operationType": "insert"}}]
+
+        while True:
+            try:
+                async with iot_collection.watch(pipeline) as stream:
+                    async for change in stream:
+                        document = change["fullDocument"]
+                        self.publish([document])
+                        if settings.iot_latest_cache_enabled:
+                            latest_readings.record([document], cached_only=True)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"IoT change stream failed, retrying: {e}")
+                await asyncio.sleep(5)
+
+metrics_broadcaster = MetricsBroadcaster(max_subscribers=settings.iot_stream_max_subscribers)
@@ -0,0 +1,95 @@
+from typing import Dict, FrozenSet, Iterable, Optional
+from bson import ObjectId
+from app.cache import TTLCache
+from app.config import settings
+from app.database import get_collection
+
+class AnimalOwnership:
+    """Cached ``animal_id -> owner_id`` and ``owner_id -> animal ids`` maps.
+
+    Authorization checks on hot paths become dictionary lookups; MongoDB is
+    only asked on a miss. The animal handlers keep both maps current in this
+    process through the hooks below. Other workers catch up when entries
+    expire, which bounds how long an animal created elsewhere can be missing
+    from an owner's set.
+    """
+
+    def __init__(self, max_animals: int, max_owners: int, ttl: float):
+        self.owners = TTLCache(max_animals, ttl)
+        self.animals = TTLCache(max_owners, ttl)
+
+    async def owner_of(self, animal_id: str) -> Optional[str]:
+        """Owner of an animal, or None if the ID is invalid or the animal does not exist."""
+        owner_id = self.owners.get(animal_id)
+        if owner_id is not None:
+            return owner_id
+        if not ObjectId.is_valid(animal_id):
+            return None
+
+        animal = await get_collection("animals").find_one({"_id": ObjectId(animal_id)}, {"owner_id": 1})
+        if not animal:
+            return None
+        self.owners.set(animal_id, animal["owner_id"])
+        return animal["owner_id"]
+
+    async def owners_of(self, animal_ids: Iterable[str]) -> Dict[str, str]:
+        """Owners of many animals, fetching every miss in one query; unknown IDs are left out."""
+        owners = {}
+        missing = []
+        for animal_id in set(animal_ids):
+            owner_id = self.owners.get(animal_id)
+            if owner_id is not None:
+                owners[animal_id] = owner_id
+            elif ObjectId.is_valid(animal_id):
+                missing.append(ObjectId(animal_id))
+
+        if missing:
+            cursor = get_collection("animals").find({"_id": {"$in": missing}}, {"owner_id": 1})
+            async for animal in cursor:
+                animal_id = str(animal["_id"])
+                owners[animal_id] = animal["owner_id"]
+                self.owners.set(animal_id, animal["owner_id"])
+        return owners
+
+    async def animal_ids_of(self, owner_id: str) -> FrozenSet[str]:
+        """IDs of every animal an owner has."""
+        animal_ids = self.animals.get(owner_id)
+        if animal_ids is not None:
+            return animal_ids
+
+        cursor = get_collection("animals").find({"owner_id": owner_id}, {"_id": 1})
+        animal_ids = frozenset([str(animal["_id"]) async for animal in cursor])
+        self.animals.set(owner_id, animal_ids)
+        for animal_id in animal_ids:
+            self.owners.set(animal_id, owner_id)
+        return animal_ids
+
+    def animal_created(self, animal_id: str, owner_id: str):
+        """Record a new animal."""
+        self.owners.set(animal_id, owner_id)
+        owned = self.animals.peek(owner_id)
+        if owned is not None:
+            self.animals.set(owner_id, owned | {animal_id})
+
+    def animal_changed(self, animal_id: str):
+        """Forget an animal that was updated, so its owner is read again."""
+        owner_id = self.owners.pop(animal_id)
+        if owner_id is not None:
+            self.animals.pop(owner_id)
+
+    def animal_deleted(self, animal_id: str, owner_id: str):
+        """Forget a deleted animal."""
+        self.owners.pop(animal_id)
+        owned = self.animals.peek(owner_id)
+        if owned is not None:
+            self.animals.set(owner_id, owned - {animal_id})
+
+    def stats(self) -> dict:
+        """Hit counters of both maps."""
+        return {"animal_owner": self.owners.stats(), "owner_animals": self.animals.stats()}
+
+ownership = AnimalOwnership(
+    max_animals=settings.ownership_cache_max_animals,
+    max_owners=settings.ownership_cache_max_owners,
+    ttl=settings.ownership_cache_ttl_seconds
+)
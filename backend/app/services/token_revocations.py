@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from bson import ObjectId
+from pymongo import ReturnDocument
+from app.config import settings
+from app.database import get_collection
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_COLLECTION = "token_revocations"
+
+# Re-read changes this far back on each refresh to cover clock skew between workers
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+class TokenRevocations:
+    """In-memory ``user_id -> minimum token version`` map.
+
+    Revoking a user bumps ``token_version`` on their document, so new logins
+    get the new version, and records it in the small ``token_revocations``
+    collection. Tokens carrying an older version are refused. Every worker
+    polls the collection for recent changes, so a revocation made elsewhere
+    applies within one refresh interval. A record is only needed until the
+    tokens it cuts off have expired, so MongoDB drops it (TTL index) and so
+    do the workers.
+    """
+
+    def __init__(self):
+        self._versions: Dict[str, Tuple[int, datetime]] = {}
+        self._since: Optional[datetime] = None
+        self.refreshes = 0
+
+    def is_revoked(self, user_id: str, token_version: int) -> bool:
+        """True when the token was issued before the user's last revocation."""
+        entry = self._versions.get(user_id)
+        return entry is not None and token_version < entry[0]
+
+    def _apply(self, user_id: str, token_version: int, expires_at: datetime):
+        current = self._versions.get(user_id)
+        if current is None or token_version >= current[0]:
+            self._versions[user_id] = (token_version, expires_at)
+
+    async def revoke(self, user_id: str) -> Optional[int]:
+        """Invalidate every token issued to a user so far; None if the user does not exist."""
+        if not ObjectId.is_valid(user_id):
+            return None
+
+        user = await get_collection("users").find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            {"$inc": {"token_version": 1}},
+            projection={"token_version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if user is None:
+            return None
+
+        token_version = user["token_version"]
+        now = datetime.utcnow()
+        expires_at = now + timedelta(minutes=settings.access_token_expire_minutes)
+        await get_collection(REVOCATION_COLLECTION).update_one(
+            {"_id": user_id},
+            {
+                "$max": {"token_version": token_version, "expires_at": expires_at},
+                "$set": {"updated_at": now}
+            },
+            upsert=True
+        )
+        self._apply(user_id, token_version, expires_at)
+        return token_version
+
+    async def refresh(self):
+        """Pick up revocations recorded since the last refresh and forget expired ones."""
+        now = datetime.utcnow()
+        query = {} if self._since is None else {"updated_at": {"$gte": self._since - REFRESH_OVERLAP}}
+        async for record in get_collection(REVOCATION_COLLECTION).find(query):
+            self._apply(record["_id"], record["token_version"], record["expires_at"])
+            if self._since is None or record["updated_at"] > self._since:
+                self._since = record["updated_at"]
+        if self._since is None:
+            self._since = now
+
+        self._versions = {
+            user_id: entry for user_id, entry in self._versions.items() if entry[1] > now
+        }
+        self.refreshes += 1
+
+    async def run_refresh(self, interval_seconds: int):
+        """Refresh periodically until cancelled."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing token revocations: {e}")
+
+    def stats(self) -> dict:
+        """Number of users with revoked tokens."""
+        return {"revoked_users": len(self._versions), "refreshes": self.refreshes}
+
+token_revocations = TokenRevocations()
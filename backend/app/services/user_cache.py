@@ -0,0 +1,37 @@
+from typing import Optional
+from bson import ObjectId
+from app.cache import TTLCache
+from app.config import settings
+from app.database import get_collection
+from app.models.user import UserInDB
+
+# Authenticated users by ID; cached models are shared between requests and
+# must be treated as read-only
+user_cache = TTLCache(max_size=settings.user_cache_max_size, ttl=settings.user_cache_ttl_seconds)
+
+async def load_user(user_id: str) -> Optional[UserInDB]:
+    """Read a user from MongoDB."""
+    if not ObjectId.is_valid(user_id):
+        return None
+
+    user = await get_collection("users").find_one({"_id": ObjectId(user_id)})
+    if user is None:
+        return None
+    user["_id"] = str(user["_id"])
+    return UserInDB(**user)
+
+async def get_user(user_id: str) -> Optional[UserInDB]:
+    """The user for an authenticated request, from the cache when possible."""
+    if not settings.user_cache_enabled:
+        return await load_user(user_id)
+    return await user_cache.get_or_load(user_id, lambda: load_user(user_id))
+
+def invalidate_user(user_id: str):
+    """Drop a cached user; call after any write to the user's document.
+
+    The auth endpoints that change users call it through update_user.
+    Other workers see the change once their entry expires after
+    USER_CACHE_TTL_SECONDS; deactivation also revokes tokens, which applies
+    everywhere sooner.
+    """
+    user_cache.pop(user_id)
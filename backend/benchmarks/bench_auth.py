@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request authentication overhead with and without the user cache.
+
+Runs the API in-process (no server needed) against the configured MongoDB
+(MONGODB_URL / MONGODB_DB from .env) and times GET /api/v1/auth/me, whose
+cost is almost entirely token decoding plus the user lookup.
+
+    python benchmarks/bench_auth.py --requests 5000 --concurrency 1,32
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+
+from common import percentile
+from app.auth.jwt import create_access_token
+from app.config import settings
+from app.database import close_mongo_connection, connect_to_mongo, get_collection
+from app.main import app
+from app.services.user_cache import user_cache
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Measure auth overhead per request")
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per run")
+    parser.add_argument("--concurrency", default="1,32", help="Comma separated in-flight request counts")
+    return parser.parse_args()
+
+async def run(client: httpx.AsyncClient, requests: int, concurrency: int) -> dict:
+    """Issue authenticated requests and collect latencies."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def send():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get("/api/v1/auth/me")
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "rate": requests / elapsed,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+async def main():
+    """Time the same workload with the cache off and on."""
+    args = parse_args()
+    concurrencies = [int(value) for value in args.concurrency.split(",")]
+
+    await connect_to_mongo()
+    users_collection = get_collection("users")
+    now = datetime.utcnow()
+    email = f"bench-auth-{uuid.uuid4().hex[:8]}@example.com"
+    result = await users_collection.insert_one({
+        "email": email,
+        "name": "Auth Benchmark",
+        "phone": "0000000000",
+        "role": "farmer",
+        "hashed_password": "-",
+        "kyc_status": "pending",
+        "is_active": True,
+        "created_at": now,
+        "updated_at": now,
+    })
+    token = create_access_token({"sub": email, "user_id": str(result.inserted_id)})
+
+    rows = []
+    try:
+        transport = httpx.ASGITransport(app=app)
+        headers = {"Authorization": f"Bearer {token}"}
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            for concurrency in concurrencies:
+                for enabled in (False, True):
+                    settings.user_cache_enabled = enabled
+                    user_cache.clear()
+                    await run(client, 100, concurrency)  # warm up
+                    rows.append((concurrency, enabled, await run(client, args.requests, concurrency)))
+    finally:
+        await users_collection.delete_one({"_id": result.inserted_id})
+        await close_mongo_connection()
+
+    print("="*50)
+    print(f"{'in flight':>9} {'cache':>6} {'req/s':>9} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for concurrency, enabled, stats in rows:
+        print(
+            f"{concurrency:>9} {'on' if enabled else 'off':>6} {stats['rate']:>9.0f} "
+            f"{stats['mean_ms']:>8.3f} {stats['p50_ms']:>8.3f} {stats['p99_ms']:>8.3f}"
+        )
+    print(f"User cache: {user_cache.stats()}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
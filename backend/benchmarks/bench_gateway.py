@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark the collar gateway (TCP and UDP line protocol) against the REST
+single-record ingest path.
+
+Requires a running API, a running gateway (python -m app.gateway), a farmer
+account and access to the same MongoDB (MONGODB_URL / MONGODB_DB from .env).
+Each path is timed until every reading is stored. Pass the process IDs of
+the API and gateway workers to also report readings per CPU-second, i.e.
+per core:
+
+    python benchmarks/bench_gateway.py --email farmer@example.com --password secret \\
+        --api-pid $(pgrep -f "uvicorn app.main") --gateway-pid $(pgrep -f app.gateway)
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import Optional
+
+import httpx
+
+from common import get_database, login, random_reading, seed_animals
+from app.config import settings
+from app.gateway.protocol import SHORT_NAMES
+
+SHORT_KEYS = {name: short for short, name in SHORT_NAMES.items()}
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Compare gateway and REST ingest")
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--email", required=True, help="Farmer account email")
+    parser.add_argument("--password", required=True, help="Farmer account password")
+    parser.add_argument("--gateway-host", default="127.0.0.1")
+    parser.add_argument("--tcp-port", type=int, default=settings.iot_gateway_tcp_port)
+    parser.add_argument("--udp-port", type=int, default=settings.iot_gateway_udp_port)
+    parser.add_argument("--devices", type=int, default=50, help="Devices (and TCP connections)")
+    parser.add_argument("--readings", type=int, default=20000, help="Readings sent per path")
+    parser.add_argument("--concurrency", type=int, default=32, help="In-flight REST requests")
+    parser.add_argument("--api-pid", type=int, help="API worker process, for CPU time")
+    parser.add_argument("--gateway-pid", type=int, help="Gateway process, for CPU time")
+    return parser.parse_args()
+
+def cpu_seconds(pid: Optional[int]) -> Optional[float]:
+    """User + system CPU time of a process (Linux /proc)."""
+    if not pid:
+        return None
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+def to_line(reading: dict) -> str:
+    """Encode a reading in the gateway line protocol."""
+    return ",".join(f"{SHORT_KEYS[name]}={value}" for name, value in reading.items() if name in SHORT_KEYS)
+
+async def wait_stored(database, animal_ids: list, expected: int, timeout: float = 120.0) -> int:
+    """Poll until the animals have expected readings stored (or timeout)."""
+    deadline = time.perf_counter() + timeout
+    while True:
+        stored = await database.iot_metrics.count_documents({"animal_id": {"$in": animal_ids}})
+        if stored >= expected or time.perf_counter() > deadline:
+            return stored
+        await asyncio.sleep(0.05)
+
+async def run_rest(client: httpx.AsyncClient, readings: list, concurrency: int):
+    """Post one reading per request."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(reading):
+        async with semaphore:
+            response = await client.post("/iot/metrics", json=reading)
+            response.raise_for_status()
+
+    await asyncio.gather(*(send(reading) for reading in readings))
+
+async def run_tcp(host: str, port: int, devices: list, lines: dict):
+    """Stream each device's lines over its own connection."""
+    async def stream(device):
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(f"AUTH {device['id']} {device['key']}\n".encode())
+        reply = await reader.readline()
+        if reply != b"OK\n":
+            raise RuntimeError(f"Gateway refused device {device['id']}: {reply!r}")
+        payload = lines[device["animal_id"]]
+        for offset in range(0, len(payload), 500):
+            writer.write(("\n".join(payload[offset:offset + 500]) + "\n").encode())
+            await writer.drain()
+        writer.close()
+
+    await asyncio.gather(*(stream(device) for device in devices))
+
+async def run_udp(host: str, port: int, devices: list, lines: dict):
+    """Send one datagram per reading, yielding regularly so the socket keeps up."""
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, remote_addr=(host, port))
+    sent = 0
+    for device in devices:
+        prefix = f"{device['id']} {device['key']} "
+        for line in lines[device["animal_id"]]:
+            transport.sendto((prefix + line).encode())
+            sent += 1
+            if sent % 200 == 0:
+                await asyncio.sleep(0.001)
+    transport.close()
+
+async def measure(name: str, run, database, animal_ids: list, expected: int, pid: Optional[int]) -> dict:
+    """Time a path until its readings are stored."""
+    cpu_before = cpu_seconds(pid)
+    start = time.perf_counter()
+    await run()
+    stored = await wait_stored(database, animal_ids, expected)
+    elapsed = time.perf_counter() - start
+    cpu_used = cpu_seconds(pid) - cpu_before if pid else None
+    return {"name": name, "elapsed": elapsed, "stored": stored, "cpu": cpu_used}
+
+async def main():
+    """Run REST, TCP and UDP ingest and print readings/sec (and per CPU-second)."""
+    args = parse_args()
+    mongo_client, database = get_database()
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60.0) as client:
+        token, user_id = await login(client, args.email, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        # New devices are picked up by the gateway on first contact
+        animal_ids = await seed_animals(user_id, args.devices)
+        devices = []
+        for animal_id in animal_ids:
+            response = await client.post("/iot/devices", json={"animal_id": animal_id, "name": "bench"})
+            response.raise_for_status()
+            devices.append(response.json())
+
+        results = []
+        for name in ("rest", "tcp", "udp"):
+            readings = [random_reading(random.choice(animal_ids)) for _ in range(args.readings)]
+            lines = {animal_id: [] for animal_id in animal_ids}
+            for reading in readings:
+                lines[reading["animal_id"]].append(to_line(reading))
+            expected = await database.iot_metrics.count_documents({"animal_id": {"$in": animal_ids}}) + len(readings)
+
+            if name == "rest":
+                run = lambda: run_rest(client, readings, args.concurrency)
+                pid = args.api_pid
+            elif name == "tcp":
+                run = lambda: run_tcp(args.gateway_host, args.tcp_port, devices, lines)
+                pid = args.gateway_pid
+            else:
+                run = lambda: run_udp(args.gateway_host, args.udp_port, devices, lines)
+                pid = args.gateway_pid
+            result = await measure(name, run, database, animal_ids, expected, pid)
+            result["lost"] = expected - result["stored"]
+            results.append(result)
+
+    mongo_client.close()
+
+    print("="*50)
+    print(f"Readings per path: {args.readings} over {args.devices} devices")
+    for result in results:
+        line = f"{result['name']:>5}: {args.readings / result['elapsed']:10.0f} readings/sec"
+        if result["cpu"]:
+            line += f", {args.readings / result['cpu']:10.0f} readings/CPU-second"
+        if result["lost"] > 0:
+            line += f" ({result['lost']} not stored)"
+        print(line)
+
+if __name__ == "__main__":
+    asyncio.run(main())
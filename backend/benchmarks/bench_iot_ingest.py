@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark IoT ingest throughput: single-record path vs batch path.
+
+Requires a running API (see start_backend.py), a farmer account and access to
+the same MongoDB (MONGODB_URL / MONGODB_DB from .env) to seed test animals.
+
+    python benchmarks/bench_iot_ingest.py --email farmer@example.com --password secret
+
+Run it once with IOT_WRITE_BEHIND_ENABLED=false and once with true to see how
+far write-behind ingest takes MongoDB latency out of the single-record p99.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from common import login, percentile, random_reading, seed_animals
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Compare IoT ingest paths")
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--email", required=True, help="Farmer account email")
+    parser.add_argument("--password", required=True, help="Farmer account password")
+    parser.add_argument("--animals", type=int, default=20, help="Animals to spread readings over")
+    parser.add_argument("--readings", type=int, default=5000, help="Readings sent per path")
+    parser.add_argument("--concurrency", type=int, default=32, help="In-flight single-record requests")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Readings per batch request")
+    return parser.parse_args()
+
+async def run_single(client: httpx.AsyncClient, readings: list, concurrency: int) -> tuple:
+    """Send one reading per request; return elapsed seconds, latencies and 429 count.
+
+    Throttled requests are retried after Retry-After. They are counted
+    separately and left out of the latencies; the waits still add to the
+    elapsed time, so a non-zero count means the throughput is throttled.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    throttled = 0
+
+    async def send(reading):
+        nonlocal throttled
+        async with semaphore:
+            while True:
+                started = time.perf_counter()
+                response = await client.post("/iot/metrics", json=reading)
+                if response.status_code != 429:
+                    latencies.append(time.perf_counter() - started)
+                    break
+                throttled += 1
+                await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(reading) for reading in readings))
+    return time.perf_counter() - start, latencies, throttled
+
+async def run_batch(client: httpx.AsyncClient, readings: list, batch_size: int) -> float:
+    """Send readings in batch requests and return elapsed seconds."""
+    start = time.perf_counter()
+    for offset in range(0, len(readings), batch_size):
+        response = await client.post(
+            "/iot/metrics:batch",
+            json={"metrics": readings[offset:offset + batch_size]}
+        )
+        response.raise_for_status()
+        body = response.json()
+        if body["rejected"]:
+            print(f"⚠️  {body['rejected']} readings rejected in batch at offset {offset}")
+    return time.perf_counter() - start
+
+async def main():
+    """Run both ingest paths and print readings/sec."""
+    args = parse_args()
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60.0) as client:
+        token, user_id = await login(client, args.email, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        animal_ids = await seed_animals(user_id, args.animals)
+        readings = [random_reading(random.choice(animal_ids)) for _ in range(args.readings)]
+
+        single_elapsed, latencies, throttled = await run_single(client, readings, args.concurrency)
+        batch_elapsed = await run_batch(client, readings, args.batch_size)
+
+    single_rate = args.readings / single_elapsed
+    batch_rate = args.readings / batch_elapsed
+
+    print("="*50)
+    print(f"Readings per path:  {args.readings}")
+    print(f"Single-record path: {single_rate:10.0f} readings/sec ({single_elapsed:.2f}s, concurrency {args.concurrency})")
+    print(f"Single-record p50:  {percentile(latencies, 0.50) * 1000:10.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+    if throttled:
+        print(f"⚠️  {throttled} single-record requests got 429 (rate limit or full write-behind queue); rate includes the waits")
+    print(f"Batch path:         {batch_rate:10.0f} readings/sec ({batch_elapsed:.2f}s, batch size {args.batch_size})")
+    print(f"Speedup:            {batch_rate / single_rate:10.1f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark marketplace page latency for three ways of filling in seller and
+animal details.
+
+Seeds throwaway sellers, animals and listings into the configured MongoDB
+(MONGODB_URL / MONGODB_DB from .env), then times fetching one page of
+listings per page size and filling in the details:
+- with two find_one calls per listing (the original endpoints);
+- with one batched $in query per collection;
+- with the copies stored on the listings (what the endpoints do now).
+
+    python benchmarks/bench_listings.py --listings 2000 --sizes 10,25,50,100
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from common import percentile
+from app.api.v1.marketplace import _listing_responses
+from app.database import close_mongo_connection, connect_to_mongo, get_collection
+from app.models.listing import ListingResponse
+from app.services.listing_read_model import listing_details, listing_read_model
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Time listing page reads")
+    parser.add_argument("--listings", type=int, default=2000, help="Listings to seed")
+    parser.add_argument("--sellers", type=int, default=200, help="Sellers to spread them over")
+    parser.add_argument("--sizes", default="10,25,50,100", help="Comma separated page sizes")
+    parser.add_argument("--repeat", type=int, default=30, help="Pages fetched per size and method")
+    return parser.parse_args()
+
+async def enrich_one_by_one(listings: list) -> list:
+    """The previous enrichment: two sequential find_one calls per listing."""
+    animals_collection = get_collection("animals")
+    users_collection = get_collection("users")
+    responses = []
+    for listing in listings:
+        listing["_id"] = str(listing["_id"])
+        animal = await animals_collection.find_one({"_id": ObjectId(listing["animal_id"])})
+        seller = await users_collection.find_one({"_id": ObjectId(listing["seller_id"])})
+        responses.append(ListingResponse(**{
+            **listing,
+            "seller_name": seller["name"] if seller else None,
+            "animal_name": animal["name"] if animal else None,
+            "animal_health_score": animal["health_score"] if animal else None,
+        }))
+    return responses
+
+async def enrich_batched(listings: list) -> list:
+    """One $in query per collection for the whole page."""
+    details = await listing_read_model.details_for(listings)
+    return [ListingResponse(**{**listing, "_id": str(listing["_id"]), **extra}) for listing, extra in zip(listings, details)]
+
+async def stored(listings: list) -> list:
+    """Details already on the listing documents."""
+    return _listing_responses(listings)
+
+async def seed(run_id: str, listings: int, sellers: int) -> dict:
+    """Insert sellers, one animal per listing and the listings."""
+    now = datetime.utcnow()
+    users = [
+        {
+            "email": f"bench-{run_id}-{i}@example.com", "name": f"Seller {i}", "phone": "0000000000",
+            "role": "farmer", "hashed_password": "-", "is_active": True, "created_at": now, "updated_at": now,
+        }
+        for i in range(sellers)
+    ]
+    user_ids = [str(i) for i in (await get_collection("users").insert_many(users)).inserted_ids]
+    names = {user_id: user["name"] for user_id, user in zip(user_ids, users)}
+
+    animals = [
+        {
+            "name": f"bench-{i}", "species": "cattle", "breed": "holstein", "dob": datetime(2022, 1, 1),
+            "weight": 450.0, "location": "Benchmark Farm", "owner_id": random.choice(user_ids),
+            "health_score": 80.0, "bench": run_id, "created_at": now, "updated_at": now,
+        }
+        for i in range(listings)
+    ]
+    animal_result = await get_collection("animals").insert_many(animals)
+
+    documents = [
+        {
+            "animal_id": str(animal_id), "seller_id": animal["owner_id"], "title": f"Cow {i}",
+            "description": "Healthy benchmark cow for sale", "price": 1000.0 + i, "location": "Benchmark Farm",
+            "status": "active", "views": 0, "offers": 0, "bench": run_id,
+            "created_at": now - timedelta(seconds=i), "updated_at": now,
+            **listing_details(animal, names[animal["owner_id"]]),
+        }
+        for i, (animal_id, animal) in enumerate(zip(animal_result.inserted_ids, animals))
+    ]
+    await get_collection("listings").insert_many(documents)
+    return {"users": [ObjectId(i) for i in user_ids]}
+
+async def time_pages(run_id: str, size: int, repeat: int, enrich) -> list:
+    """Latency of fetching and enriching random pages."""
+    listings_collection = get_collection("listings")
+    latencies = []
+    for _ in range(repeat):
+        skip = random.randrange(0, 1000)
+        started = time.perf_counter()
+        cursor = listings_collection.find({"bench": run_id}).skip(skip).limit(size).sort("created_at", -1)
+        page = await enrich(await cursor.to_list(length=size))
+        latencies.append(time.perf_counter() - started)
+        assert len(page) == size
+    return latencies
+
+async def main():
+    """Time each strategy for each page size."""
+    args = parse_args()
+    sizes = [int(value) for value in args.sizes.split(",")]
+    run_id = uuid.uuid4().hex[:8]
+
+    await connect_to_mongo()
+    seeded = await seed(run_id, args.listings, args.sellers)
+    rows = []
+    try:
+        for size in sizes:
+            for label, enrich in (("find_one", enrich_one_by_one), ("batched", enrich_batched), ("stored", stored)):
+                await time_pages(run_id, size, 3, enrich)  # warm up
+                rows.append((size, label, await time_pages(run_id, size, args.repeat, enrich)))
+    finally:
+        await get_collection("listings").delete_many({"bench": run_id})
+        await get_collection("animals").delete_many({"bench": run_id})
+        await get_collection("users").delete_many({"_id": {"$in": seeded["users"]}})
+        await close_mongo_connection()
+
+    print("="*48)
+    print(f"{'page size':>9} {'method':>9} {'p50 ms':>9} {'p99 ms':>9} {'queries':>8}")
+    for size, label, latencies in rows:
+        queries = 1 + {"find_one": 2 * size, "batched": 2, "stored": 0}[label]
+        print(
+            f"{size:>9} {label:>9} {percentile(latencies, 0.50) * 1000:>9.2f} "
+            f"{percentile(latencies, 0.99) * 1000:>9.2f} {queries:>8}"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark event-loop responsiveness while a burst of logins is hashed.
+
+Runs the API in-process (no server needed) against the configured MongoDB
+(MONGODB_URL / MONGODB_DB from .env). A throwaway user is created, then
+``--logins`` concurrent POST /api/v1/auth/login requests are fired while a
+probe measures how late the event loop wakes up and how long GET /health
+takes. The burst is run once with bcrypt on the event loop and once on the
+password hashing pool.
+
+    python benchmarks/bench_login_burst.py --logins 200 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+
+from common import percentile
+from app.api.v1 import auth
+from app.auth.jwt import get_password_hash
+from app.auth.passwords import PasswordHasher
+from app.config import settings
+from app.database import close_mongo_connection, connect_to_mongo, get_collection
+from app.main import app
+
+PASSWORD = "bench-password"
+PROBE_INTERVAL = 0.005
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Measure event-loop lag during a login burst")
+    parser.add_argument("--logins", type=int, default=200, help="Logins in the burst")
+    parser.add_argument("--concurrency", type=int, default=settings.password_hash_concurrency, help="bcrypt worker threads")
+    return parser.parse_args()
+
+async def probe(client: httpx.AsyncClient, done: asyncio.Event) -> tuple:
+    """Sample loop wake-up delay and /health latency until the burst ends."""
+    lags = []
+    health = []
+    while not done.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(max(time.perf_counter() - started - PROBE_INTERVAL, 0))
+
+        started = time.perf_counter()
+        response = await client.get("/health")
+        health.append(time.perf_counter() - started)
+        response.raise_for_status()
+    return lags, health
+
+async def burst(client: httpx.AsyncClient, email: str, logins: int) -> dict:
+    """Fire all logins at once and probe the loop while they run."""
+    done = asyncio.Event()
+    probe_task = asyncio.create_task(probe(client, done))
+
+    async def login():
+        response = await client.post("/api/v1/auth/login", json={"email": email, "password": PASSWORD})
+        return response.status_code
+
+    start = time.perf_counter()
+    codes = await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    lags, health = await probe_task
+    return {
+        "rate": logins / elapsed,
+        "ok": codes.count(200),
+        "rejected": codes.count(503),
+        "lag_p50_ms": percentile(lags, 0.50) * 1000,
+        "lag_max_ms": max(lags) * 1000,
+        "health_p50_ms": percentile(health, 0.50) * 1000,
+        "health_p99_ms": percentile(health, 0.99) * 1000,
+        "probes": len(health),
+    }
+
+async def main():
+    """Run the same burst with inline and pooled hashing."""
+    args = parse_args()
+    # Every login comes from one client address
+    settings.rate_limit_enabled = False
+
+    await connect_to_mongo()
+    users_collection = get_collection("users")
+    now = datetime.utcnow()
+    email = f"bench-login-{uuid.uuid4().hex[:8]}@example.com"
+    result = await users_collection.insert_one({
+        "email": email,
+        "name": "Login Benchmark",
+        "phone": "0000000000",
+        "role": "farmer",
+        "hashed_password": get_password_hash(PASSWORD),
+        "kyc_status": "pending",
+        "is_active": True,
+        "created_at": now,
+        "updated_at": now,
+    })
+
+    rows = []
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for label, concurrency in (("inline", 0), ("pool", args.concurrency)):
+                # A long queue timeout so the burst measures lag, not rejections
+                hasher = PasswordHasher(concurrency, queue_timeout=3600)
+                auth.password_hasher = hasher
+                rows.append((label, concurrency, await burst(client, email, args.logins)))
+                hasher.shutdown()
+    finally:
+        await users_collection.delete_one({"_id": result.inserted_id})
+        await close_mongo_connection()
+
+    print("="*86)
+    print(
+        f"{'hashing':>7} {'threads':>7} {'logins/s':>9} {'ok':>5} {'503':>5} "
+        f"{'lag p50':>8} {'lag max':>8} {'health p50':>11} {'health p99':>11} {'probes':>7}"
+    )
+    for label, concurrency, stats in rows:
+        print(
+            f"{label:>7} {concurrency:>7} {stats['rate']:>9.1f} {stats['ok']:>5} {stats['rejected']:>5} "
+            f"{stats['lag_p50_ms']:>8.2f} {stats['lag_max_ms']:>8.2f} "
+            f"{stats['health_p50_ms']:>11.2f} {stats['health_p99_ms']:>11.2f} {stats['probes']:>7}"
+        )
+    print("(lag and health latency in ms)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
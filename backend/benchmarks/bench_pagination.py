@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark deep-page latency: skip/limit vs keyset (after) pagination.
+
+Seeds one synthetic seller with many listings into the configured MongoDB
+(MONGODB_URL / MONGODB_DB from .env) and runs the same query as
+GET /marketplace/my/listings for increasingly deep pages, once with
+.skip((page - 1) * size) and once with the after token of the previous
+page. Indexes are created by connect_to_mongo as in the API.
+
+    python benchmarks/bench_pagination.py --listings 200000 --pages 1,10,100,1000,10000
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from common import percentile
+from app.api.v1.marketplace import LISTINGS_SORT
+from app.database import close_mongo_connection, connect_to_mongo, get_collection
+from app.pagination import decode_cursor, encode_cursor, keyset_filter
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Time deep pages with skip and keyset pagination")
+    parser.add_argument("--listings", type=int, default=200000, help="Listings to seed")
+    parser.add_argument("--size", type=int, default=20, help="Page size")
+    parser.add_argument("--pages", default="1,10,100,1000,5000", help="Comma separated page numbers")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed fetches per page and method")
+    return parser.parse_args()
+
+async def seed(seller_id: str, count: int):
+    """Insert listings with distinct, descending created_at values in batches."""
+    listings_collection = get_collection("listings")
+    now = datetime.utcnow()
+    batch = []
+    for i in range(count):
+        batch.append({
+            "animal_id": str(ObjectId()), "seller_id": seller_id, "title": f"Cow {i}",
+            "description": "Synthetic pagination listing", "price": 1000.0, "location": "Benchmark Farm",
+            "status": "active", "views": 0, "offers": 0, "seller_name": "Bench Seller",
+            "animal_name": f"bench-{i}", "animal_health_score": 80.0,
+            "created_at": now - timedelta(milliseconds=i), "updated_at": now,
+        })
+        if len(batch) == 10000:
+            await listings_collection.insert_many(batch)
+            batch = []
+    if batch:
+        await listings_collection.insert_many(batch)
+
+async def time_query(query: dict, size: int, skip: int, repeat: int) -> list:
+    """Latency of fetching one page."""
+    listings_collection = get_collection("listings")
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cursor = listings_collection.find(query).sort(LISTINGS_SORT).skip(skip).limit(size + 1)
+        documents = await cursor.to_list(length=size + 1)
+        latencies.append(time.perf_counter() - started)
+        assert documents
+    return latencies
+
+async def token_before(seller_id: str, page: int, size: int) -> str:
+    """after token a client would hold when asking for the given page (found untimed)."""
+    cursor = get_collection("listings").find({"seller_id": seller_id}, {"created_at": 1}).sort(LISTINGS_SORT)
+    last = await cursor.skip((page - 1) * size - 1).limit(1).to_list(length=1)
+    return encode_cursor(last[0]["created_at"], last[0]["_id"])
+
+async def main():
+    """Time each page with both methods."""
+    args = parse_args()
+    pages = [int(value) for value in args.pages.split(",")]
+    seller_id = f"bench-{uuid.uuid4().hex[:8]}"
+
+    await connect_to_mongo()
+    rows = []
+    try:
+        await seed(seller_id, args.listings)
+        for page in pages:
+            if (page - 1) * args.size >= args.listings:
+                continue
+            skip_query = {"seller_id": seller_id}
+            skip_latencies = await time_query(skip_query, args.size, (page - 1) * args.size, args.repeat)
+
+            keyset_query = {"seller_id": seller_id}
+            if page > 1:
+                keyset_query.update(keyset_filter("created_at", *decode_cursor(await token_before(seller_id, page, args.size))))
+            keyset_latencies = await time_query(keyset_query, args.size, 0, args.repeat)
+            rows.append((page, skip_latencies, keyset_latencies))
+    finally:
+        await get_collection("listings").delete_many({"seller_id": seller_id})
+        await close_mongo_connection()
+
+    print("="*56)
+    print(f"{'page':>7} {'skip p50':>10} {'skip p99':>10} {'after p50':>10} {'after p99':>10}")
+    for page, skip_latencies, keyset_latencies in rows:
+        print(
+            f"{page:>7} {percentile(skip_latencies, 0.50) * 1000:>10.2f} {percentile(skip_latencies, 0.99) * 1000:>10.2f} "
+            f"{percentile(keyset_latencies, 0.50) * 1000:>10.2f} {percentile(keyset_latencies, 0.99) * 1000:>10.2f}"
+        )
+    print("(milliseconds)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
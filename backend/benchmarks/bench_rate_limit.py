@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Measure what the rate limiter costs per request.
+
+Drives the middleware directly over ASGI around an empty app, so only the
+limiter's own work is timed: policy matching, bearer token verification
+for per-user keys and the bucket update. With --mongo the shared MongoDB
+bucket store (MONGODB_URL / MONGODB_DB from .env) is timed as well.
+
+    python benchmarks/bench_rate_limit.py --requests 100000 --clients 1,10000
+"""
+
+import argparse
+import asyncio
+import time
+
+from common import percentile
+from app.auth.jwt import create_access_token
+from app.config import settings
+from app.database import close_mongo_connection, connect_to_mongo
+from app.rate_limit import (
+    MemoryBucketStore, MongoBucketStore, RateLimitMiddleware, RateLimitPolicy, RateLimiter
+)
+
+# Large enough that nothing is limited; limited requests are cheaper still
+POLICIES = [
+    RateLimitPolicy("auth", ("POST",), "/api/v1/auth/", 1e9, 10**9, per_user=False),
+    RateLimitPolicy("iot_ingest", ("POST",), "/api/v1/iot/metrics", 1e9, 10**9, per_user=True),
+]
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Measure rate limiter overhead")
+    parser.add_argument("--requests", type=int, default=100000, help="Requests per run")
+    parser.add_argument("--clients", default="1,10000", help="Comma separated distinct client counts")
+    parser.add_argument("--mongo", action="store_true", help="Also time the MongoDB bucket store")
+    parser.add_argument("--mongo-requests", type=int, default=2000, help="Takes against MongoDB")
+    return parser.parse_args()
+
+async def empty_app(scope, receive, send):
+    """Smallest possible ASGI response."""
+    await send({"type": "http.response.start", "status": 204, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+async def send(message):
+    pass
+
+def make_scopes(clients: int, path: str, method: str, tokens: bool) -> list:
+    """One ASGI scope per simulated client."""
+    scopes = []
+    for i in range(clients):
+        headers = []
+        if tokens:
+            token = create_access_token({"sub": f"c{i}@example.com", "user_id": f"{i:024x}"})
+            headers.append((b"authorization", f"Bearer {token}".encode()))
+        scopes.append({
+            "type": "http",
+            "method": method,
+            "path": path,
+            "headers": headers,
+            "client": (f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", 40000),
+        })
+    return scopes
+
+async def time_requests(asgi, scopes: list, requests: int) -> float:
+    """Mean microseconds per request through an ASGI callable."""
+    count = len(scopes)
+    start = time.perf_counter()
+    for i in range(requests):
+        await asgi(scopes[i % count], receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+async def time_mongo(requests: int) -> dict:
+    """Latency of single takes against the shared store."""
+    store = MongoBucketStore("rate_limits_bench")
+    latencies = []
+    for i in range(requests):
+        started = time.perf_counter()
+        await store.take(f"bench:{i % 100}", 1e9, 10**9)
+        latencies.append(time.perf_counter() - started)
+    return {
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "errors": store.errors,
+    }
+
+async def main():
+    """Compare the bare app with the app behind the limiter."""
+    args = parse_args()
+    settings.rate_limit_enabled = True
+
+    rows = []
+    for clients in [int(value) for value in args.clients.split(",")]:
+        for label, method, path, tokens in (
+            ("no policy", "GET", "/api/v1/animals/", False),
+            ("by ip", "POST", "/api/v1/auth/login", False),
+            ("by user", "POST", "/api/v1/iot/metrics", True),
+        ):
+            scopes = make_scopes(clients, path, method, tokens)
+            store = MemoryBucketStore()
+            limited = RateLimitMiddleware(empty_app, RateLimiter(POLICIES, store))
+            bare = await time_requests(empty_app, scopes, args.requests)
+            with_limiter = await time_requests(limited, scopes, args.requests)
+            rows.append((clients, label, bare, with_limiter, len(store)))
+
+    print("="*62)
+    print(f"{'clients':>8} {'policy':>10} {'bare us':>9} {'limited us':>11} {'overhead us':>12} {'buckets':>7}")
+    for clients, label, bare, with_limiter, buckets in rows:
+        print(
+            f"{clients:>8} {label:>10} {bare:>9.2f} {with_limiter:>11.2f} "
+            f"{with_limiter - bare:>12.2f} {buckets:>7}"
+        )
+
+    if args.mongo:
+        await connect_to_mongo()
+        try:
+            stats = await time_mongo(args.mongo_requests)
+        finally:
+            await close_mongo_connection()
+        print(
+            f"MongoDB bucket store: p50 {stats['p50_ms']:.3f} ms, "
+            f"p99 {stats['p99_ms']:.3f} ms, errors {stats['errors']}"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
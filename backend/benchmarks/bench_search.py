@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark listing text search latency at catalogue scale.
+
+Seeds synthetic listings with generated titles and descriptions into the
+configured MongoDB (MONGODB_URL / MONGODB_DB from .env) and times the
+same searches GET /marketplace/listings?q= runs: common and rare words by
+relevance and by newest, with status and price filters, and misspelt
+words that fall back to title trigrams, for which it also reports how
+many listings the trigram prefilter reads before scoring. Indexes are
+created by connect_to_mongo as in the API.
+
+    python benchmarks/bench_search.py --listings 1000000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from common import percentile
+from app.api.v1.marketplace import _search_text, _trigram_prefilter
+from app.config import settings
+from app.database import close_mongo_connection, connect_to_mongo, get_collection
+from app.models.listing import ListingSort
+from app.search import text_trigrams
+
+BREEDS = [
+    "holstein", "jersey", "gir", "sahiwal", "murrah", "tharparkar", "rathi", "kankrej",
+    "ongole", "hallikar", "jamunapari", "beetal", "sirohi", "barbari", "osmanabadi", "mehsana",
+]
+SPECIES = ["cow", "buffalo", "heifer", "bull", "goat", "calf"]
+ADJECTIVES = ["healthy", "young", "pregnant", "milking", "vaccinated", "calm", "strong", "purebred"]
+PHRASES = [
+    "gives {n} litres a day", "second lactation", "vaccinated against FMD", "dewormed last month",
+    "good temperament", "raised on green fodder", "ready for breeding", "papers available",
+]
+
+# (label, q, sort, filters)
+QUERIES = [
+    ("common word", "healthy", ListingSort.RELEVANCE, {}),
+    ("common word newest", "healthy", ListingSort.NEWEST, {}),
+    ("two words", "murrah buffalo", ListingSort.RELEVANCE, {}),
+    ("rare word", "tharparkar", ListingSort.RELEVANCE, {}),
+    ("with filters", "jersey milking", ListingSort.RELEVANCE, {"status": "active", "price": {"$lte": 40000}}),
+    ("misspelt", "holstien", ListingSort.RELEVANCE, {}),
+    ("misspelt two words", "sahival buffallo", ListingSort.RELEVANCE, {}),
+]
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Time listing text search")
+    parser.add_argument("--listings", type=int, default=1000000, help="Listings to seed")
+    parser.add_argument("--size", type=int, default=20, help="Page size")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed searches per query")
+    return parser.parse_args()
+
+def synthetic_listing(run_id: str, i: int, now: datetime) -> dict:
+    """One listing with a generated title and description."""
+    title = f"{random.choice(ADJECTIVES).title()} {random.choice(BREEDS).title()} {random.choice(SPECIES)}"
+    description = ", ".join(
+        phrase.format(n=random.randint(4, 20)) for phrase in random.sample(PHRASES, 3)
+    ).capitalize() + "."
+    return {
+        "animal_id": str(ObjectId()), "seller_id": "bench-seller", "title": title,
+        "description": description, "price": float(random.randint(10, 120) * 1000),
+        "location": "Benchmark Farm", "status": random.choice(["active"] * 9 + ["sold"]),
+        "views": 0, "offers": 0, "bench": run_id, "search_trigrams": text_trigrams(title),
+        "created_at": now - timedelta(seconds=i), "updated_at": now,
+    }
+
+async def seed(run_id: str, count: int):
+    """Insert listings in batches."""
+    listings_collection = get_collection("listings")
+    now = datetime.utcnow()
+    batch = []
+    for i in range(count):
+        batch.append(synthetic_listing(run_id, i, now))
+        if len(batch) == 10000:
+            await listings_collection.insert_many(batch)
+            batch = []
+    if batch:
+        await listings_collection.insert_many(batch)
+
+async def time_query(run_id: str, q: str, sort: ListingSort, filters: dict, size: int, repeat: int) -> tuple:
+    """Latency of the first page of a search, and its total."""
+    latencies = []
+    total = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await _search_text({"bench": run_id, **filters}, q, sort, 1, size)
+        latencies.append(time.perf_counter() - started)
+        total = result.total
+    return latencies, total
+
+async def count_candidates(run_id: str, q: str, filters: dict) -> int:
+    """Listings the typo-tolerant search scores for q, after the prefilter and candidate limit."""
+    prefilter = await _trigram_prefilter(text_trigrams(q))
+    return await get_collection("listings").count_documents(
+        {"bench": run_id, **filters, "search_trigrams": prefilter},
+        limit=settings.listing_search_max_candidates
+    )
+
+async def main():
+    """Time each query against the seeded catalogue."""
+    args = parse_args()
+    run_id = uuid.uuid4().hex[:8]
+
+    await connect_to_mongo()
+    rows = []
+    try:
+        started = time.perf_counter()
+        await seed(run_id, args.listings)
+        print(f"Seeded {args.listings} listings in {time.perf_counter() - started:.1f}s")
+        for label, q, sort, filters in QUERIES:
+            await time_query(run_id, q, sort, filters, args.size, 2)  # warm up
+            latencies, total = await time_query(run_id, q, sort, filters, args.size, args.repeat)
+            candidates = await count_candidates(run_id, q, filters) if label.startswith("misspelt") else None
+            rows.append((label, q, total, candidates, latencies))
+    finally:
+        await get_collection("listings").delete_many({"bench": run_id})
+        await close_mongo_connection()
+
+    print("="*82)
+    print(f"{'query':>20} {'q':>18} {'matches':>9} {'scored':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for label, q, total, candidates, latencies in rows:
+        scored = "-" if candidates is None else candidates
+        print(
+            f"{label:>20} {q:>18} {total:>9} {scored:>9} "
+            f"{percentile(latencies, 0.50) * 1000:>9.2f} {percentile(latencies, 0.99) * 1000:>9.2f}"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,39 @@
+"""
+Helpers shared by the benchmark scripts.
+
+login and percentile come from the simulator's client module.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import settings
+from simulator import client as simulator_client
+from simulator.client import login, percentile
+
+def random_reading(animal_id: str) -> dict:
+    """Generate one valid IoTMetricsCreate payload."""
+    return {
+        "animal_id": animal_id,
+        "temperature": round(random.uniform(37.0, 40.0), 1),
+        "humidity": round(random.uniform(50.0, 80.0), 1),
+        "activity_level": round(random.uniform(0.0, 100.0), 1),
+        "feeding_status": random.choice(["fed", "hungry", "overfed"]),
+        "water_level": round(random.uniform(30.0, 100.0), 1),
+        "battery_level": round(random.uniform(20.0, 100.0), 1),
+        "signal_strength": random.choice(["weak", "medium", "strong"]),
+    }
+
+def get_database():
+    """Open the configured MongoDB database directly (for seeding)."""
+    client = AsyncIOMotorClient(settings.mongodb_url)
+    return client, client[settings.mongodb_db]
+
+async def seed_animals(owner_id: str, count: int) -> list:
+    """Insert throwaway animals owned by the benchmark user."""
+    return await simulator_client.seed_animals(owner_id, count, prefix="bench", location="Benchmark Farm")
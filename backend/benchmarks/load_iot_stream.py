@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Load test the live IoT stream: ramp up concurrent SSE subscribers while
+readings are ingested through the batch endpoint, and report how quickly
+readings reach the subscribers at each step.
+
+Requires a running API (see start_backend.py), a farmer account and access to
+the same MongoDB (MONGODB_URL / MONGODB_DB from .env) to seed test animals.
+Latency is measured against the reading timestamp set by the server, so run
+the script on the API host (or a host with a synchronized clock).
+
+    python benchmarks/load_iot_stream.py --email farmer@example.com --password secret --steps 100,500,1000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+
+import httpx
+
+from common import login, percentile, random_reading, seed_animals
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Load test the live IoT stream")
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--email", required=True, help="Farmer account email")
+    parser.add_argument("--password", required=True, help="Farmer account password")
+    parser.add_argument("--animals", type=int, default=20, help="Animals readings are spread over")
+    parser.add_argument("--steps", default="50,200,500,1000", help="Comma separated subscriber counts")
+    parser.add_argument("--rate", type=int, default=200, help="Readings ingested per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of ingest per step")
+    return parser.parse_args()
+
+class Subscriber:
+    """One SSE connection and the delivery latencies it observed."""
+
+    def __init__(self):
+        self.latencies = []
+        self.ready = asyncio.Event()
+        self.error = None
+
+    async def run(self, client: httpx.AsyncClient, animal_ids: list):
+        """Read events until cancelled."""
+        try:
+            async with client.stream("GET", "/iot/stream", params={"animal_ids": ",".join(animal_ids)}) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    self.ready.set()
+                    if not line.startswith("data: "):
+                        continue
+                    reading = json.loads(line[6:])
+                    sent_at = datetime.fromisoformat(reading["timestamp"])
+                    self.latencies.append((datetime.utcnow() - sent_at).total_seconds() * 1000)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = str(e) or type(e).__name__
+            self.ready.set()
+
+async def publish(client: httpx.AsyncClient, animal_ids: list, rate: int, duration: float) -> int:
+    """Ingest readings in ten batches per second and return how many were sent."""
+    batch_size = max(1, rate // 10)
+    sent = 0
+    deadline = time.perf_counter() + duration
+
+    while time.perf_counter() < deadline:
+        tick = time.perf_counter()
+        readings = [random_reading(random.choice(animal_ids)) for _ in range(batch_size)]
+        response = await client.post("/iot/metrics:batch", json={"metrics": readings})
+        response.raise_for_status()
+        sent += response.json()["accepted"]
+        await asyncio.sleep(max(0.0, 0.1 - (time.perf_counter() - tick)))
+
+    return sent
+
+async def run_step(args, token: str, animal_ids: list, count: int) -> dict:
+    """Hold count subscribers open while publishing, then collect their latencies."""
+    limits = httpx.Limits(max_connections=count + 10, max_keepalive_connections=count + 10)
+    headers = {"Authorization": f"Bearer {token}"}
+    timeout = httpx.Timeout(60.0, read=None)
+
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, limits=limits, timeout=timeout) as client:
+        subscribers = [Subscriber() for _ in range(count)]
+        tasks = [asyncio.create_task(subscriber.run(client, animal_ids)) for subscriber in subscribers]
+        await asyncio.wait_for(asyncio.gather(*(subscriber.ready.wait() for subscriber in subscribers)), 60)
+
+        sent = await publish(client, animal_ids, args.rate, args.duration)
+        await asyncio.sleep(1)  # let the last events drain
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies = [latency for subscriber in subscribers for latency in subscriber.latencies]
+    return {
+        "subscribers": count,
+        "sent": sent,
+        "delivered": len(latencies),
+        "errors": sum(1 for subscriber in subscribers if subscriber.error),
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+    }
+
+async def main():
+    """Ramp through the subscriber steps and print one line per step."""
+    args = parse_args()
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60.0) as client:
+        token, user_id = await login(client, args.email, args.password)
+
+    animal_ids = await seed_animals(user_id, args.animals)
+    results = []
+    for count in (int(step) for step in args.steps.split(",")):
+        print(f"Running {count} subscribers...")
+        results.append(await run_step(args, token, animal_ids, count))
+
+    print("="*50)
+    print(f"Ingest rate: {args.rate} readings/sec for {args.duration:.0f}s per step")
+    print(f"{'subscribers':>11} {'sent':>8} {'delivered':>10} {'errors':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for result in results:
+        print(
+            f"{result['subscribers']:>11} {result['sent']:>8} {result['delivered']:>10} "
+            f"{result['errors']:>7} {result['p50']:>8.1f} {result['p99']:>8.1f}"
+        )
+    print("Delivered counts below sent x subscribers mean readings were coalesced for slow clients.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Simulate a fleet of IoT collars against a running API and report ingest
+capacity.
+
+Usage (from the backend directory):
+    python -m simulator --email farmer@example.com --password secret \\
+        --collars 5000 --rates 500,1000,2000 --duration 30 --mode both
+
+Each rate is run through the selected ingest paths in turn; the summary
+lists achieved throughput, latency percentiles and error rates. Use --json
+to keep the results for comparison between releases.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+
+import httpx
+
+from simulator.client import login, seed_animals
+from simulator.fleet import Fleet
+from simulator.load import IngestLoad, owned_animal_ids
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(prog="python -m simulator", description="IoT collar fleet simulator")
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--email", required=True, help="Farmer account email")
+    parser.add_argument("--password", required=True, help="Farmer account password")
+    parser.add_argument("--collars", type=int, default=1000, help="Virtual collars in the fleet")
+    parser.add_argument("--rates", default="200,500,1000", help="Comma separated target readings/sec")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per rate and mode")
+    parser.add_argument("--mode", choices=["single", "batch", "both"], default="both")
+    parser.add_argument("--batch-size", type=int, default=500, help="Readings per batch request")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight")
+    parser.add_argument("--step-seconds", type=float, default=300, help="Simulated seconds per collar report")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for reproducible fleets")
+    parser.add_argument(
+        "--seed-animals", action="store_true",
+        help="Insert one animal per collar directly into MongoDB (MONGODB_URL / MONGODB_DB from .env)"
+    )
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    return parser.parse_args()
+
+def print_summary(summaries: list):
+    """Print one line per run."""
+    print("="*50)
+    print(
+        f"{'mode':>6} {'target/s':>9} {'achieved/s':>11} {'requests':>9} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req err':>8} {'429':>8} {'rejected':>9}"
+    )
+    for summary in summaries:
+        print(
+            f"{summary['mode']:>6} {summary['target_rate']:>9.0f} {summary['achieved_rate']:>11.1f} "
+            f"{summary['requests']:>9} {summary['latency_p50_ms']:>8.1f} {summary['latency_p95_ms']:>8.1f} "
+            f"{summary['latency_p99_ms']:>8.1f} {summary['request_error_rate']:>8.2%} "
+            f"{summary['throttled_rate']:>8.2%} {summary['reading_reject_rate']:>9.2%}"
+        )
+        if summary["errors"]:
+            print(f"{'':>6} errors: {summary['errors']}")
+
+async def main():
+    """Build the fleet, run every rate through the selected paths and report."""
+    args = parse_args()
+    modes = ["single", "batch"] if args.mode == "both" else [args.mode]
+    rates = [float(rate) for rate in args.rates.split(",")]
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60.0, limits=limits) as client:
+        token, user_id = await login(client, args.email, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        if args.seed_animals:
+            animal_ids = await seed_animals(user_id, args.collars)
+        else:
+            animal_ids = await owned_animal_ids(client, args.collars)
+        if not animal_ids:
+            sys.exit("The account owns no animals; rerun with --seed-animals")
+        if len(animal_ids) < args.collars:
+            print(f"⚠️  {len(animal_ids)} animals for {args.collars} collars; collars will share animals")
+
+        fleet = Fleet(animal_ids, args.collars, step_seconds=args.step_seconds, seed=args.seed)
+        load = IngestLoad(client, fleet, concurrency=args.concurrency)
+
+        summaries = []
+        for rate in rates:
+            for mode in modes:
+                print(f"Running {mode} path at {rate:.0f} readings/sec for {args.duration:.0f}s...")
+                result = await load.run(mode, rate, args.duration, args.batch_size)
+                summaries.append(result.summary())
+
+    print_summary(summaries)
+    print(f"Collar readings produced: {fleet.produced}, dropped by link or battery: {fleet.dropped}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"collars": args.collars, "runs": summaries}, f, indent=2)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+"""
+API and database helpers shared by the simulator and the benchmark scripts.
+"""
+
+from datetime import datetime
+from typing import List
+
+import httpx
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> tuple:
+    """Log in and return (bearer token, user id)."""
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    body = response.json()
+    return body["access_token"], body["user"]["id"]
+
+async def seed_animals(owner_id: str, count: int, prefix: str = "sim", location: str = "Simulator Farm") -> list:
+    """Insert complete throwaway animal documents owned by the given user."""
+    # Only seeding needs direct database access
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from app.config import settings
+
+    client = AsyncIOMotorClient(settings.mongodb_url)
+    now = datetime.utcnow()
+    animals = [
+        {
+            "name": f"{prefix}-{i}",
+            "species": "cattle",
+            "breed": "holstein",
+            "dob": datetime(2022, 1, 1),
+            "weight": 450.0,
+            "location": location,
+            "owner_id": owner_id,
+            "photos": [],
+            "health_score": 80.0,
+            "vaccination": [],
+            "status": "active",
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+    try:
+        result = await client[settings.mongodb_db].animals.insert_many(animals)
+    finally:
+        client.close()
+    return [str(animal_id) for animal_id in result.inserted_ids]
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of numbers (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
@@ -0,0 +1,130 @@
+"""
+Signal model of a single IoT collar.
+
+Each collar keeps a little state so consecutive readings are correlated:
+body temperature follows a per-animal baseline with a circadian swing, slow
+drift and occasional fever episodes; activity follows a day/night cycle and
+warms the animal up; water is drunk faster when active and the trough is
+refilled at feeding times; the battery drains per transmission (faster on a
+weak link) and a dead collar goes silent until its battery is swapped; the
+radio link moves between strengths and short dropouts as a Markov chain.
+"""
+
+import math
+import random
+from typing import Optional
+
+FEEDING_HOURS = (6, 17)
+SIGNAL_STATES = ("strong", "medium", "weak", "offline")
+# Probability of moving from the row state to each column state per reading
+SIGNAL_TRANSITIONS = (
+    (0.90, 0.08, 0.015, 0.005),
+    (0.10, 0.80, 0.08, 0.02),
+    (0.02, 0.18, 0.70, 0.10),
+    (0.05, 0.15, 0.30, 0.50),
+)
+BATTERY_SWAP_HOURS = 12.0
+
+def _clip(value: float, low: float, high: float) -> float:
+    return low if value < low else high if value > high else value
+
+class Collar:
+    """A virtual collar attached to one animal."""
+    __slots__ = (
+        "animal_id", "rng", "baseline", "drift", "activity", "water", "battery",
+        "signal", "last_fed", "fever_hours", "fever_peak", "dead_hours", "hunger_hours"
+    )
+
+    def __init__(self, animal_id: str, rng: random.Random):
+        self.animal_id = animal_id
+        self.rng = rng
+        self.baseline = rng.gauss(38.6, 0.2)
+        self.drift = 0.0
+        self.activity = rng.uniform(10.0, 40.0)
+        self.water = rng.uniform(60.0, 100.0)
+        self.battery = rng.uniform(40.0, 100.0)
+        self.signal = 0
+        self.last_fed = 0.0
+        self.fever_hours = 0.0
+        self.fever_peak = 0.0
+        self.dead_hours = 0.0
+        self.hunger_hours = rng.uniform(6.0, 10.0)  # hours after feeding until hungry
+
+    def reading(self, sim_hours: float, step_hours: float, ambient_humidity: float) -> Optional[dict]:
+        """Advance the collar by one reporting step and return its reading.
+
+        Returns None when the collar has nothing to send (dropped link or
+        dead battery).
+        """
+        rng = self.rng
+        hour = sim_hours % 24
+
+        if self.dead_hours > 0:
+            self.dead_hours -= step_hours
+            if self.dead_hours <= 0:
+                self.battery = 100.0
+            return None
+
+        # Day/night activity with grazing bursts, damped while feverish
+        daylight = max(0.0, math.sin(math.pi * (hour - 6) / 13)) if 6 <= hour <= 19 else 0.0
+        target = 15 + 55 * daylight + (25 if rng.random() < 0.05 else 0)
+        if self.fever_hours > 0:
+            target *= 0.4
+        self.activity = _clip(0.8 * self.activity + 0.2 * target + rng.gauss(0, 4), 0.0, 100.0)
+
+        # Fever episodes ramp up and back down over their duration
+        if self.fever_hours <= 0 and rng.random() < step_hours / 2000:
+            self.fever_hours = rng.uniform(6, 48)
+            self.fever_peak = rng.uniform(0.8, 2.0)
+        fever = 0.0
+        if self.fever_hours > 0:
+            fever = self.fever_peak * min(1.0, self.fever_hours / 6)
+            self.fever_hours -= step_hours
+
+        self.drift += -0.1 * self.drift + rng.gauss(0, 0.03)
+        circadian = 0.3 * math.sin(2 * math.pi * (hour - 10) / 24)
+        temperature = self.baseline + circadian + self.drift + fever + 0.006 * (self.activity - 40)
+
+        # Trough refills at feeding times; intake follows activity and heat
+        for feeding_hour in FEEDING_HOURS:
+            if hour - step_hours < feeding_hour <= hour:
+                self.water = 100.0
+                self.last_fed = sim_hours
+        self.water = _clip(
+            self.water - step_hours * (1.5 + 0.04 * self.activity + 2 * max(0.0, temperature - 39)), 0.0, 100.0
+        )
+
+        since_fed = sim_hours - self.last_fed
+        if since_fed < 1 and rng.random() < 0.05:
+            feeding_status = "overfed"
+        elif since_fed > self.hunger_hours:
+            feeding_status = "hungry"
+        else:
+            feeding_status = "fed"
+
+        # Radio link; offline readings are dropped
+        draw = rng.random()
+        for state, probability in enumerate(SIGNAL_TRANSITIONS[self.signal]):
+            draw -= probability
+            if draw < 0:
+                self.signal = state
+                break
+        if SIGNAL_STATES[self.signal] == "offline":
+            return None
+
+        self.battery -= 0.01 + (0.03 if self.signal == 2 else 0.0) + 0.002 * step_hours
+        if self.battery <= 0:
+            self.battery = 0.0
+            self.dead_hours = BATTERY_SWAP_HOURS
+            return None
+
+        return {
+            "animal_id": self.animal_id,
+            "temperature": round(_clip(temperature, 30.0, 45.0), 2),
+            "humidity": round(_clip(ambient_humidity + rng.gauss(0, 2), 0.0, 100.0), 1),
+            "activity_level": round(self.activity, 1),
+            "feeding_status": feeding_status,
+            "water_level": round(self.water, 1),
+            "battery_level": round(self.battery, 2),
+            "signal_strength": SIGNAL_STATES[self.signal],
+        }
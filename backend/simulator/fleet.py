@@ -0,0 +1,65 @@
+"""
+A fleet of virtual collars reporting in round-robin order.
+"""
+
+import math
+import random
+from typing import List
+
+from simulator.collar import Collar
+
+class Fleet:
+    """Thousands of collars sharing one simulated clock.
+
+    Every collar reports once per round and each round advances simulated
+    time by ``step_seconds``, so a short run can still cover whole days of
+    activity and temperature cycles. Collars attach to the given animals
+    round-robin when there are more collars than animals.
+    """
+
+    def __init__(self, animal_ids: List[str], collars: int, step_seconds: float = 300, seed: int = 0):
+        if not animal_ids:
+            raise ValueError("The fleet needs at least one animal")
+
+        self.rng = random.Random(seed)
+        self.collars = [
+            Collar(animal_ids[index % len(animal_ids)], random.Random(self.rng.random()))
+            for index in range(collars)
+        ]
+        self.step_hours = step_seconds / 3600
+        self.sim_hours = self.rng.uniform(0, 24)
+        self.position = 0
+        self.humidity = self._ambient_humidity()
+        self.produced = 0
+        self.dropped = 0
+
+    def _ambient_humidity(self) -> float:
+        """Herd-wide humidity: humid nights, dry afternoons."""
+        hour = self.sim_hours % 24
+        return 65 + 15 * math.cos(2 * math.pi * (hour - 4) / 24)
+
+    def readings(self, count: int) -> List[dict]:
+        """Take the next count readings, skipping collars that stay silent."""
+        batch = []
+        silent_streak = 0
+        while len(batch) < count:
+            collar = self.collars[self.position]
+            self.position += 1
+            if self.position == len(self.collars):
+                self.position = 0
+                self.sim_hours += self.step_hours
+                self.humidity = self._ambient_humidity()
+
+            reading = collar.reading(self.sim_hours, self.step_hours, self.humidity)
+            if reading is None:
+                self.dropped += 1
+                silent_streak += 1
+                if silent_streak > 10 * len(self.collars):
+                    raise RuntimeError("Every collar in the fleet is silent")
+                continue
+
+            silent_streak = 0
+            batch.append(reading)
+
+        self.produced += len(batch)
+        return batch
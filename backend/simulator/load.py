@@ -0,0 +1,156 @@
+"""
+Drive the IoT ingest API at a target rate and measure what it sustains.
+"""
+
+import asyncio
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+
+from simulator.client import percentile
+from simulator.fleet import Fleet
+
+class LoadResult:
+    """Outcome of one run at one target rate through one ingest path."""
+
+    def __init__(self, mode: str, target_rate: float, batch_size: int):
+        self.mode = mode
+        self.target_rate = target_rate
+        self.batch_size = batch_size
+        self.elapsed = 0.0
+        self.requests = 0
+        self.readings_sent = 0
+        self.readings_accepted = 0
+        self.readings_rejected = 0
+        self.latencies: List[float] = []
+        self.errors: Counter = Counter()
+        self.throttled = 0  # 429s from the rate limiter or a full write-behind queue
+
+    @property
+    def failed_requests(self) -> int:
+        return sum(self.errors.values())
+
+    def summary(self) -> Dict:
+        """Throughput, latency percentiles (ms) and error rates."""
+        elapsed = self.elapsed or 1.0
+        return {
+            "mode": self.mode,
+            "target_rate": self.target_rate,
+            "batch_size": self.batch_size,
+            "duration_s": round(self.elapsed, 2),
+            "requests": self.requests,
+            "readings_sent": self.readings_sent,
+            "achieved_rate": round(self.readings_accepted / elapsed, 1),
+            "latency_p50_ms": round(percentile(self.latencies, 0.50) * 1000, 2),
+            "latency_p95_ms": round(percentile(self.latencies, 0.95) * 1000, 2),
+            "latency_p99_ms": round(percentile(self.latencies, 0.99) * 1000, 2),
+            "request_error_rate": round(self.failed_requests / max(self.requests, 1), 4),
+            "throttled_rate": round(self.throttled / max(self.requests, 1), 4),
+            "reading_reject_rate": round(self.readings_rejected / max(self.readings_sent, 1), 4),
+            "errors": dict(self.errors),
+        }
+
+class IngestLoad:
+    """Open-loop load generator for the single-record and batch ingest paths.
+
+    Requests are issued on a fixed schedule derived from the target rate,
+    with at most ``concurrency`` in flight. When the API cannot keep up the
+    schedule slips, which shows up as an achieved rate below the target.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, fleet: Fleet, concurrency: int = 64):
+        self.client = client
+        self.fleet = fleet
+        self.concurrency = concurrency
+
+    async def run(self, mode: str, rate: float, duration: float, batch_size: int = 500) -> LoadResult:
+        """Send readings at rate readings/sec for duration seconds."""
+        if mode not in ("single", "batch"):
+            raise ValueError(f"Unknown ingest mode: {mode}")
+
+        size = 1 if mode == "single" else batch_size
+        result = LoadResult(mode, rate, size)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        request_rate = rate / size
+        tasks = set()
+
+        async def send(readings: list):
+            try:
+                await self._send(mode, readings, result)
+            finally:
+                semaphore.release()
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        issued = 0
+        while True:
+            now = loop.time() - start
+            if now >= duration:
+                break
+
+            due = int(now * request_rate) + 1 - issued
+            for _ in range(due):
+                await semaphore.acquire()
+                task = asyncio.create_task(send(self.fleet.readings(size)))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                issued += 1
+
+            next_due = issued / request_rate
+            await asyncio.sleep(max(0.0, min(next_due - (loop.time() - start), duration - now)))
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        result.elapsed = loop.time() - start
+        return result
+
+    async def _send(self, mode: str, readings: list, result: LoadResult):
+        """Issue one request and record its latency and outcome."""
+        result.requests += 1
+        result.readings_sent += len(readings)
+        started = time.perf_counter()
+        try:
+            if mode == "single":
+                response = await self.client.post("/iot/metrics", json=readings[0])
+            else:
+                response = await self.client.post("/iot/metrics:batch", json={"metrics": readings})
+        except httpx.HTTPError as e:
+            result.errors[type(e).__name__] += 1
+            result.readings_rejected += len(readings)
+            return
+        finally:
+            result.latencies.append(time.perf_counter() - started)
+
+        if response.status_code == 429:
+            # Throttling is backpressure, not failure; reported on its own
+            result.throttled += 1
+            result.readings_rejected += len(readings)
+            return
+
+        if response.status_code >= 400:
+            result.errors[str(response.status_code)] += 1
+            result.readings_rejected += len(readings)
+            return
+
+        if mode == "single":
+            result.readings_accepted += 1
+        else:
+            body = response.json()
+            result.readings_accepted += body["accepted"]
+            result.readings_rejected += body["rejected"]
+
+async def owned_animal_ids(client: httpx.AsyncClient, limit: Optional[int] = None) -> List[str]:
+    """List the IDs of the logged-in farmer's animals through the API."""
+    animal_ids = []
+    page = 1
+    while limit is None or len(animal_ids) < limit:
+        response = await client.get("/animals/my/animals", params={"page": page, "size": 100})
+        response.raise_for_status()
+        animals = response.json()["animals"]
+        if not animals:
+            break
+        animal_ids.extend(animal["id"] for animal in animals)
+        page += 1
+    return animal_ids[:limit] if limit is not None else animal_ids
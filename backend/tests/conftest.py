@@ -0,0 +1,18 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Run from anywhere: the app package lives in the backend directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mongomock_motor import AsyncMongoMockClient
+
+from app.database import db
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """An empty in-memory database behind get_collection."""
+    database = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(db, "db", database)
+    return database
@@ -0,0 +1,44 @@
+import pytest
+
+from app.gateway.protocol import ProtocolError, parse_auth, parse_datagram_line, parse_reading, split_lines
+
+READING = "t=38.6,h=61,a=42,f=fed,w=80,b=91,s=strong"
+
+def test_parse_short_names():
+    assert parse_reading(READING) == {
+        "temperature": 38.6, "humidity": 61.0, "activity_level": 42.0, "feeding_status": "fed",
+        "water_level": 80.0, "battery_level": 91.0, "signal_strength": "strong",
+    }
+
+def test_parse_long_names_and_spaces():
+    reading = parse_reading(READING.replace("t=", " temperature = ").replace("s=", "signal_strength="))
+    assert reading["temperature"] == 38.6
+    assert reading["signal_strength"] == "strong"
+
+@pytest.mark.parametrize("text, message", [
+    (READING.replace("t=38.6", "t=99"), "temperature: outside"),
+    (READING.replace("t=38.6", "t=warm"), "temperature: not a number"),
+    (READING.replace("f=fed", "f=full"), "feeding_status: expected one of"),
+    (READING.replace("f=fed", "x=1"), "unknown field 'x'"),
+    (READING.replace("h=61", "h"), "unknown field 'h'"),
+    (READING.replace(",b=91", ""), "missing battery_level"),
+])
+def test_parse_rejects(text, message):
+    with pytest.raises(ProtocolError, match=message):
+        parse_reading(text)
+
+def test_parse_auth():
+    assert parse_auth("AUTH collar-1 secret") == ("collar-1", "secret")
+    for line in ("AUTH collar-1", "auth collar-1 secret", "AUTH a b c"):
+        with pytest.raises(ProtocolError):
+            parse_auth(line)
+
+def test_parse_datagram_line():
+    assert parse_datagram_line(f"collar-1 secret {READING}") == ("collar-1", "secret", READING)
+    with pytest.raises(ProtocolError):
+        parse_datagram_line("collar-1 secret")
+
+def test_split_lines_keeps_the_unterminated_rest():
+    lines, rest = split_lines(b"AUTH a b\n\n" + READING.encode() + b"\nt=3")
+    assert lines == ["AUTH a b", READING]
+    assert rest == b"t=3"
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from app.gateway.server import Gateway
+from app.services.ingest_buffer import IngestBuffer
+
+READING = "t=38.6,h=61,a=42,f=fed,w=80,b=91,s=strong"
+ANIMAL_ID = str(ObjectId())
+KEY = "secret"
+
+class FakeRegistry:
+    """Nothing is cached; lookups wait until released and know only the given devices."""
+
+    def __init__(self, devices: dict):
+        self.devices = devices
+        self.lookups = []
+        self.release = asyncio.Event()
+
+    def lookup(self, device_id):
+        return None
+
+    def is_unknown(self, device_id):
+        return False
+
+    async def authenticate(self, device_id, key):
+        self.lookups.append(device_id)
+        await self.release.wait()
+        if device_id not in self.devices:
+            raise ConnectionError("MongoDB unavailable")
+        return self.devices[device_id] if key == KEY else None
+
+def datagram(*device_ids: str) -> bytes:
+    return "\n".join(f"{device_id} {KEY} {READING}" for device_id in device_ids).encode()
+
+@pytest.fixture
+def buffer():
+    return IngestBuffer(max_size=100, batch_size=100, flush_interval=60)
+
+@pytest.mark.asyncio
+async def test_one_lookup_per_uncached_device(buffer):
+    device_id = str(ObjectId())
+    registry = FakeRegistry({device_id: ANIMAL_ID})
+    gateway = Gateway(registry, buffer, max_lookups=8)
+
+    gateway.handle_datagram(datagram(device_id, device_id))
+    gateway.handle_datagram(datagram(device_id))
+    await asyncio.sleep(0)
+    assert registry.lookups == [device_id]
+    assert gateway.stats()["errors"] == {"lookup_busy": 2}
+
+    registry.release.set()
+    await gateway.finish_lookups()
+    assert gateway.stats()["accepted"] == 1
+    assert gateway.stats()["lookups"] == 0
+    assert not gateway._tasks
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_are_capped(buffer):
+    registry = FakeRegistry({})
+    gateway = Gateway(registry, buffer, max_lookups=2)
+
+    gateway.handle_datagram(datagram(*(str(ObjectId()) for _ in range(5))))
+    await asyncio.sleep(0)
+    assert len(registry.lookups) == 2
+    assert gateway.stats()["errors"] == {"lookup_busy": 3}
+
+    # Failed lookups free their slots and are counted
+    registry.release.set()
+    await gateway.finish_lookups()
+    assert gateway.stats()["errors"] == {"lookup_busy": 3, "lookup_failed": 2}
+    gateway.handle_datagram(datagram(str(ObjectId())))
+    assert gateway.stats()["lookups"] == 1
+    await gateway.finish_lookups()
@@ -0,0 +1,14 @@
+from app.geocoding import PLACES, geocode, point
+
+def test_known_places():
+    assert geocode("Ludhiana") == point(*PLACES["ludhiana"])
+    assert geocode("  LUDHIANA,  Punjab ") == point(*PLACES["ludhiana"])
+
+def test_coordinates_are_latitude_first():
+    assert geocode("30.9, 75.85") == point(75.85, 30.9)
+    assert geocode("-33.5,-70") == point(-70.0, -33.5)
+
+def test_unknown_or_invalid():
+    assert geocode("Atlantis") is None
+    assert geocode("") is None
+    assert geocode("95, 75") is None
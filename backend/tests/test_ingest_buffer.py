@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from app.services import ingest_buffer as ingest_buffer_module
+from app.services.ingest_buffer import IngestBuffer
+
+class FakeInsert:
+    """Records the batches written; fails the first ``failures`` calls."""
+
+    def __init__(self, failures: int = 0):
+        self.batches = []
+        self.failures = failures
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, documents):
+        await self.release.wait()
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("MongoDB unavailable")
+        self.batches.append(list(documents))
+        return {}
+
+def documents(count: int) -> list:
+    return [{"_id": ObjectId(), "animal_id": "a", "temperature": 38.5} for _ in range(count)]
+
+@pytest.fixture
+def insert(monkeypatch):
+    fake = FakeInsert()
+    monkeypatch.setattr(ingest_buffer_module, "insert_metrics", fake)
+    return fake
+
+async def wait_for(condition, timeout: float = 1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.001)
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting_for_the_interval(insert):
+    buffer = IngestBuffer(max_size=100, batch_size=5, flush_interval=60)
+    buffer.start()
+    try:
+        assert buffer.offer(documents(3))
+        assert buffer.offer(documents(4))
+        await wait_for(lambda: len(insert.batches) == 1)
+        assert len(insert.batches[0]) == 5
+        assert buffer.stats()["depth"] == 2
+    finally:
+        await buffer.stop()
+
+    assert [len(batch) for batch in insert.batches] == [5, 2]
+
+@pytest.mark.asyncio
+async def test_partial_batch_flushes_after_the_interval(insert):
+    buffer = IngestBuffer(max_size=100, batch_size=50, flush_interval=0.02)
+    buffer.start()
+    try:
+        buffer.offer(documents(3))
+        await asyncio.sleep(0.005)
+        assert insert.batches == []
+        await wait_for(lambda: len(insert.batches) == 1)
+        assert len(insert.batches[0]) == 3
+    finally:
+        await buffer.stop()
+
+@pytest.mark.asyncio
+async def test_offers_are_refused_when_the_queue_is_full(insert):
+    insert.release.clear()
+    buffer = IngestBuffer(max_size=6, batch_size=2, flush_interval=60)
+    buffer.start()
+    try:
+        assert buffer.offer(documents(4))
+        assert buffer.offer(documents(2))
+        # One batch is out for writing; it stalls, so the queue cannot drain
+        await asyncio.sleep(0.01)
+        assert buffer.offer(documents(2))
+        assert not buffer.offer(documents(1))
+        assert buffer.stats()["refused"] == 1
+
+        insert.release.set()
+        await wait_for(lambda: buffer.stats()["depth"] == 0)
+        assert buffer.offer(documents(1))
+    finally:
+        await buffer.stop()
+
+    assert buffer.stats()["flushed"] == 9
+
+@pytest.mark.asyncio
+async def test_failed_writes_are_retried_without_losing_readings(insert):
+    insert.failures = 2
+    buffer = IngestBuffer(max_size=100, batch_size=3, flush_interval=60)
+    buffer.start()
+    try:
+        queued = documents(3)
+        buffer.offer(queued)
+        await wait_for(lambda: insert.batches, timeout=2.0)
+    finally:
+        await buffer.stop()
+
+    assert insert.batches == [queued]
+    assert buffer.stats()["failures"] == 2
+
+@pytest.mark.asyncio
+async def test_stop_drains_the_queue_and_refuses_new_readings(insert):
+    buffer = IngestBuffer(max_size=100, batch_size=4, flush_interval=60)
+    buffer.start()
+    buffer.offer(documents(10))
+
+    await buffer.stop()
+
+    assert sum(len(batch) for batch in insert.batches) == 10
+    assert buffer.stats()["depth"] == 0
+    assert not buffer.offer(documents(1))
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from pymongo import InsertOne
+
+from app.services.iot_alerts import (
+    DEFAULT_RULES, LAST_SEEN_COLLECTION, MISSING_DATA, AlertEngine, RateOfChangeRule, ThresholdRule
+)
+
+START = datetime(2024, 5, 1, 12, 0, 0)
+TEMPERATURE_HIGH = ThresholdRule("temperature_high", "temperature", above=True, trigger=40.0, clear=39.5, severity="high")
+TEMPERATURE_SPIKE = RateOfChangeRule(
+    "temperature_spike", "temperature", window_minutes=10, max_change=1.0, clear_change=0.5, severity="high"
+)
+
+def reading(animal_id: str = "a", minutes: float = 0, temperature: float = 38.5, **changes) -> dict:
+    return {
+        "_id": ObjectId(), "animal_id": animal_id, "timestamp": START + timedelta(minutes=minutes),
+        "temperature": temperature, "humidity": 61, "activity_level": 42, "feeding_status": "fed",
+        "water_level": 80, "battery_level": 91, "signal_strength": "strong", **changes
+    }
+
+def changes(operations: list) -> list:
+    """("open" or "resolve", alert type) for each alert write."""
+    return [
+        ("open", operation._doc["alert_type"]) if isinstance(operation, InsertOne)
+        else ("resolve", operation._filter["alert_type"])
+        for operation in operations
+    ]
+
+def temperatures(engine: AlertEngine, values: list) -> list:
+    return changes(engine.evaluate([reading(minutes=i, temperature=value) for i, value in enumerate(values)]))
+
+def test_threshold_hysteresis_band_changes_nothing():
+    engine = AlertEngine([TEMPERATURE_HIGH], debounce=1, missing_minutes=30, lookback_hours=24)
+
+    assert temperatures(engine, [40.1]) == [("open", "temperature_high")]
+    assert temperatures(engine, [39.8, 39.6, 40.5]) == []
+    assert temperatures(engine, [39.4]) == [("resolve", "temperature_high")]
+    assert temperatures(engine, [39.8]) == []
+
+def test_debounce_needs_consecutive_readings_past_the_level():
+    engine = AlertEngine([TEMPERATURE_HIGH], debounce=2, missing_minutes=30, lookback_hours=24)
+
+    # A reading back on the clear side resets the count; one in the band does not
+    assert temperatures(engine, [40.1, 39.0, 40.1]) == []
+    assert temperatures(engine, [39.8, 40.2]) == [("open", "temperature_high")]
+    assert temperatures(engine, [39.0, 40.3, 39.2]) == []
+    assert temperatures(engine, [39.1]) == [("resolve", "temperature_high")]
+
+def test_rate_of_change_is_measured_against_a_full_window():
+    engine = AlertEngine([TEMPERATURE_SPIKE], debounce=1, missing_minutes=30, lookback_hours=24)
+    documents = [reading(minutes=minute, temperature=38.0 + 0.04 * minute) for minute in range(0, 21)]
+
+    # A slow drift, read every minute, never spikes
+    assert changes(engine.evaluate(documents)) == []
+    # Within the window the anchor is kept, so a jump is not measured yet
+    assert changes(engine.evaluate([reading(minutes=25, temperature=41.0)])) == []
+    assert changes(engine.evaluate([reading(minutes=30, temperature=41.0)])) == [("open", "temperature_spike")]
+    assert changes(engine.evaluate([reading(minutes=40, temperature=41.1)])) == [("resolve", "temperature_spike")]
+
+def test_rate_of_change_reanchors_after_a_long_gap():
+    engine = AlertEngine([TEMPERATURE_SPIKE], debounce=1, missing_minutes=30, lookback_hours=24)
+    engine.evaluate([reading(minutes=0, temperature=38.0)])
+
+    assert changes(engine.evaluate([reading(minutes=60, temperature=41.0)])) == []
+    assert changes(engine.evaluate([reading(minutes=70, temperature=41.2)])) == []
+
+@pytest.mark.asyncio
+async def test_sweep_opens_and_resolves_missing_data(mongo):
+    engine = AlertEngine(DEFAULT_RULES, debounce=2, missing_minutes=30, lookback_hours=24)
+    now = START + timedelta(hours=2)
+    await engine.process([
+        reading("silent", minutes=60), reading("silent", minutes=20),
+        reading("reporting", minutes=110),
+        reading("gone", minutes=-24 * 60)
+    ])
+
+    assert await engine.sweep(now) == 1
+    alert = await mongo.alerts.find_one({"alert_type": MISSING_DATA})
+    assert alert["animal_id"] == "silent" and not alert["is_resolved"]
+    assert await engine.sweep(now) == 0
+
+    await engine.process([reading("silent", minutes=115)])
+    assert await engine.sweep(now) == 1
+    assert await mongo.alerts.count_documents({"alert_type": MISSING_DATA, "is_resolved": False}) == 0
+
+@pytest.mark.asyncio
+async def test_last_seen_only_moves_forward(mongo):
+    engine = AlertEngine(DEFAULT_RULES, debounce=2, missing_minutes=30, lookback_hours=24)
+    await engine.touch([reading("a", minutes=10), reading("a", minutes=5)])
+    await engine.touch([reading("a", minutes=1)])
+
+    last_seen = await mongo[LAST_SEEN_COLLECTION].find_one({"_id": "a"})
+    assert last_seen["last_seen"] == START + timedelta(minutes=10)
+
+@pytest.mark.asyncio
+async def test_reload_picks_up_an_alert_resolved_by_another_worker(mongo):
+    engine = AlertEngine([TEMPERATURE_HIGH], debounce=1, missing_minutes=30, lookback_hours=24)
+    await engine.process([reading(temperature=40.5)])
+    assert engine.stats()["open"] == 1
+
+    await mongo.alerts.update_many({}, {"$set": {"is_resolved": True}})
+    await engine.load_open_alerts()
+    assert engine.stats()["open"] == 0
+
+    await engine.process([reading(minutes=1, temperature=40.6)])
+    assert await mongo.alerts.count_documents({"is_resolved": False}) == 1
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.iot import NUMERIC_METRIC_FIELDS
+from app.services.iot_analytics import ReadingWindow, summarize
+
+START = datetime(2024, 1, 1)
+TEMPERATURE = NUMERIC_METRIC_FIELDS.index("temperature")
+
+def window(rows) -> ReadingWindow:
+    """A window from (animal code, hours, temperature) rows; other fields are missing."""
+    values = np.full((len(rows), len(NUMERIC_METRIC_FIELDS)), np.nan)
+    values[:, TEMPERATURE] = [temperature for _, _, temperature in rows]
+    return ReadingWindow(
+        START, ["a", "b"],
+        np.array([code for code, _, _ in rows], np.int32),
+        np.array([hours for _, hours, _ in rows], float),
+        values
+    )
+
+def test_empty_window():
+    assert summarize(window([])) == []
+
+def test_statistics_per_animal():
+    rows = [(0, 2.0, 39.0), (1, 0.0, 40.0), (0, 0.0, 38.0), (0, 1.0, 38.5), (1, 1.0, 41.0)]
+    a, b = summarize(window(rows))
+
+    assert a["animal_id"] == "a" and b["animal_id"] == "b"
+    assert a["count"] == 3
+    assert a["first_timestamp"] == START
+    assert a["last_timestamp"] == START + timedelta(hours=2)
+    assert set(a["fields"]) == {"temperature"}
+
+    temperature = a["fields"]["temperature"]
+    values = np.array([38.0, 38.5, 39.0])
+    assert temperature["mean"] == pytest.approx(values.mean())
+    assert temperature["std"] == pytest.approx(values.std())
+    assert (temperature["min"], temperature["max"]) == (38.0, 39.0)
+    assert temperature["percentiles"]["p50"] == pytest.approx(38.5)
+    assert temperature["percentiles"]["p25"] == pytest.approx(np.percentile(values, 25))
+    assert temperature["slope_per_hour"] == pytest.approx(0.5)
+    assert temperature["time_in_range"] == 1.0
+
+    assert b["fields"]["temperature"]["slope_per_hour"] == pytest.approx(1.0)
+    assert b["fields"]["temperature"]["time_in_range"] == 0.0
+
+def test_pooled_statistics():
+    rows = [(0, 0.0, 38.0), (1, 1.0, 40.0)]
+    (pooled,) = summarize(window(rows), pooled=True)
+    assert "animal_id" not in pooled
+    assert pooled["count"] == 2
+    assert pooled["fields"]["temperature"]["mean"] == pytest.approx(39.0)
+
+def test_single_reading_has_no_slope():
+    (group,) = summarize(window([(0, 0.0, 38.0)]))
+    assert group["fields"]["temperature"]["slope_per_hour"] is None
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.config import settings
+from app.leases import acquire_lease, renew_lease
+from app.services import iot_archive
+from app.services.iot_archive import (
+    LEASE_ID, archive_expired, archive_path, count_merged, merge_readings, read_archived
+)
+
+NOW = datetime(2024, 3, 20, 12, 0, 0)
+
+def readings(count: int, start: datetime, step: timedelta = timedelta(minutes=1)) -> list:
+    """Readings one step apart, newest first."""
+    documents = [
+        {"_id": ObjectId(), "animal_id": "a", "timestamp": start + i * step, "temperature": 38.5}
+        for i in range(count)
+    ]
+    return sorted(documents, key=lambda reading: (reading["timestamp"], reading["_id"]), reverse=True)
+
+async def stream(documents):
+    for document in documents:
+        yield document
+
+async def merged(stored, archived, limit=None):
+    return [reading async for reading in merge_readings(stream(stored), stream(archived), limit)]
+
+async def collect(readings_iterator) -> list:
+    return [reading async for reading in readings_iterator]
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "iot_archive_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "iot_retention_days", 30)
+    return tmp_path
+
+@pytest.mark.asyncio
+async def test_archived_readings_follow_newer_stored_ones():
+    archived = readings(3, datetime(2024, 1, 1))
+    stored = readings(3, datetime(2024, 1, 2))
+    assert await merged(stored, archived) == stored + archived
+
+@pytest.mark.asyncio
+async def test_interleaved_readings_keep_order():
+    everything = readings(6, datetime(2024, 1, 1))
+    stored, archived = everything[::2], everything[1::2]
+    assert await merged(stored, archived) == everything
+
+@pytest.mark.asyncio
+async def test_readings_in_both_are_yielded_once():
+    everything = readings(5, datetime(2024, 1, 1))
+    stored = everything[:3]
+    archived = everything[2:]
+    assert await merged(stored, archived) == everything
+
+@pytest.mark.asyncio
+async def test_limit_yields_one_extra_reading():
+    archived = readings(3, datetime(2024, 1, 1))
+    stored = readings(3, datetime(2024, 1, 2))
+    assert await merged(stored, archived, limit=4) == (stored + archived)[:5]
+    assert await merged([], archived, limit=1) == archived[:2]
+
+@pytest.mark.asyncio
+async def test_archive_moves_expired_days_and_reads_them_back(mongo, archive):
+    old = readings(6, datetime(2024, 1, 1, 22), step=timedelta(hours=1))
+    recent = readings(2, NOW - timedelta(hours=2))
+    await mongo.iot_metrics.insert_many(old + recent)
+
+    assert await archive_expired(NOW) == 6
+    assert await mongo.iot_metrics.count_documents({}) == 2
+    assert archive_path("a", datetime(2024, 1, 1)).exists()
+    assert archive_path("a", datetime(2024, 1, 2)).exists()
+    assert not list(archive.rglob("*.tmp"))
+
+    start, end = datetime(2024, 1, 1), datetime(2024, 1, 3)
+    back = await collect(read_archived("a", start, end))
+    assert [reading["_id"] for reading in back] == [reading["_id"] for reading in old]
+
+    # Pages resume after a position, across day files
+    position = (back[2]["timestamp"], back[2]["_id"])
+    rest = await collect(read_archived("a", start, end, before=position))
+    assert [reading["_id"] for reading in rest] == [reading["_id"] for reading in old[3:]]
+
+    # Rerunning, or a reading restored to Mongo, is harmless and counted once
+    assert await archive_expired(NOW) == 0
+    await mongo.iot_metrics.insert_one(dict(old[0]))
+    cutoff = iot_archive.retention_cutoff(NOW)
+    assert await count_merged("a", start, NOW, cutoff) == 8
+
+@pytest.mark.asyncio
+async def test_sweep_stops_when_the_lease_is_lost(mongo, archive, monkeypatch):
+    await mongo.iot_metrics.insert_many(
+        readings(3, datetime(2024, 1, 1, 12), step=timedelta(days=1))
+    )
+    renewals = []
+
+    async def renew_once(lease_id, seconds):
+        # Another worker takes the lease over after the first day
+        renewals.append(lease_id)
+        return len(renewals) == 1
+    monkeypatch.setattr(iot_archive, "renew_lease", renew_once)
+
+    assert await archive_expired(NOW, lease_seconds=60) == 1
+    assert await mongo.iot_metrics.count_documents({}) == 2
+
+@pytest.mark.asyncio
+async def test_only_the_holder_renews_a_lease(mongo):
+    assert await acquire_lease(LEASE_ID, 60)
+    assert not await acquire_lease(LEASE_ID, 60)
+    assert await renew_lease(LEASE_ID, 120)
+
+    await mongo.locks.update_one({"_id": LEASE_ID}, {"$set": {"owner": "another-worker"}})
+    assert not await renew_lease(LEASE_ID, 120)
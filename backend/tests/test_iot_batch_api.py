@@ -0,0 +1,123 @@
+from datetime import datetime
+
+import httpx
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from pymongo.errors import BulkWriteError
+
+from app.api.v1 import iot
+from app.auth.dependencies import get_current_farmer
+from app.config import settings
+from app.models.user import UserInDB
+from app.services import iot_ingest
+from app.services.ingest_buffer import IngestBuffer
+
+FARMER_ID = str(ObjectId())
+OWN_ANIMAL = str(ObjectId())
+OTHER_ANIMAL = str(ObjectId())
+REJECTED_TEMPERATURE = 44.5
+
+class FakeMetricsCollection:
+    """Stores readings in a list; the server rejects readings at REJECTED_TEMPERATURE."""
+
+    def __init__(self):
+        self.documents = []
+
+    async def insert_many(self, documents, ordered=True):
+        errors = []
+        for index, document in enumerate(documents):
+            document["_id"] = ObjectId()
+            if document["temperature"] == REJECTED_TEMPERATURE:
+                errors.append({"index": index, "code": 121, "errmsg": "Document failed validation"})
+            else:
+                self.documents.append(document)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(documents) - len(errors)})
+
+def reading(animal_id: str, **changes) -> dict:
+    return {
+        "animal_id": animal_id, "temperature": 38.6, "humidity": 61, "activity_level": 42,
+        "feeding_status": "fed", "water_level": 80, "battery_level": 91, "signal_strength": "strong",
+        **changes
+    }
+
+@pytest.fixture
+def metrics(monkeypatch):
+    collection = FakeMetricsCollection()
+    monkeypatch.setattr(iot_ingest, "get_collection", lambda name: collection)
+
+    async def owners_of(animal_ids):
+        known = {OWN_ANIMAL: FARMER_ID, OTHER_ANIMAL: str(ObjectId())}
+        return {animal_id: known[animal_id] for animal_id in set(animal_ids) if animal_id in known}
+    monkeypatch.setattr(iot.ownership, "owners_of", owners_of)
+
+    # Store synchronously and skip the derived views
+    for name in ("iot_write_behind_enabled", "iot_latest_cache_enabled", "iot_alerts_enabled", "iot_rollups_enabled"):
+        monkeypatch.setattr(settings, name, False)
+    monkeypatch.setattr(settings, "iot_stream_change_stream", True)
+    return collection
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+    app.include_router(iot.router, prefix="/api/v1")
+    now = datetime.utcnow()
+    app.dependency_overrides[get_current_farmer] = lambda: UserInDB(
+        _id=FARMER_ID, email="farmer@example.com", name="Farmer", phone="9876543210", role="farmer",
+        hashed_password="x", created_at=now, updated_at=now
+    )
+    return app
+
+async def post_batch(app, records):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post("/api/v1/iot/metrics:batch", json={"metrics": records})
+
+@pytest.mark.asyncio
+async def test_batch_reports_each_rejected_reading(app, metrics):
+    records = [
+        reading(OWN_ANIMAL),
+        reading(OWN_ANIMAL, temperature=99),
+        reading(OTHER_ANIMAL),
+        reading(str(ObjectId())),
+        reading("not-an-id"),
+        reading(OWN_ANIMAL, temperature=REJECTED_TEMPERATURE),
+        reading(OWN_ANIMAL, humidity=70),
+    ]
+    response = await post_batch(app, records)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["accepted"], body["rejected"]) == (2, 5)
+
+    results = body["results"]
+    assert [result["index"] for result in results] == list(range(len(records)))
+    assert [result["accepted"] for result in results] == [True, False, False, False, False, False, True]
+    assert results[1]["error"].startswith("temperature:")
+    assert results[2]["error"] == "Not authorized to create metrics for this animal"
+    assert results[3]["error"] == "Animal not found"
+    assert results[4]["error"] == "Invalid animal ID"
+    assert results[5]["error"] == "Document failed validation"
+
+    stored_ids = [str(document["_id"]) for document in metrics.documents]
+    assert stored_ids == [results[0]["id"], results[6]["id"]]
+
+@pytest.mark.asyncio
+async def test_batch_over_the_limit_is_refused(app, metrics, monkeypatch):
+    monkeypatch.setattr(settings, "iot_batch_max_size", 2)
+    response = await post_batch(app, [reading(OWN_ANIMAL)] * 3)
+    assert response.status_code == 413
+    assert metrics.documents == []
+
+@pytest.mark.asyncio
+async def test_full_write_behind_queue_answers_429(app, metrics, monkeypatch):
+    monkeypatch.setattr(settings, "iot_write_behind_enabled", True)
+    monkeypatch.setattr(iot, "ingest_buffer", IngestBuffer(max_size=2, batch_size=2, flush_interval=60))
+
+    response = await post_batch(app, [reading(OWN_ANIMAL)] * 2)
+    assert response.status_code == 202
+
+    response = await post_batch(app, [reading(OWN_ANIMAL)])
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
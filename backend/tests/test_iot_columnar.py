@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.models.iot import NUMERIC_METRIC_FIELDS
+from app.pagination import decode_cursor
+from app.services.iot_columnar import EPOCH, collect_columnar
+
+def reading(animal_id: str, timestamp: datetime, **extra) -> dict:
+    return {
+        "_id": ObjectId(), "animal_id": animal_id, "timestamp": timestamp,
+        "temperature": 38.5, "humidity": 60.0, "activity_level": 40.0, "feeding_status": "fed",
+        "water_level": 80.0, "battery_level": 90.0, "signal_strength": "strong", **extra
+    }
+
+async def cursor(documents):
+    for document in documents:
+        yield document
+
+@pytest.mark.asyncio
+async def test_columns_are_dictionary_and_delta_encoded():
+    start = datetime(2024, 1, 1, 12)
+    documents = [
+        reading("a", start),
+        reading("b", start - timedelta(seconds=2), feeding_status="hungry"),
+        reading("a", start - timedelta(seconds=5), location={"lat": 1.0}),
+    ]
+    payload, next_cursor = await collect_columnar(cursor(documents), None)
+
+    assert next_cursor is None
+    assert payload["count"] == 3
+    columns = payload["columns"]
+    assert columns["id"] == [str(document["_id"]) for document in documents]
+    assert [payload["dictionaries"]["animal_id"][code] for code in columns["animal_id"]] == ["a", "b", "a"]
+    assert [payload["dictionaries"]["feeding_status"][code] for code in columns["feeding_status"]] == [
+        "fed", "hungry", "fed"
+    ]
+    assert columns["timestamp"] == [(start - EPOCH) // timedelta(milliseconds=1), -2000, -3000]
+    assert all(columns[field] == [documents[0][field]] * 3 for field in NUMERIC_METRIC_FIELDS)
+    assert payload["extras"] == [{"row": 2, "location": {"lat": 1.0}, "additional_data": {}}]
+
+@pytest.mark.asyncio
+async def test_limit_stops_at_the_page_and_returns_a_cursor():
+    start = datetime(2024, 1, 1)
+    documents = [reading("a", start - timedelta(minutes=i)) for i in range(3)]
+    payload, next_cursor = await collect_columnar(cursor(documents), 2)
+
+    assert payload["count"] == 2
+    assert decode_cursor(next_cursor) == (documents[1]["timestamp"], documents[1]["_id"])
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+
+from app.api.v1 import iot
+from app.config import settings
+
+ANIMAL_ID = str(ObjectId())
+
+def reading(timestamp: datetime) -> dict:
+    return {
+        "animal_id": ANIMAL_ID, "timestamp": timestamp, "temperature": 38.6, "humidity": 61,
+        "activity_level": 42, "feeding_status": "fed", "water_level": 80, "battery_level": 91,
+        "signal_strength": "strong", "location": {}, "additional_data": {}
+    }
+
+@pytest.fixture
+def app(mongo, monkeypatch):
+    monkeypatch.setattr(settings, "iot_retention_days", 0)
+    app = FastAPI()
+    app.include_router(iot.router, prefix="/api/v1")
+    app.dependency_overrides[iot.owned_metrics_animal] = lambda: ANIMAL_ID
+    return app
+
+async def get_history(app, **params):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get(f"/api/v1/iot/metrics/{ANIMAL_ID}/history", params=params)
+
+@pytest.mark.asyncio
+async def test_single_raw_response_is_capped(app):
+    response = await get_history(app, hours=iot.RAW_HISTORY_MAX_HOURS + 1)
+    assert response.status_code == 400
+    assert "format=ndjson" in response.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_streamed_and_paginated_exports_cover_long_windows(app, mongo):
+    old = datetime.utcnow() - timedelta(days=30)
+    await mongo.iot_metrics.insert_many([
+        reading(old + timedelta(minutes=i)) for i in range(3)
+    ])
+    hours = 24 * 60
+
+    response = await get_history(app, hours=hours, format="ndjson")
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 3
+
+    response = await get_history(app, hours=hours, limit=2)
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["metrics"]) == 2
+    assert body["next_cursor"]
+
+    response = await get_history(app, hours=hours, limit=2, after=body["next_cursor"])
+    assert len(response.json()["metrics"]) == 1
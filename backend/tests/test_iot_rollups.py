@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.iot import MetricsResolution
+from app.services.iot_rollups import ROLLUP_COLLECTION, bucket_start, choose_resolution, get_rollups, update_rollups
+
+def test_bucket_boundaries():
+    timestamp = datetime(2024, 3, 9, 13, 59, 59, 999999)
+    assert bucket_start(timestamp, MetricsResolution.MINUTE) == datetime(2024, 3, 9, 13, 59)
+    assert bucket_start(timestamp, MetricsResolution.HOUR) == datetime(2024, 3, 9, 13)
+    assert bucket_start(timestamp, MetricsResolution.DAY) == datetime(2024, 3, 9)
+    assert bucket_start(datetime(2024, 3, 9, 14), MetricsResolution.HOUR) == datetime(2024, 3, 9, 14)
+
+def test_choose_resolution(monkeypatch):
+    monkeypatch.setattr("app.services.iot_rollups.settings.iot_rollup_max_points", 100)
+    assert choose_resolution(timedelta(minutes=100)) == MetricsResolution.MINUTE
+    assert choose_resolution(timedelta(hours=2)) == MetricsResolution.HOUR
+    assert choose_resolution(timedelta(days=365)) == MetricsResolution.DAY
+
+@pytest.mark.asyncio
+async def test_readings_fold_into_every_tier(mongo):
+    await update_rollups([
+        {"animal_id": "a", "timestamp": datetime(2024, 1, 1, 10, 0, 30), "temperature": 38.0},
+        {"animal_id": "a", "timestamp": datetime(2024, 1, 1, 10, 0, 59), "temperature": 39.0, "humidity": 60.0},
+        {"animal_id": "a", "timestamp": datetime(2024, 1, 1, 10, 1), "temperature": 40.0},
+        {"animal_id": "b", "timestamp": datetime(2024, 1, 1, 10, 0, 10), "temperature": 37.0},
+        {"animal_id": "a", "temperature": 41.0},
+    ])
+
+    rollups = mongo[ROLLUP_COLLECTION]
+    assert await rollups.count_documents({"resolution": "minute"}) == 3
+    assert await rollups.count_documents({"resolution": "hour"}) == 2
+    assert await rollups.count_documents({"resolution": "day"}) == 2
+
+    minute = await rollups.find_one({"animal_id": "a", "resolution": "minute", "bucket": datetime(2024, 1, 1, 10)})
+    assert minute["count"] == 2
+    assert minute["stats"]["temperature"] == {"min": 38.0, "max": 39.0, "sum": 77.0, "count": 2}
+    assert minute["stats"]["humidity"] == {"min": 60.0, "max": 60.0, "sum": 60.0, "count": 1}
+
+@pytest.mark.asyncio
+async def test_later_batches_merge_into_existing_buckets(mongo):
+    hour = datetime(2024, 1, 1, 10)
+    await update_rollups([{"animal_id": "a", "timestamp": hour + timedelta(minutes=5), "temperature": 38.0}])
+    await update_rollups([
+        {"animal_id": "a", "timestamp": hour + timedelta(minutes=50), "temperature": 36.0},
+        {"animal_id": "a", "timestamp": hour + timedelta(minutes=55), "temperature": 40.0},
+    ])
+
+    rollups = await get_rollups("a", MetricsResolution.HOUR, hour, hour + timedelta(hours=1))
+    assert len(rollups) == 1
+    assert rollups[0].bucket == hour
+    assert rollups[0].count == 3
+    stats = rollups[0].stats["temperature"]
+    assert (stats.min, stats.max, stats.count) == (36.0, 40.0, 3)
+    assert stats.avg == pytest.approx(38.0)
+
+@pytest.mark.asyncio
+async def test_get_rollups_covers_the_bucket_holding_the_start(mongo):
+    await update_rollups([
+        {"animal_id": "a", "timestamp": datetime(2024, 1, 1, 9, 10), "temperature": 38.0},
+        {"animal_id": "a", "timestamp": datetime(2024, 1, 1, 11, 10), "temperature": 38.0},
+        {"animal_id": "a", "timestamp": datetime(2024, 1, 1, 13, 10), "temperature": 38.0},
+    ])
+
+    rollups = await get_rollups("a", MetricsResolution.HOUR, datetime(2024, 1, 1, 9, 30), datetime(2024, 1, 1, 12))
+    assert [rollup.bucket for rollup in rollups] == [datetime(2024, 1, 1, 11), datetime(2024, 1, 1, 9)]
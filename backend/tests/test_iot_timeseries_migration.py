@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+
+from app.migrations.iot_timeseries import CHECKPOINT_ID, LEGACY_COLLECTION, migrate
+
+class TimeseriesDatabase:
+    """Wraps the in-memory database with the collection options and rename rules of MongoDB."""
+
+    def __init__(self, database):
+        self.database = database
+        self.timeseries = set()
+        self.after_rename = None
+
+    def __getitem__(self, name):
+        return TimeseriesCollection(self, name)
+
+    def __getattr__(self, name):
+        return self[name]
+
+    async def create_collection(self, name, timeseries=None):
+        await self.database.create_collection(name)
+        if timeseries:
+            self.timeseries.add(name)
+
+    def list_collections(self, filter):
+        return CollectionInfos(self, filter["name"])
+
+class CollectionInfos:
+    """Async iterator over the info of one collection, like a list_collections cursor."""
+
+    def __init__(self, owner: TimeseriesDatabase, name: str):
+        self.owner = owner
+        self.name = name
+        self.done = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.done or self.name not in await self.owner.database.list_collection_names():
+            raise StopAsyncIteration
+        self.done = True
+        options = {"timeseries": {"timeField": "timestamp"}} if self.name in self.owner.timeseries else {}
+        return {"name": self.name, "options": options}
+
+class TimeseriesCollection:
+    def __init__(self, owner: TimeseriesDatabase, name: str):
+        self.owner = owner
+        self.name = name
+        self.collection = owner.database[name]
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    async def rename(self, new_name):
+        if self.name in self.owner.timeseries:
+            raise OperationFailure("cannot rename a time-series collection")
+        await self.collection.rename(new_name)
+        if self.owner.after_rename:
+            await self.owner.after_rename()
+
+def readings(count: int, age: timedelta = timedelta(days=1)) -> list:
+    start = datetime.utcnow() - age
+    return [
+        {"_id": ObjectId(), "animal_id": "a", "timestamp": start + timedelta(seconds=i), "temperature": 38.5}
+        for i in range(count)
+    ]
+
+@pytest.fixture
+def database(mongo):
+    return TimeseriesDatabase(mongo)
+
+@pytest.mark.asyncio
+async def test_converts_a_plain_collection(database):
+    stored = readings(7)
+    await database.iot_metrics.insert_many(stored + [{"_id": ObjectId(), "animal_id": "a"}])
+
+    assert await migrate(database, batch_size=3) == 7
+
+    assert database.timeseries == {"iot_metrics"}
+    copied = await database.iot_metrics.find().sort("_id", 1).to_list(None)
+    assert [reading["_id"] for reading in copied] == [reading["_id"] for reading in stored]
+    assert await database[LEGACY_COLLECTION].count_documents({}) == 8
+
+    assert await migrate(database, batch_size=3, drop_legacy=True) == 0
+    assert LEGACY_COLLECTION not in await database.database.list_collection_names()
+    assert await database.migrations.find_one({"_id": CHECKPOINT_ID}) is None
+
+@pytest.mark.asyncio
+async def test_refuses_while_readings_arrive(database):
+    await database.iot_metrics.insert_many(readings(2, age=timedelta(seconds=5)))
+
+    with pytest.raises(RuntimeError, match="stop the API workers"):
+        await migrate(database, quiet_seconds=60)
+    assert await database.database.list_collection_names() == ["iot_metrics"]
+    assert database.timeseries == set()
+
+@pytest.mark.asyncio
+async def test_fails_if_a_write_recreates_the_plain_collection(database):
+    await database.iot_metrics.insert_many(readings(2))
+
+    async def late_write():
+        await database.database.iot_metrics.insert_one(readings(1, age=timedelta(0))[0])
+    database.after_rename = late_write
+
+    with pytest.raises(RuntimeError, match="recreated as a plain collection"):
+        await migrate(database)
+
+@pytest.mark.asyncio
+async def test_resumes_after_a_crash_following_the_rename(database):
+    await database[LEGACY_COLLECTION].insert_many(readings(4))
+
+    assert await migrate(database, batch_size=3) == 4
+    assert database.timeseries == {"iot_metrics"}
+    assert await database.iot_metrics.count_documents({}) == 4
+
+@pytest.mark.asyncio
+async def test_resume_does_not_duplicate_an_uncheckpointed_batch(database):
+    stored = readings(5)
+    await database[LEGACY_COLLECTION].insert_many(stored)
+    await database.create_collection("iot_metrics", timeseries=True)
+    # A crashed run inserted readings 2-3 but did not checkpoint past reading 1
+    await database.iot_metrics.insert_many([dict(reading) for reading in stored[2:4]])
+    await database.migrations.insert_one({"_id": CHECKPOINT_ID, "last_id": stored[1]["_id"]})
+
+    assert await migrate(database, batch_size=2) == 1
+    copied = await database.iot_metrics.find().sort("_id", 1).to_list(None)
+    assert [reading["_id"] for reading in copied] == [reading["_id"] for reading in stored[2:]]
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.services import latest_readings as latest_readings_module
+from app.services.latest_readings import LatestReadingsStore, _AnimalReadings
+
+START = datetime(2024, 5, 1, 12, 0, 0)
+
+def reading(animal_id: str, seconds: int, **changes) -> dict:
+    return {
+        "_id": ObjectId(), "animal_id": animal_id, "timestamp": START + timedelta(seconds=seconds),
+        "temperature": 38.0 + seconds / 10, "humidity": 61, "activity_level": 42, "feeding_status": "fed",
+        "water_level": 80, "battery_level": 91, "signal_strength": "strong", **changes
+    }
+
+def store(**changes) -> LatestReadingsStore:
+    options = {"capacity": 3, "max_animals": 10, "idle_seconds": 3600, "refresh_seconds": 0, **changes}
+    return LatestReadingsStore(**options)
+
+def test_ring_wraps_around_and_keeps_the_newest():
+    ring = _AnimalReadings(capacity=5)
+    documents = [reading("a", i) for i in range(12)]
+    for document in documents:
+        ring.append(document)
+
+    assert ring.size == 5
+    assert ring.allocated == 5
+    stored = ring.read("a", 10)
+    assert [document["_id"] for document in stored] == [str(doc["_id"]) for doc in reversed(documents[-5:])]
+    assert stored[0]["timestamp"] == documents[-1]["timestamp"]
+    assert stored[0]["temperature"] == documents[-1]["temperature"]
+    assert ring.contains(documents[-1]["_id"].binary)
+    assert not ring.contains(documents[6]["_id"].binary)
+
+def test_ring_keeps_locations_and_extras_per_slot():
+    ring = _AnimalReadings(capacity=2)
+    ring.append(reading("a", 0, location={"lat": 12.5, "lng": 77.5}))
+    ring.append(reading("a", 1, location={"barn": "north"}, additional_data={"tag": 7}))
+    ring.append(reading("a", 2))
+
+    newest, previous = ring.read("a", 2)
+    assert newest["location"] == {} and newest["additional_data"] == {}
+    assert previous["location"] == {"barn": "north"} and previous["additional_data"] == {"tag": 7}
+
+@pytest.mark.asyncio
+async def test_recent_warms_from_mongo_then_hits(mongo):
+    documents = [reading("a", i) for i in range(5)]
+    await mongo.iot_metrics.insert_many(documents)
+    cache = store()
+
+    recent = await cache.recent("a", 2)
+    assert [document["_id"] for document in recent] == [str(documents[4]["_id"]), str(documents[3]["_id"])]
+    assert cache.misses == 1
+
+    await cache.recent("a", 3)
+    assert cache.hits == 1
+
+    newer = reading("a", 10)
+    cache.record([newer])
+    assert (await cache.latest("a"))["_id"] == str(newer["_id"])
+    assert cache.misses == 1
+
+@pytest.mark.asyncio
+async def test_partial_ring_is_warmed_before_serving_older_readings(mongo):
+    documents = [reading("a", i) for i in range(3)]
+    await mongo.iot_metrics.insert_many(documents)
+    cache = store()
+
+    # Ingest created the ring, so only the newest reading is known
+    cache.record(documents[-1:])
+    assert (await cache.latest("a"))["_id"] == str(documents[-1]["_id"])
+    assert cache.misses == 0
+
+    assert len(await cache.recent("a", 3)) == 3
+    assert cache.misses == 1
+
+def test_out_of_order_reading_drops_the_ring():
+    cache = store()
+    cache.record([reading("a", 5)])
+    cache.record([reading("a", 1)])
+
+    assert cache.stats()["animals"] == 0
+
+def test_record_skips_duplicates_and_uncached_animals():
+    cache = store()
+    document = reading("a", 0)
+    cache.record([document])
+    cache.record([document, reading("b", 0)], cached_only=True)
+
+    assert cache.stats()["animals"] == 1
+    assert cache._rings["a"].size == 1
+
+def test_evicts_least_recently_used_over_the_animal_limit():
+    cache = store(max_animals=2)
+    cache.record([reading("a", 0), reading("b", 0)])
+    cache.record([reading("a", 1)])
+    cache.record([reading("c", 0)])
+
+    assert list(cache._rings) == ["a", "c"]
+    assert cache.evictions == 1
+
+def test_evicts_idle_animals(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(latest_readings_module.time, "monotonic", lambda: now[0])
+    cache = store(idle_seconds=60)
+    cache.record([reading("a", 0)])
+    now[0] += 30
+    cache.record([reading("b", 0)])
+    now[0] += 45
+
+    stats = cache.stats()
+    assert stats["animals"] == 1
+    assert stats["evictions"] == 1
+    assert list(cache._rings) == ["b"]
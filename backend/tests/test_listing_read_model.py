@@ -0,0 +1,124 @@
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+import pytest_asyncio
+from bson import ObjectId
+from fastapi import FastAPI
+
+from app.api.v1 import animals, auth
+from app.auth.dependencies import get_current_farmer, get_current_user
+from app.leases import acquire_lease
+from app.models.user import TokenUser, UserInDB
+from app.services.listing_read_model import RECONCILE_LEASE_ID, ListingReadModel
+from app.services.user_cache import user_cache
+
+SELLER_ID = str(ObjectId())
+
+def animal_document(name: str = "Gauri") -> dict:
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(), "name": name, "species": "Cattle", "breed": "holstein", "dob": datetime(2022, 1, 1),
+        "weight": 450.0, "location": "Pune", "owner_id": SELLER_ID, "photos": [], "health_score": 80.0,
+        "vaccination": [], "status": "active", "created_at": now, "updated_at": now
+    }
+
+def listing_document(animal: dict) -> dict:
+    return {
+        "_id": ObjectId(), "animal_id": str(animal["_id"]), "seller_id": SELLER_ID, "price": 50000.0,
+        "seller_name": "Asha", "animal_name": animal["name"], "animal_health_score": animal["health_score"],
+        "species": "cattle"
+    }
+
+@pytest_asyncio.fixture
+async def stored(mongo):
+    now = datetime.utcnow()
+    await mongo.users.insert_one({
+        "_id": ObjectId(SELLER_ID), "email": "asha@example.com", "name": "Asha", "phone": "9876543210",
+        "role": "farmer", "hashed_password": "x", "is_active": True, "created_at": now, "updated_at": now
+    })
+    animal = animal_document()
+    await mongo.animals.insert_one(animal)
+    listings = [listing_document(animal) for _ in range(2)]
+    await mongo.listings.insert_many(listings)
+    user_cache.clear()
+    return animal
+
+@pytest.fixture
+def client(mongo):
+    app = FastAPI()
+    app.include_router(animals.router, prefix="/api/v1")
+    app.include_router(auth.router, prefix="/api/v1")
+
+    async def seller():
+        user = await mongo.users.find_one({"_id": ObjectId(SELLER_ID)})
+        user["_id"] = str(user["_id"])
+        return UserInDB(**user)
+    app.dependency_overrides[get_current_user] = seller
+    app.dependency_overrides[get_current_farmer] = lambda: TokenUser(
+        id=SELLER_ID, email="asha@example.com", name="Asha", role="farmer"
+    )
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test/api/v1")
+
+async def listing_copies(mongo) -> list:
+    return [
+        (listing["seller_name"], listing["animal_name"], listing["animal_health_score"], listing["species"])
+        async for listing in mongo.listings.find()
+    ]
+
+@pytest.mark.asyncio
+async def test_animal_edits_reach_every_listing(mongo, stored, client):
+    async with client:
+        response = await client.put(
+            f"/animals/{stored['_id']}", json={"name": "Gauri II", "health_score": 91, "species": " Buffalo "}
+        )
+        assert response.status_code == 200
+        assert await listing_copies(mongo) == [("Asha", "Gauri II", 91, "buffalo")] * 2
+
+        assert (await client.delete(f"/animals/{stored['_id']}")).status_code == 204
+        assert await listing_copies(mongo) == [("Asha", None, None, None)] * 2
+
+@pytest.mark.asyncio
+async def test_seller_rename_reaches_every_listing(mongo, stored, client):
+    async with client:
+        response = await client.put("/auth/me", json={"name": "Asha Rao"})
+    assert response.status_code == 200
+    assert await listing_copies(mongo) == [("Asha Rao", "Gauri", 80.0, "cattle")] * 2
+
+@pytest.mark.asyncio
+async def test_reconcile_repairs_drift(mongo, stored):
+    # Writes that bypassed the hooks
+    await mongo.animals.update_one({"_id": stored["_id"]}, {"$set": {"name": "Renamed"}})
+    await mongo.listings.update_many({}, {"$unset": {"species": ""}})
+    read_model = ListingReadModel()
+
+    assert await read_model.reconcile(batch_size=1) == 2
+    assert await listing_copies(mongo) == [("Asha", "Renamed", 80.0, "cattle")] * 2
+    assert await read_model.reconcile() == 0
+    assert read_model.stats()["repaired"] == 2
+
+@pytest.mark.asyncio
+async def test_reconciler_waits_for_the_lease(mongo, stored):
+    await mongo.listings.update_many({}, {"$set": {"seller_name": "Stale"}})
+    # Another worker holds the lease
+    assert await acquire_lease(RECONCILE_LEASE_ID, 60)
+    read_model = ListingReadModel()
+
+    task = asyncio.ensure_future(read_model.run_reconciler(60))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert read_model.reconciled_at is None
+    assert await mongo.listings.count_documents({"seller_name": "Stale"}) == 2
+
+    await mongo.locks.delete_many({})
+    task = asyncio.ensure_future(read_model.run_reconciler(60))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert read_model.repaired == 2
+    assert await listing_copies(mongo) == [("Asha", "Gauri", 80.0, "cattle")] * 2
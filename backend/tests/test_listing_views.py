@@ -0,0 +1,130 @@
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+
+from app.api.v1 import marketplace
+from app.auth.dependencies import get_current_active_user
+from app.models.user import TokenUser
+from app.services import listing_views as listing_views_module
+from app.services.listing_views import ListingViews
+
+class FailingListings:
+    """A listings collection whose bulk_write fails, or blocks until cancelled."""
+
+    def __init__(self, block: bool = False):
+        self.block = block
+        self.writing = asyncio.Event()
+
+    async def bulk_write(self, operations, ordered=True):
+        self.writing.set()
+        if self.block:
+            await asyncio.Event().wait()
+        raise ConnectionError("primary stepped down")
+
+def listing_document() -> dict:
+    return {
+        "_id": ObjectId(), "animal_id": str(ObjectId()), "seller_id": str(ObjectId()), "title": "Holstein cow",
+        "description": "Healthy two year old cow", "price": 50000.0, "location": "Pune", "status": "active",
+        "views": 3, "offers": 0, "created_at": datetime.utcnow(), "updated_at": datetime.utcnow()
+    }
+
+async def stored_views(mongo) -> dict:
+    return {str(listing["_id"]): listing["views"] async for listing in mongo.listings.find()}
+
+@pytest.fixture
+def views():
+    return ListingViews(flush_interval=60, dedupe_seconds=60, max_viewers=100)
+
+@pytest.mark.asyncio
+async def test_views_are_batched_per_listing(mongo, views):
+    listings = [listing_document() for _ in range(2)]
+    await mongo.listings.insert_many(listings)
+    first, second = (str(listing["_id"]) for listing in listings)
+
+    for _ in range(4):
+        assert views.record(first)
+    assert views.record(second)
+    assert views.pending(first) == 4
+
+    assert await views.flush() == 5
+    assert await stored_views(mongo) == {first: 7, second: 4}
+    assert views.stats()["batches"] == 1
+    assert views.pending(first) == 0
+    assert await views.flush() == 0
+
+def test_repeat_views_by_a_user_are_not_counted(views):
+    listing_id = str(ObjectId())
+
+    assert views.record(listing_id, "u1")
+    assert not views.record(listing_id, "u1")
+    assert views.record(listing_id, "u2")
+
+    assert views.pending(listing_id) == 2
+    assert views.stats()["deduplicated"] == 1
+
+@pytest.mark.asyncio
+async def test_reads_include_pending_views(mongo, monkeypatch, views):
+    listing = listing_document()
+    await mongo.listings.insert_one(listing)
+    monkeypatch.setattr(marketplace, "listing_views", views)
+
+    app = FastAPI()
+    app.include_router(marketplace.router, prefix="/api/v1")
+    app.dependency_overrides[get_current_active_user] = lambda: TokenUser(
+        id=str(ObjectId()), email="ravi@example.com", name="Ravi", role="buyer"
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test/api/v1") as client:
+        response = await client.get(f"/marketplace/listings/{listing['_id']}")
+
+    assert response.status_code == 200
+    assert response.json()["views"] == 4
+    assert await stored_views(mongo) == {str(listing["_id"]): 3}
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_the_counts(mongo, monkeypatch, views):
+    listing_id = str(ObjectId())
+    listings = FailingListings()
+    monkeypatch.setattr(listing_views_module, "get_collection", lambda name: listings)
+    views.record(listing_id)
+    views.record(listing_id)
+
+    with pytest.raises(ConnectionError):
+        await views.flush()
+
+    assert views.pending(listing_id) == 2
+    assert views.stats()["failures"] == 1
+
+@pytest.mark.asyncio
+async def test_cancelled_flush_keeps_the_counts(mongo, monkeypatch, views):
+    listing_id = str(ObjectId())
+    listings = FailingListings(block=True)
+    monkeypatch.setattr(listing_views_module, "get_collection", lambda name: listings)
+    views.record(listing_id)
+
+    task = asyncio.ensure_future(views.flush())
+    await listings.writing.wait()
+    # Recorded while the write was in flight
+    views.record(listing_id)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert views.pending(listing_id) == 2
+
+@pytest.mark.asyncio
+async def test_stop_flushes_what_is_left(mongo, views):
+    listing = listing_document()
+    await mongo.listings.insert_one(listing)
+    listing_id = str(listing["_id"])
+
+    views.start()
+    views.record(listing_id)
+    views.record(listing_id)
+    await views.stop()
+
+    assert await stored_views(mongo) == {listing_id: 5}
+    assert views.stats()["pending_views"] == 0
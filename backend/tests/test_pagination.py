@@ -0,0 +1,115 @@
+from datetime import datetime
+
+import httpx
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI, HTTPException
+
+from app.api.v1 import animals
+from app.auth.dependencies import get_current_farmer
+from app.models.user import TokenUser
+from app.pagination import decode_cursor, encode_cursor, keyset_filter, split_page
+
+def test_cursor_round_trip():
+    value = datetime(2024, 5, 1, 12, 30, 15, 250000)
+    document_id = ObjectId()
+    token = encode_cursor(value, document_id)
+    assert "=" not in token
+    assert decode_cursor(token) == (value, document_id)
+
+@pytest.mark.parametrize("token", ["", "not-a-cursor", encode_cursor(datetime(2024, 1, 1), "nope")])
+def test_decode_cursor_rejects_garbage(token):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(token)
+    assert error.value.status_code == 400
+
+def test_keyset_filter_breaks_ties_on_id():
+    value = datetime(2024, 1, 1)
+    document_id = ObjectId()
+    assert keyset_filter("timestamp", value, document_id) == {
+        "$or": [
+            {"timestamp": {"$lt": value}},
+            {"timestamp": value, "_id": {"$lt": document_id}}
+        ]
+    }
+
+from datetime import datetime
+
+import httpx
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI, HTTPException
+
+from app.api.v1 import animals
+from app.auth.dependencies import get_current_farmer
+from app.models.user import TokenUser
+from app.pagination import decode_cursor, encode_cursor, keyset_filter, split_page
+
+def test_cursor_round_trip():
+    value = datetime(2024, 5, 1, 12, 30, 15, 250000)
+    document_id = ObjectId()
+    token = encode_cursor(value, document_id)
+    assert "=" not in token
+    assert decode_cursor(token) == (value, document_id)
+
+@pytest.mark.parametrize("token", ["", "not-a-cursor", encode_cursor(datetime(2024, 1, 1), "nope")])
+def test_decode_cursor_rejects_garbage(token):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(token)
+    assert error.value.status_code == 400
+
+def test_keyset_filter_breaks_ties_on_id():
+    value = datetime(2024, 1, 1)
+    document_id = ObjectId()
+    assert keyset_filter("timestamp", value, document_id) == {
+        "$or": [
+            {"timestamp": {"$lt": value}},
+            {"timestamp": value, "_id": {"$lt": document_id}}
+        ]
+    }
+
+def test_split_page():
+    documents = [{"_id": ObjectId(), "created_at": datetime(2024, 1, day)} for day in (3, 2, 1)]
+    page, token = split_page(documents, 2)
+    assert page == documents[:2]
+    assert decode_cursor(token) == (documents[1]["created_at"], documents[1]["_id"])
+
+    page, token = split_page(documents, 3)
+    assert page == documents
+    assert token is None
+
+@pytest.mark.asyncio
+async def test_animal_pages_follow_the_cursor_across_ties(mongo):
+    owner_id = str(ObjectId())
+    created_at = datetime(2024, 1, 1)
+    documents = [
+        {
+            "_id": ObjectId(), "name": f"animal-{i}", "species": "cattle", "breed": "holstein",
+            "dob": datetime(2022, 1, 1), "weight": 450.0, "location": "Pune", "owner_id": owner_id,
+            "photos": [], "health_score": 80.0, "vaccination": [], "status": "active",
+            # Pairs share a created_at, so _id has to break the ties
+            "created_at": created_at.replace(day=1 + i // 2), "updated_at": created_at
+        }
+        for i in range(5)
+    ]
+    await mongo.animals.insert_many(documents)
+
+    app = FastAPI()
+    app.include_router(animals.router, prefix="/api/v1")
+    app.dependency_overrides[get_current_farmer] = lambda: TokenUser(
+        id=owner_id, email="farmer@example.com", name="Farmer", role="farmer"
+    )
+    transport = httpx.ASGITransport(app=app)
+    seen = []
+    params = {"size": 2}
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        while True:
+            body = (await client.get("/api/v1/animals/my/animals", params=params)).json()
+            assert body["total"] == 5
+            seen.extend(animal["name"] for animal in body["animals"])
+            if body["next_cursor"] is None:
+                break
+            params["after"] = body["next_cursor"]
+
+    expected = sorted(documents, key=lambda document: (document["created_at"], document["_id"]), reverse=True)
+    assert seen == [document["name"] for document in expected]
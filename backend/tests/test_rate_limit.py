@@ -0,0 +1,39 @@
+from app.rate_limit import MemoryBucketStore
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def store(monkeypatch, cleanup_interval: float = 60.0):
+    clock = Clock()
+    monkeypatch.setattr("app.rate_limit.time.monotonic", clock)
+    return MemoryBucketStore(cleanup_interval), clock
+
+def test_burst_then_wait(monkeypatch):
+    buckets, clock = store(monkeypatch)
+    assert [buckets.take_now("ip", 2.0, 3) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert buckets.take_now("ip", 2.0, 3) == 0.5
+
+    clock.now += 0.5
+    assert buckets.take_now("ip", 2.0, 3) == 0.0
+    assert buckets.take_now("other", 2.0, 3) == 0.0
+
+def test_refill_is_capped_at_burst(monkeypatch):
+    buckets, clock = store(monkeypatch)
+    buckets.take_now("ip", 1.0, 2)
+    clock.now += 100
+    assert [buckets.take_now("ip", 1.0, 2) for _ in range(3)] == [0.0, 0.0, 1.0]
+
+def test_cleanup_drops_full_buckets_only(monkeypatch):
+    buckets, clock = store(monkeypatch, cleanup_interval=10)
+    buckets.take_now("idle", 1.0, 1)
+    buckets.take_now("busy", 0.01, 5)
+    assert len(buckets) == 2
+
+    clock.now += 10
+    buckets.take_now("new", 1.0, 1)
+    assert len(buckets) == 2
+    assert buckets.take_now("busy", 0.01, 5) == 0.0
@@ -0,0 +1,22 @@
+from app.search import prefilter_trigrams, text_trigrams
+
+def test_text_trigrams():
+    assert text_trigrams("Gir") == [" gi", "gir", "ir "]
+    assert text_trigrams("Gir, GIR cow!") == text_trigrams("gir cow")
+    assert text_trigrams("") == []
+
+def test_misspelling_shares_trigrams():
+    shared = set(text_trigrams("holstien")) & set(text_trigrams("Holstein"))
+    assert shared == {" ho", "hol", "ols", "lst"}
+
+def test_prefilter_picks_the_rarest():
+    trigrams = ["a", "b", "c", "d", "e"]
+    # 0.4 of 5 trigrams is 2 shared, so a similar title holds one of any 4
+    assert prefilter_trigrams(trigrams, [50, 1, 9, 7, 3], 0.4) == ["b", "e", "d", "c"]
+    assert prefilter_trigrams(trigrams, [50, 1, 9, 7, 3], 1.0) == ["b"]
+
+def test_prefilter_never_loses_a_similar_title():
+    query = text_trigrams("holstien")
+    title = set(text_trigrams("Holstein"))
+    for frequencies in ([1] * len(query), list(range(len(query))), list(range(len(query), 0, -1))):
+        assert title.intersection(prefilter_trigrams(query, frequencies, 0.4))
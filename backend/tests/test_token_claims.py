@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from bson import ObjectId
+from fastapi import Depends, FastAPI
+
+from app.api.v1 import auth
+from app.auth import dependencies
+from app.auth.dependencies import get_current_farmer
+from app.auth.jwt import create_access_token, user_token_claims
+from app.config import settings
+from app.models.user import TokenUser
+from app.services.token_revocations import TokenRevocations
+from app.services.user_cache import user_cache
+
+def user_document(role: str, name: str) -> dict:
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(), "email": f"{name.lower()}@example.com", "name": name, "phone": "9876543210",
+        "role": role, "hashed_password": "x", "is_active": True, "created_at": now, "updated_at": now
+    }
+
+@pytest.fixture
+def revocations(mongo, monkeypatch):
+    monkeypatch.setattr(settings, "jwt_claims_enabled", True)
+    revocations = TokenRevocations()
+    monkeypatch.setattr(auth, "token_revocations", revocations)
+    monkeypatch.setattr(dependencies, "token_revocations", revocations)
+    user_cache.clear()
+    yield revocations
+    user_cache.clear()
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/api/v1")
+
+    @app.get("/api/v1/farm")
+    async def farm(current_user: TokenUser = Depends(get_current_farmer)):
+        return {"type": type(current_user).__name__, **current_user.dict()}
+
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test/api/v1")
+
+async def add_user(mongo, role: str, name: str) -> tuple:
+    document = user_document(role, name)
+    await mongo.users.insert_one(document)
+    token = create_access_token(data=user_token_claims(document))
+    return str(document["_id"]), {"Authorization": f"Bearer {token}"}
+
+@pytest.mark.asyncio
+async def test_claims_authorize_without_reading_the_user(revocations, mongo, client):
+    user_id, headers = await add_user(mongo, "farmer", "Asha")
+    await mongo.users.delete_one({"_id": ObjectId(user_id)})
+    async with client:
+        response = await client.get("/farm", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "type": "TokenUser", "id": user_id, "email": "asha@example.com", "name": "Asha",
+        "role": "farmer", "is_active": True
+    }
+
+@pytest.mark.asyncio
+async def test_tokens_without_claims_read_the_user(revocations, mongo, client, monkeypatch):
+    monkeypatch.setattr(settings, "jwt_claims_enabled", False)
+    user_id, headers = await add_user(mongo, "farmer", "Asha")
+    async with client:
+        response = await client.get("/farm", headers=headers)
+        assert response.json()["type"] == "TokenUser"
+
+        await mongo.users.delete_one({"_id": ObjectId(user_id)})
+        user_cache.clear()
+        assert (await client.get("/farm", headers=headers)).status_code == 401
+
+@pytest.mark.asyncio
+async def test_expired_tokens_are_refused(revocations, mongo, client):
+    document = user_document("farmer", "Asha")
+    await mongo.users.insert_one(document)
+    token = create_access_token(data=user_token_claims(document), expires_delta=timedelta(seconds=-1))
+    async with client:
+        response = await client.get("/farm", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("change", [{"is_active": False}, {"role": "buyer"}])
+async def test_admin_deactivation_and_role_change_revoke_tokens(revocations, mongo, client, change):
+    user_id, headers = await add_user(mongo, "farmer", "Asha")
+    _, admin_headers = await add_user(mongo, "admin", "Admin")
+    async with client:
+        assert (await client.get("/farm", headers=headers)).status_code == 200
+        response = await client.put(f"/auth/users/{user_id}", headers=admin_headers, json=change)
+        assert response.status_code == 200
+        assert (await client.get("/farm", headers=headers)).status_code == 401
+
+@pytest.mark.asyncio
+async def test_other_updates_keep_tokens(revocations, mongo, client):
+    user_id, headers = await add_user(mongo, "farmer", "Asha")
+    _, admin_headers = await add_user(mongo, "admin", "Admin")
+    async with client:
+        await client.put(f"/auth/users/{user_id}", headers=admin_headers, json={"kyc_status": "verified"})
+        assert (await client.get("/farm", headers=headers)).status_code == 200
+
+@pytest.mark.asyncio
+async def test_revoke_tokens_applies_in_other_workers_after_refresh(revocations, mongo, client):
+    user_id, headers = await add_user(mongo, "farmer", "Asha")
+    _, admin_headers = await add_user(mongo, "admin", "Admin")
+    other_worker = TokenRevocations()
+    await other_worker.refresh()
+    async with client:
+        response = await client.post(f"/auth/users/{user_id}/revoke-tokens", headers=admin_headers)
+        assert response.status_code == 204
+        assert (await client.get("/farm", headers=headers)).status_code == 401
+
+        # A token issued after the revocation carries the new version
+        user = await mongo.users.find_one({"_id": ObjectId(user_id)})
+        fresh = {"Authorization": f"Bearer {create_access_token(data=user_token_claims(user))}"}
+        assert (await client.get("/farm", headers=fresh)).status_code == 200
+
+    assert not other_worker.is_revoked(user_id, 0)
+    await other_worker.refresh()
+    assert other_worker.is_revoked(user_id, 0)
+    assert not other_worker.is_revoked(user_id, user["token_version"])
@@ -0,0 +1,143 @@
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+
+from app.api.v1 import auth
+from app.auth import dependencies
+from app.auth.jwt import create_access_token, user_token_claims
+from app.cache import TTLCache
+from app.config import settings
+from app.services.token_revocations import TokenRevocations
+from app.services.user_cache import user_cache
+
+def test_entries_expire_and_evict_least_recently_used(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(max_size=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.peek("b") is None
+    assert cache.get("a") == 1
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache = TTLCache(max_size=10, ttl=60)
+    release = asyncio.Event()
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        await release.wait()
+        return {"name": "Asha"}
+
+    waiting = [asyncio.ensure_future(cache.get_or_load("u", loader)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiting)
+
+    assert len(loads) == 1
+    assert all(result is results[0] for result in results)
+    assert cache.stats()["coalesced"] == 4
+    assert await cache.get_or_load("u", loader) is results[0]
+    assert len(loads) == 1
+
+@pytest.mark.asyncio
+async def test_load_overlapping_an_invalidation_is_not_cached():
+    cache = TTLCache(max_size=10, ttl=60)
+    release = asyncio.Event()
+
+    async def loader():
+        await release.wait()
+        return "stale"
+
+    waiting = asyncio.ensure_future(cache.get_or_load("u", loader))
+    await asyncio.sleep(0)
+    cache.pop("u")
+    release.set()
+
+    assert await waiting == "stale"
+    assert cache.peek("u") is None
+
+@pytest.mark.asyncio
+async def test_missing_users_are_not_cached():
+    cache = TTLCache(max_size=10, ttl=60)
+
+    async def loader():
+        return None
+
+    assert await cache.get_or_load("u", loader) is None
+    assert len(cache) == 0
+
+def user_document(role: str, name: str) -> dict:
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(), "email": f"{name.lower()}@example.com", "name": name, "phone": "9876543210",
+        "role": role, "hashed_password": "x", "is_active": True, "created_at": now, "updated_at": now
+    }
+
+@pytest.fixture
+def users(mongo, monkeypatch):
+    monkeypatch.setattr(settings, "user_cache_enabled", True)
+    monkeypatch.setattr(settings, "jwt_claims_enabled", False)
+    revocations = TokenRevocations()
+    monkeypatch.setattr(auth, "token_revocations", revocations)
+    monkeypatch.setattr(dependencies, "token_revocations", revocations)
+    user_cache.clear()
+    yield mongo.users
+    user_cache.clear()
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/api/v1")
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test/api/v1")
+
+async def add_user(users, role: str, name: str) -> tuple:
+    document = user_document(role, name)
+    await users.insert_one(document)
+    token = create_access_token(data=user_token_claims(document))
+    return str(document["_id"]), {"Authorization": f"Bearer {token}"}
+
+@pytest.mark.asyncio
+async def test_profile_update_replaces_the_cached_user(users, client):
+    user_id, headers = await add_user(users, "farmer", "Asha")
+    async with client:
+        assert (await client.get("/auth/me", headers=headers)).json()["name"] == "Asha"
+        assert user_cache.peek(user_id) is not None
+
+        # Writes that bypass update_user are served stale until the entry expires
+        await users.update_one({"_id": ObjectId(user_id)}, {"$set": {"phone": "9999999999"}})
+        assert (await client.get("/auth/me", headers=headers)).json()["phone"] == "9876543210"
+
+        response = await client.put("/auth/me", headers=headers, json={"name": "Asha Rao"})
+        assert response.status_code == 200
+        profile = (await client.get("/auth/me", headers=headers)).json()
+        assert (profile["name"], profile["phone"]) == ("Asha Rao", "9999999999")
+
+@pytest.mark.asyncio
+async def test_admin_update_and_revocation_drop_the_cached_user(users, client):
+    user_id, headers = await add_user(users, "farmer", "Asha")
+    _, admin_headers = await add_user(users, "admin", "Admin")
+    async with client:
+        await client.get("/auth/me", headers=headers)
+
+        response = await client.put(f"/auth/users/{user_id}", headers=admin_headers, json={"kyc_status": "verified"})
+        assert response.status_code == 200
+        assert user_cache.peek(user_id) is None
+        assert (await client.get("/auth/me", headers=headers)).json()["kyc_status"] == "verified"
+
+        assert user_cache.peek(user_id) is not None
+        response = await client.post(f"/auth/users/{user_id}/revoke-tokens", headers=admin_headers)
+        assert response.status_code == 204
+        assert user_cache.peek(user_id) is None
@@ -145,6 +145,42 @@ class ApiService {
     })
   }
 
+  // Live IoT readings (Server-Sent Events). EventSource cannot send the
+  // Authorization header, so the stream is read with fetch instead.
+  subscribeIotMetrics(
+    animalIds: string[],
+    onReading: (reading: any) => void
+  ): () => void {
+    const controller = new AbortController()
+    const query = animalIds.length ? `?animal_ids=${animalIds.join(',')}` : ''
+
+    const run = async () => {
+      const response = await fetch(`${API_BASE}/iot/stream${query}`, {
+        headers: this.getAuthHeaders(),
+        signal: controller.signal,
+      })
+      if (!response.ok || !response.body) return
+
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ''
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+        const events = buffer.split('\n\n')
+        buffer = events.pop() || ''
+        for (const event of events) {
+          const data = event.split('\n').find((line) => line.startsWith('data: '))
+          if (data) onReading(JSON.parse(data.slice(6)))
+        }
+      }
+    }
+
+    run().catch(() => {})
+    return () => controller.abort()
+  }
+
   // Analytics
   async getAnalytics() {
     return this.request('/analytics/dashboard')